@@ -33,17 +33,28 @@ try:
 except:
     import http.client as httplib
 
-import mimetypes
 import socket
 import base64
+import collections
+import email.utils
+import errno
+import heapq
+import io
+import itertools
 import re
-import argparse
 import sys
 import os
+import random
 import ssl
+import struct
+import threading
 import time
 import warnings
 
+# argparse, concurrent.futures, hashlib, json, mimetypes, mmap and tempfile
+# are imported where they are used, most programs need only some of them
+# and they would make up a large part of the import time
+
 __version__ = '6.5.4'
 
 class BaseError(Exception):
@@ -351,6 +362,7 @@ if PYTHON_3:
             # filename
             head.append('--' + boundary)
             head.append('Content-Disposition: form-data; name="src"; filename="%s"' % filename)
+            import mimetypes
             mime_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
             head.append('Content-Type: ' + mime_type)
             head.append('')
@@ -661,6 +673,7 @@ else:
             # filename
             body.append('--' + boundary)
             body.append('Content-Disposition: form-data; name="src"; filename="%s"' % filename)
+            import mimetypes
             mime_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
             body.append('Content-Type: ' + str(mime_type))
             body.append('')
@@ -752,8 +765,12 @@ def gen_fields(fields):
         if val:
             yield key, str(val)
 
-def add_file_field(name, file_name, data, body, mime_type = None):
-    # file field
+def encode_text(lines):
+    if PYTHON_3:
+        return '\r\n'.join(lines).encode('utf-8')
+    return '\r\n'.join(lines)
+
+def encode_file_field_head(name, file_name, mime_type = None):
     head = []
     head.append('--' + MULTIPART_BOUNDARY)
     head.append('Content-Disposition: form-data; name="{}"; filename="{}"'.format(name, file_name))
@@ -761,38 +778,163 @@ def add_file_field(name, file_name, data, body, mime_type = None):
         mime_type = 'application/octet-stream'
     head.append('Content-Type: {}'.format(mime_type))
     head.append('')
-    if PYTHON_3:
-        body.append('\r\n'.join(head).encode('utf-8'))
-    else:
-        body.append('\r\n'.join(head))
-    body.append(data)
+    return encode_text(head)
 
 def encode_multipart_post_data(fields, files, raw_data):
-    head, tail = [], []
-    body = []
+    return MultipartBody(fields, files, raw_data).getvalue()
+
+CHUNK_SIZE = 65536
+
+def read_file_chunks(file_name, size, chunk_size = CHUNK_SIZE):
+    with open(file_name, 'rb') as f:
+        while size > 0:
+            chunk = f.read(min(size, chunk_size))
+            if not chunk:
+                raise Error('The file {} was changed during the upload.'.format(file_name))
+            size -= len(chunk)
+            yield chunk
+
+def send_file(conn, file_name, size):
+    if not PYTHON_3 or not size:
+        for chunk in read_file_chunks(file_name, size):
+            conn.send(chunk)
+        return
+
+    with open(file_name, 'rb') as f:
+        if not isinstance(conn.sock, ssl.SSLSocket):
+            # the kernel copies the file to a plain socket with sendfile
+            if conn.sock.sendfile(f, 0, size) == size:
+                return
+        else:
+            # TLS needs the data in user space, send slices of the mapped
+            # file to avoid copying it into bytes objects
+            import mmap
+            try:
+                mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            except ValueError:
+                mapped = None
+            if mapped is not None:
+                try:
+                    with memoryview(mapped) as view:
+                        for offset in range(0, size, CHUNK_SIZE):
+                            conn.sock.sendall(view[offset:offset + CHUNK_SIZE])
+                finally:
+                    mapped.close()
+                return
+    raise Error('The file {} was changed during the upload.'.format(file_name))
+
+def encode_fields(fields):
+    head = []
     for field, value in gen_fields(fields):
         head.append('--' + MULTIPART_BOUNDARY)
         head.append('Content-Disposition: form-data; name="%s"' % field)
         head.append('')
         head.append(value)
-    if PYTHON_3:
-        body.append('\r\n'.join(head).encode('utf-8'))
-    else:
-        body.append('\r\n'.join(head))
-
-    for name, file_name in iter_items(files):
-        with open(file_name, 'rb') as f:
-            add_file_field(name, file_name, f.read(), body, mimetypes.guess_type(file_name)[0])
-
-    for name, data in iter_items(raw_data):
-        add_file_field(name, name, data, body)
-
-    # finalize
-    tail.append('--' + MULTIPART_BOUNDARY + '--')
-    tail.append('')
-    body.append('\r\n'.join(tail).encode('utf-8'))
-
-    return b'\r\n'.join(body)
+    return encode_text(head)
+
+class RequestTemplate:
+    """Options of a converter encoded once for many conversions.
+
+    The encoded options are reused by the conversions whose fields include
+    them unchanged, only the other fields are encoded per conversion.
+    """
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self.head = encode_fields(self.fields)
+
+    def getExtraFields(self, fields):
+        """Returns the fields missing in the template or None if the
+        template fields are not all included in fields."""
+        for name, value in iter_items(self.fields):
+            if name not in fields:
+                return None
+            other = fields[name]
+            if other is not value and other != value:
+                return None
+        return dict((name, value) for name, value in iter_items(fields)
+                    if name not in self.fields)
+
+def is_input_field(name):
+    """Tells if the field is a converted input. The inputs are read from the
+    disk, the files of options such as watermarks are often the same in many
+    conversions and are kept by the AssetCache."""
+    return name in ('file', 'stream') or re.match(r'f_\d+$', name) is not None
+
+class MultipartBody:
+    """Multipart form data streamed from its sources.
+
+    Only the sizes of the uploaded files are determined up front, their
+    content is read in chunks while the body is being sent. The body can
+    be sent repeatedly, every pass reads the files again.
+    """
+
+    def __init__(self, fields, files, raw_data, assets=None, template=None):
+        extra = None
+        if template is not None:
+            extra = template.getExtraFields(fields)
+
+        # file contents are kept as separate parts between the encoded text
+        self.parts = []
+        if extra is None:
+            text = [encode_fields(fields)]
+        else:
+            # the template is sent as it is, without copying
+            self.parts.append(template.head)
+            text = []
+            encoded = encode_fields(extra)
+            if encoded:
+                text += [b'\r\n' if template.head else b'', encoded]
+        if files:
+            import mimetypes
+        for name, file_name in iter_items(files):
+            text += [b'\r\n',
+                     encode_file_field_head(name, file_name, mimetypes.guess_type(file_name)[0]),
+                     b'\r\n']
+            self.parts.append(b''.join(text))
+            data = None
+            if assets is not None and not is_input_field(name):
+                data = assets.get(file_name)
+            if data is None:
+                self.parts.append((file_name, os.path.getsize(file_name)))
+            else:
+                self.parts.append(data)
+            text = []
+
+        for name, data in iter_items(raw_data):
+            text += [b'\r\n', encode_file_field_head(name, name), b'\r\n']
+            self.parts.append(b''.join(text))
+            self.parts.append(data)
+            text = []
+
+        # finalize
+        text += [b'\r\n', encode_text(['--' + MULTIPART_BOUNDARY + '--', ''])]
+        self.parts.append(b''.join(text))
+
+        self.length = 0
+        for part in self.parts:
+            self.length += part[1] if isinstance(part, tuple) else len(part)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for part in self.parts:
+            if isinstance(part, tuple):
+                for chunk in read_file_chunks(*part):
+                    yield chunk
+            elif part:
+                yield part
+
+    def send(self, conn):
+        for part in self.parts:
+            if isinstance(part, tuple):
+                send_file(conn, *part)
+            elif part:
+                conn.send(part)
+
+    def getvalue(self):
+        return b''.join(self)
 
 def base64_encode(value):
     if not isinstance(value, bytes):
@@ -806,118 +948,1572 @@ def encode_credentials(user_name, password):
     auth = '%s:%s' % (user_name, password)
     return 'Basic ' + base64_encode(auth)
 
+_monotonic = getattr(time, 'monotonic', time.time)
+
+class ConversionResult(collections.namedtuple('ConversionResult', [
+        'output', 'job_id', 'debug_log_url', 'remaining_credit_count',
+        'consumed_credit_count', 'page_count', 'total_page_count',
+        'output_size', 'headers'])):
+    """Immutable outcome of a single conversion.
+
+    output  -- the output data, None if it was written to a stream
+    headers -- a tuple of (name, value) pairs of all X-Pdfcrowd-* headers
+    """
+    __slots__ = ()
+
+    def getOutput(self):
+        return self.output
+
+    def getJobId(self):
+        return self.job_id
+
+    def getDebugLogUrl(self):
+        return self.debug_log_url
+
+    def getRemainingCreditCount(self):
+        return self.remaining_credit_count
+
+    def getConsumedCreditCount(self):
+        return self.consumed_credit_count
+
+    def getPageCount(self):
+        return self.page_count
+
+    def getTotalPageCount(self):
+        return self.total_page_count
+
+    def getOutputSize(self):
+        return self.output_size
+
+    def getHeader(self, name, default=None):
+        name = name.lower()
+        for header, value in self.headers:
+            if header.lower() == name:
+                return value
+        return default
+
+# the result reported before the first conversion
+_EMPTY_RESULT = ConversionResult(None, '', None, 999999, 0, 0, 0, 0, ())
+
+def create_result(output, headers):
+    values = dict((name.lower(), value) for name, value in headers)
+    return ConversionResult(
+        output,
+        values.get('x-pdfcrowd-job-id', ''),
+        values.get('x-pdfcrowd-debug-log', ''),
+        int(values.get('x-pdfcrowd-remaining-credits', 999999)),
+        int(values.get('x-pdfcrowd-consumed-credits', 0)),
+        int(values.get('x-pdfcrowd-pages', 0)),
+        int(values.get('x-pdfcrowd-total-pages', 0)),
+        int(values.get('x-pdfcrowd-output-size', 0)),
+        tuple(headers))
+
+class ConnectionPool:
+    """Thread-safe pool of idle HTTP/1.1 keep-alive connections.
+
+    max_per_host -- the maximum number of idle connections kept per host
+    idle_timeout -- seconds after which an idle connection is discarded
+    """
+
+    def __init__(self, max_per_host=10, idle_timeout=30):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.idle = {}
+
+    def acquire(self, key):
+        """Returns an idle connection for the key or None."""
+        expired = []
+        conn = None
+        with self.lock:
+            conns = self.idle.get(key)
+            if conns:
+                deadline = _monotonic() - self.idle_timeout
+                while conns and conns[0][1] < deadline:
+                    expired.append(conns.pop(0)[0])
+                if conns:
+                    conn = conns.pop()[0]
+        for stale in expired:
+            stale.close()
+        return conn
+
+    def release(self, key, conn):
+        """Returns a connection with a fully read response to the pool."""
+        if conn.sock is not None:
+            with self.lock:
+                conns = self.idle.setdefault(key, [])
+                if len(conns) < self.max_per_host:
+                    conns.append((conn, _monotonic()))
+                    return
+        conn.close()
+
+    def clear(self):
+        """Closes all idle connections."""
+        with self.lock:
+            idle, self.idle = self.idle, {}
+        for conns in idle.values():
+            for conn, released in conns:
+                conn.close()
+
+# the pool shared by all converter classes
+connection_pool = ConnectionPool()
+
+# errors of a request which was not received by the server
+RESET_ERRNOS = (errno.ECONNRESET, errno.ECONNABORTED, errno.ECONNREFUSED, errno.EPIPE)
+
+def is_connection_reset(err):
+    if isinstance(err, ssl.SSLError):
+        return False
+    return isinstance(err, httplib.BadStatusLine) or \
+        getattr(err, 'errno', None) in RESET_ERRNOS
+
+def parse_retry_after(value):
+    """Returns the seconds requested by a Retry-After header or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    date = email.utils.parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(date) - time.time())
+
+class RetryPolicy:
+    """Decides which failed requests are retried and how long to wait.
+
+    base -- the minimal delay in seconds
+    cap -- the maximal delay in seconds
+    max_retry_after -- a request asking for a longer Retry-After delay fails
+    budget_ratio -- the retry tokens earned by one successful request
+    budget_size -- the initial and the maximal number of retry tokens
+
+    The delays grow with decorrelated jitter unless the server sends
+    Retry-After. Every retry spends one token, so once the initial tokens
+    are used up, retries add at most budget_ratio of extra requests.
+    """
+
+    RETRY_STATUS_CODES = (429, 502, 503)
+
+    def __init__(self, base=0.1, cap=10.0, max_retry_after=60.0,
+                 budget_ratio=0.1, budget_size=10):
+        self.base = base
+        self.cap = cap
+        self.max_retry_after = max_retry_after
+        self.budget_ratio = budget_ratio
+        self.budget_size = budget_size
+        self.lock = threading.Lock()
+        self.tokens = float(budget_size)
+
+    def is_retryable(self, error):
+        if getattr(error, '_connection_reset', False):
+            return True
+        try:
+            return int(error.getStatusCode() or 0) in self.RETRY_STATUS_CODES
+        except ValueError:
+            return False
+
+    def getDelay(self, error, previous_delay):
+        """Returns the seconds to wait before the next attempt or None if the request must not be retried."""
+        if not self.is_retryable(error):
+            return None
+        delay = parse_retry_after(getattr(error, '_retry_after', None))
+        if delay is None:
+            delay = min(self.cap, random.uniform(
+                self.base, max(self.base, previous_delay) * 3))
+        elif delay > self.max_retry_after:
+            return None
+        with self.lock:
+            if self.tokens < 1:
+                return None
+            self.tokens -= 1
+        return delay
+
+    def recordSuccess(self):
+        with self.lock:
+            self.tokens = min(self.budget_size, self.tokens + self.budget_ratio)
+
+def shutdown_socket(sock):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except socket.error:
+        pass
+
+class DeadlineScheduler:
+    """Shuts down the sockets of DeadlineTimers when their deadlines pass.
+
+    One thread serves all timers, it runs only while a timer is pending.
+    Cancelled timers are dropped from the heap when they come first or
+    when they make up most of it.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.heap = []
+        self.cancelled = 0
+        self.counter = itertools.count()
+        self.thread = None
+
+    def add(self, timer):
+        with self.condition:
+            heapq.heappush(self.heap, (timer.deadline, next(self.counter), timer))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='pdfcrowd-deadlines')
+                self.thread.daemon = True
+                self.thread.start()
+            elif self.heap[0][2] is timer:
+                self.condition.notify()
+
+    def cancel(self, timer):
+        with self.condition:
+            if timer.sock is None:
+                return
+            timer.sock = None
+            self.cancelled += 1
+            if self.heap[0][2] is timer:
+                # the thread drops it and waits for the next timer
+                self.condition.notify()
+            elif self.cancelled > 64 and self.cancelled * 2 > len(self.heap):
+                self.heap = [entry for entry in self.heap if entry[2].sock is not None]
+                heapq.heapify(self.heap)
+                self.cancelled = 0
+
+    def _run(self):
+        with self.condition:
+            while True:
+                while self.heap and self.heap[0][2].sock is None:
+                    heapq.heappop(self.heap)
+                    self.cancelled -= 1
+                if not self.heap:
+                    self.thread = None
+                    return
+                deadline, number, timer = self.heap[0]
+                remaining = deadline - _monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+                heapq.heappop(self.heap)
+                shutdown_socket(timer.sock)
+                timer.sock = None
+
+deadline_scheduler = DeadlineScheduler()
+
+class DeadlineTimer:
+    """Shuts down a socket when the deadline passes unless cancelled before.
+
+    The socket timeouts limit single operations only, so a steady slow
+    upload or download would outlast the deadline.
+    """
+
+    def __init__(self, sock, deadline, scheduler = deadline_scheduler):
+        self.sock = sock
+        self.deadline = deadline
+        self.scheduler = scheduler
+        scheduler.add(self)
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+class CancellationToken:
+    """Aborts conversions in progress, usually from another thread.
+
+    The connections of the conversions are shut down, so blocked uploads
+    and downloads fail at once. A cancelled token stays cancelled.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        self.callbacks = {}
+
+    def cancel(self):
+        with self.lock:
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, {}
+        for callback in callbacks.values():
+            callback()
+
+    def isCancelled(self):
+        return self.event.is_set()
+
+    def wait(self, timeout):
+        """Sleeps for timeout seconds or until the token is cancelled."""
+        self.event.wait(timeout)
+
+    def register(self, key, callback):
+        """Calls callback on cancellation, returns False if already cancelled."""
+        with self.lock:
+            if self.event.is_set():
+                return False
+            self.callbacks[key] = callback
+            return True
+
+    def unregister(self, key):
+        with self.lock:
+            self.callbacks.pop(key, None)
+
+class CreditTracker:
+    """Tracks the credit balance of an account from the API responses.
+
+    A conversion reserves its estimated cost, the average credits consumed
+    by the last conversions, until it is finished. A conversion which the
+    balance can't cover waits for the conversions in progress and fails with
+    an Error if the balance is still too low, so that a batch stops before
+    it uploads inputs which the API would reject. Until the first response
+    reports the balance, the conversions run one at a time.
+
+    reserve      -- credits which the conversions must leave on the account
+    history      -- the number of the last conversions the cost is estimated from
+    default_cost -- the estimated cost before a conversion has finished
+
+    One tracker should be shared by all clients of an account.
+    """
+
+    def __init__(self, reserve=0, history=100, default_cost=1):
+        self.reserve = reserve
+        self.default_cost = default_cost
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.balance = None
+        self.costs = collections.deque(maxlen=history)
+        self.pending = 0
+        self.running = 0
+
+    def getBalance(self):
+        """Returns the last remaining credit count reported by the API or None."""
+        return self.balance
+
+    def setBalance(self, balance):
+        """Sets the balance known from elsewhere, e.g. after a top-up."""
+        with self.lock:
+            self.balance = balance
+            self.changed.notify_all()
+
+    def getEstimatedCost(self, count=1):
+        """Returns the estimated credits of count conversions."""
+        with self.lock:
+            return count * self._estimate()
+
+    def canAfford(self, count=1):
+        """Returns False if the known balance can't cover count more
+        conversions besides the conversions in progress."""
+        with self.lock:
+            return self.balance is None or \
+                self.balance - self.pending - count * self._estimate() >= self.reserve
+
+    def acquire(self, timeout=None):
+        """Reserves the estimated cost of a conversion and returns it.
+
+        Waits while the cost doesn't fit the balance and other conversions
+        run, returns None if it doesn't fit after timeout seconds. Raises
+        Error if the balance is too low and no conversion runs.
+        """
+        deadline = None if timeout is None else _monotonic() + timeout
+        with self.lock:
+            while True:
+                cost = self._estimate()
+                if self.balance is None:
+                    # the first response reports the balance
+                    fits = not self.running
+                else:
+                    fits = self.balance - self.pending - cost >= self.reserve
+                if fits:
+                    self.pending += cost
+                    self.running += 1
+                    return cost
+                if not self.running:
+                    raise Error('Not enough credits, the balance is {} and a conversion is estimated to cost {:g}.'.format(self.balance, cost))
+                if deadline is None:
+                    self.changed.wait()
+                else:
+                    remaining = deadline - _monotonic()
+                    if remaining <= 0:
+                        return None
+                    self.changed.wait(remaining)
+
+    def release(self, cost, result, succeeded):
+        """Returns the cost reserved by acquire and updates the balance and
+        the estimate from the ConversionResult of the conversion."""
+        with self.lock:
+            self.running -= 1
+            self.pending = self.pending - cost if self.running else 0
+            remaining = result.getHeader('X-Pdfcrowd-Remaining-Credits')
+            if remaining is not None:
+                self.balance = int(remaining)
+            if succeeded and result.getHeader('X-Pdfcrowd-Consumed-Credits') is not None:
+                self.costs.append(result.consumed_credit_count)
+            self.changed.notify_all()
+
+    def _estimate(self):
+        if not self.costs:
+            return self.default_cost
+        return float(sum(self.costs)) / len(self.costs)
+
+class RateLimiter:
+    """Limits the rate and the concurrency of the API requests.
+
+    The requests wait for a token of a bucket refilled at the given rate
+    and for a free slot, so a burst of conversions is smoothed instead of
+    being answered by 429 and 503 responses. Each attempt of a retried
+    conversion is a request. Waiting for a retry doesn't hold a slot.
+
+    rate        -- requests per second, None for no limit
+    burst       -- requests which can be sent at once after a pause
+    concurrency -- requests in progress at once, None for no limit
+
+    One limiter should be shared by all clients of the process.
+    """
+
+    def __init__(self, rate=None, burst=1, concurrency=None):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.tokens = burst
+        self.updated = _monotonic()
+        self.running = 0
+
+    def getRunning(self):
+        """Returns the number of the requests in progress."""
+        return self.running
+
+    def acquire(self, timeout=None):
+        """Waits for a token and a free slot at most timeout seconds.
+        Returns False if the timeout passed, call release() otherwise."""
+        deadline = None if timeout is None else _monotonic() + timeout
+        with self.lock:
+            while True:
+                wait = self._try_acquire()
+                if wait is None:
+                    return True
+                if deadline is not None:
+                    remaining = deadline - _monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait == 0 else min(wait, remaining)
+                self.changed.wait(wait or None)
+
+    def tryAcquire(self):
+        """Takes a token and a free slot without waiting. Returns None if
+        taken, call release() then. Otherwise returns the seconds until a
+        token is available or 0 if no slot is free."""
+        with self.lock:
+            return self._try_acquire()
+
+    def release(self, error=None, elapsed=None):
+        """Frees the slot taken by acquire or tryAcquire.
+
+        error   -- the Error the request failed with
+        elapsed -- the seconds the request took, None if it didn't finish
+        """
+        with self.lock:
+            self.running -= 1
+            self._update(error, elapsed)
+            self.changed.notify_all()
+
+    # adapts the limits to the outcome of a request
+    def _update(self, error, elapsed):
+        pass
+
+    # takes a token and a slot and returns None or returns the seconds until
+    # a token is available, 0 if only a release frees a slot
+    def _try_acquire(self):
+        if self.concurrency is not None and self.running >= self.concurrency:
+            return 0
+        if self.rate is not None:
+            now = _monotonic()
+            self.tokens = min(self.burst,
+                              self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+        self.running += 1
+        return None
+
+class AdaptiveLimiter(RateLimiter):
+    """A RateLimiter adapting the concurrency to the latency and the errors.
+
+    The concurrency grows by one per round of successful requests which use
+    all the slots while the average latency stays within tolerance times the
+    baseline, the lowest
+    average seen, which rises slowly to follow larger documents. After
+    a 429, 502 or 503 response, a reset connection or a latency above the
+    tolerance, the concurrency is multiplied by backoff, at most once per
+    average latency, so that the requests sent before the cut don't cut it
+    again.
+
+    initial   -- the concurrency to start with
+    minimum   -- the lowest concurrency
+    maximum   -- the highest concurrency
+    tolerance -- the allowed ratio of the average latency to the baseline
+    backoff   -- the multiplier of the concurrency after an overload
+    rate      -- requests per second, None for no limit
+    burst     -- requests which can be sent at once after a pause
+    """
+
+    OVERLOAD_STATUS_CODES = RetryPolicy.RETRY_STATUS_CODES
+
+    # the weight of a request in the average latency
+    SMOOTHING = 0.2
+
+    # the fraction of the difference the baseline rises by per request
+    BASELINE_DRIFT = 0.01
+
+    def __init__(self, initial=4, minimum=1, maximum=64, tolerance=2.0,
+                 backoff=0.7, rate=None, burst=1):
+        RateLimiter.__init__(self, rate, burst, initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.limit = float(initial)
+        self.latency = None
+        self.baseline = None
+        self.decreased = None
+
+    def getConcurrency(self):
+        """Returns the current limit of the requests in progress."""
+        return self.concurrency
+
+    def getLatency(self):
+        """Returns the average latency of the requests or None."""
+        return self.latency
+
+    def _update(self, error, elapsed):
+        if error is not None:
+            if self._is_overload(error):
+                self._decrease()
+            return
+        if elapsed is None:
+            return
+        if self.latency is None:
+            self.latency = self.baseline = elapsed
+        else:
+            self.latency += (elapsed - self.latency) * self.SMOOTHING
+            self.baseline = min(self.latency, self.baseline +
+                                (self.latency - self.baseline) * self.BASELINE_DRIFT)
+        if self.latency > self.tolerance * self.baseline:
+            self._decrease()
+        elif self.running + 1 >= self.concurrency:
+            # only a limit which is reached is known to be too low
+            self._set_limit(self.limit + 1.0 / self.limit)
+
+    def _is_overload(self, error):
+        if getattr(error, '_connection_reset', False):
+            return True
+        try:
+            return int(error.getStatusCode() or 0) in self.OVERLOAD_STATUS_CODES
+        except ValueError:
+            return False
+
+    def _decrease(self):
+        now = _monotonic()
+        if self.decreased is not None and now - self.decreased < (self.latency or 0):
+            return
+        self.decreased = now
+        self._set_limit(self.limit * self.backoff)
+
+    def _set_limit(self, limit):
+        self.limit = max(self.minimum, min(self.maximum, limit))
+        self.concurrency = int(self.limit)
+
+class CircuitBreaker:
+    """Fails conversions at once while the API can't be reached.
+
+    After failure_threshold consecutive connection errors or 5xx responses
+    the breaker opens and the requests fail without connecting. After
+    reset_timeout seconds it is half-open and lets probe_count requests
+    through, the others still fail. A successful probe closes the breaker,
+    a failed one opens it again.
+
+    One breaker should be shared by all clients of the process.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, probe_count=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_count = probe_count
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.last_error = None
+        self.opened = None
+        self.probes = 0
+
+    def getState(self):
+        """Returns CLOSED, OPEN or HALF_OPEN."""
+        with self.lock:
+            self._update_state()
+            return self.state
+
+    def acquire(self):
+        """Lets a request through or raises Error if the breaker is open.
+        Returns True if the request is a probe, pass it to release()."""
+        with self.lock:
+            self._update_state()
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.HALF_OPEN and self.probes < self.probe_count:
+                self.probes += 1
+                return True
+            # no status code, so that the error isn't retried
+            raise Error('The API is unavailable after {} consecutive failures, the last one: {}'.format(
+                self.failures, self.last_error))
+
+    def release(self, probe, error=None, finished=True):
+        """Records the outcome of a request let through by acquire.
+
+        error    -- the Error the request failed with
+        finished -- False if the request was interrupted by another exception
+        """
+        with self.lock:
+            if probe:
+                self.probes -= 1
+            if not finished:
+                return
+            if error is not None and self._is_failure(error):
+                self.failures += 1
+                self.last_error = error
+                if probe or (self.state == self.CLOSED and
+                             self.failures >= self.failure_threshold):
+                    self.state = self.OPEN
+                    self.opened = _monotonic()
+            elif error is None or error.getStatusCode():
+                # the API has responded
+                self.failures = 0
+                if probe:
+                    self.state = self.CLOSED
+
+    def _is_failure(self, error):
+        if getattr(error, '_connection_error', False):
+            return True
+        try:
+            return int(error.getStatusCode() or 0) >= 500
+        except ValueError:
+            return False
+
+    def _update_state(self):
+        if self.state == self.OPEN and \
+           _monotonic() - self.opened >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+
+class _SendError(Exception):
+    """An error raised before a response was received."""
+    def __init__(self, error):
+        Exception.__init__(self, error)
+        self.error = error
+
+def hash_file(file_name):
+    import hashlib
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return digest.hexdigest()
+            digest.update(chunk)
+
+def create_cache_key(user_name, converter_version, fields, files, raw_data,
+                     assets=None):
+    """Returns a hash identifying the output of a conversion.
+
+    Uploaded files and raw data are identified by hashes of their content,
+    the hashes of files are taken from assets if it is an AssetCache.
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    def add(value):
+        if not isinstance(value, bytes):
+            value = value.encode('utf-8')
+        digest.update(str(len(value)).encode('ascii') + b':' + value)
+
+    add(user_name)
+    add(converter_version)
+    for name, value in sorted(gen_fields(fields)):
+        add(name)
+        add(value)
+    for name, file_name in sorted(iter_items(files)):
+        add(name)
+        add(os.path.basename(file_name))
+        add(assets.getDigest(file_name) if assets is not None else hash_file(file_name))
+    for name, data in sorted(iter_items(raw_data)):
+        add(name)
+        add(hashlib.sha256(data).hexdigest())
+    return digest.hexdigest()
+
+def get_file_version(file_name):
+    stat = os.stat(file_name)
+    return getattr(stat, 'st_mtime_ns', stat.st_mtime), stat.st_size
+
+class AssetCache:
+    """Contents and hashes of uploaded files kept in memory.
+
+    max_size -- the maximum size of all kept files in bytes
+    max_file_size -- larger files are always read from the disk
+    max_digests -- the maximum number of kept file hashes
+
+    The files are identified by path, modification time and size, so a
+    changed file is read again.
+    """
+
+    def __init__(self, max_size=16 * 1024 ** 2, max_file_size=1024 ** 2,
+                 max_digests=4096):
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self.max_digests = max_digests
+        self.lock = threading.Lock()
+        self.size = 0
+        # path -> (version, data), the least recently used entry first
+        self.entries = collections.OrderedDict()
+        # path -> (version, digest)
+        self.digests = collections.OrderedDict()
+
+    def get(self, file_name):
+        """Returns the content of a small file or None for a large one."""
+        path = os.path.abspath(file_name)
+        version = get_file_version(path)
+        if version[1] > self.max_file_size:
+            return None
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry is not None:
+                if entry[0] == version:
+                    self.entries[path] = entry
+                    return entry[1]
+                self.size -= len(entry[1])
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) == version[1]:
+            with self.lock:
+                old = self.entries.pop(path, None)
+                if old is not None:
+                    self.size -= len(old[1])
+                self.entries[path] = (version, data)
+                self.size += len(data)
+                while self.size > self.max_size:
+                    self.size -= len(self.entries.popitem(last=False)[1][1])
+        return data
+
+    def getDigest(self, file_name):
+        """Returns the SHA-256 hex digest of a file."""
+        path = os.path.abspath(file_name)
+        version = get_file_version(path)
+        with self.lock:
+            entry = self.digests.get(path)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+        digest = hash_file(path)
+        # the file might have changed while it was read
+        if get_file_version(path) == version:
+            with self.lock:
+                self.digests.pop(path, None)
+                self.digests[path] = (version, digest)
+                while len(self.digests) > self.max_digests:
+                    self.digests.popitem(last=False)
+        return digest
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.digests.clear()
+            self.size = 0
+
+# the asset cache shared by all converter classes
+asset_cache = AssetCache()
+
+replace_file = getattr(os, 'replace', None)
+if replace_file is None:
+    def replace_file(src, dst):
+        try:
+            os.rename(src, dst)
+        except OSError:
+            # Windows can't rename over an existing file
+            os.remove(dst)
+            os.rename(src, dst)
+
+class DiskCache:
+    """Conversion outputs stored in a directory.
+
+    directory -- the cache directory, created if it does not exist
+    max_size -- the maximum size of all entries in bytes, the least recently
+        used entries are removed first
+    url_ttl -- seconds after which the outputs of URL conversions expire
+
+    Entries are written atomically, so the directory can be shared by
+    several processes.
+    """
+
+    def __init__(self, directory, max_size=1024 ** 3, url_ttl=3600):
+        self.directory = directory
+        self.max_size = max_size
+        self.url_ttl = url_ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.size = None
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+    def get(self, key):
+        """Returns (output, headers) stored for the key or None."""
+        entry = self._read(os.path.join(self.directory, key))
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key, output, headers, volatile=False):
+        """Stores the output, volatile outputs expire after url_ttl."""
+        import json
+        import tempfile
+        meta = {'headers': list(headers)}
+        if volatile:
+            meta['expires'] = time.time() + self.url_ttl
+        head = json.dumps(meta).encode('utf-8') + b'\n'
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(head)
+                f.write(output)
+            replace_file(tmp_name, os.path.join(self.directory, key))
+        except:
+            os.remove(tmp_name)
+            raise
+        with self.lock:
+            if self.size is not None:
+                self.size += len(head) + len(output)
+            if self.size is None or self.size > self.max_size:
+                self._evict()
+
+    def clear(self):
+        with self.lock:
+            for name in os.listdir(self.directory):
+                self._remove(os.path.join(self.directory, name))
+            self.size = 0
+
+    def getHitCount(self):
+        return self.hits
+
+    def getMissCount(self):
+        return self.misses
+
+    def _read(self, path):
+        import json
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline().decode('utf-8'))
+                output = f.read()
+        except (IOError, OSError, ValueError):
+            return None
+        if meta.get('expires', float('inf')) < time.time():
+            self._remove(path)
+            return None
+        # the modification time orders the entries for the eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return output, tuple(tuple(header) for header in meta['headers'])
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # removes the least recently used entries, the other processes sharing
+    # the directory are accounted for by listing it
+    def _evict(self):
+        entries = []
+        self.size = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not name.startswith('.tmp'):
+                entries.append((stat.st_mtime, stat.st_size, path))
+                self.size += stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if self.size <= self.max_size:
+                break
+            self._remove(path)
+            self.size -= size
+
+class MemoryCache:
+    """Conversion outputs kept in memory.
+
+    max_size -- the maximum size of all outputs in bytes, the least recently
+        used outputs are removed first
+    url_ttl -- seconds after which the outputs of URL conversions expire
+
+    A hit returns the stored bytes object itself, outputs are never copied.
+    """
+
+    def __init__(self, max_size=64 * 1024 ** 2, url_ttl=3600):
+        self.max_size = max_size
+        self.url_ttl = url_ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        # key -> (output, headers, expiration time), the least recently
+        # used entry first
+        self.entries = collections.OrderedDict()
+
+    def get(self, key):
+        """Returns (output, headers) stored for the key or None."""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None and entry[2] is not None and entry[2] < time.time():
+                self.size -= len(entry[0])
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries[key] = entry
+            self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key, output, headers, volatile=False):
+        """Stores the output, volatile outputs expire after url_ttl."""
+        if len(output) > self.max_size:
+            return
+        expires = time.time() + self.url_ttl if volatile else None
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self.entries[key] = (output, tuple(headers), expires)
+            self.size += len(output)
+            while self.size > self.max_size:
+                self.size -= len(self.entries.popitem(last=False)[1][0])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def getHitCount(self):
+        return self.hits
+
+    def getMissCount(self):
+        return self.misses
+
+class SingleFlight:
+    """Shares one conversion among the threads requesting it at the same time.
+
+    Conversions are identified by their cache keys, so one SingleFlight can
+    be used by several clients.
+    """
+
+    class Call:
+        def __init__(self):
+            self.event = threading.Event()
+            self.value = None
+            self.error = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn):
+        """Returns (value, True) to the caller which ran fn, the callers
+        waiting for it get (value, False) or the error raised by fn."""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = SingleFlight.Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, False
+
+        try:
+            call.value = fn()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+        return call.value, True
+
+class TeeStream:
+    """Writes to a stream and keeps a copy of the written data."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return self.stream.write(data)
+
+    def getvalue(self):
+        return b''.join(self.chunks)
+
+# streams larger than this are uploaded from a temporary file
+STREAM_SPOOL_SIZE = 1024 * 1024
+
+def spool_stream(in_stream, max_size=STREAM_SPOOL_SIZE):
+    """Reads a stream into the memory or into a temporary file.
+
+    Returns (data, None) for a stream of at most max_size bytes, (None,
+    file_name) otherwise. The file is named stream, so that it
+    is uploaded as the stream data, and is removed by remove_spooled_file.
+    """
+    chunks = []
+    size = 0
+    while size <= max_size:
+        chunk = in_stream.read(CHUNK_SIZE)
+        if not chunk:
+            return b''.join(chunks), None
+        chunks.append(chunk)
+        size += len(chunk)
+
+    import tempfile
+    file_name = os.path.join(tempfile.mkdtemp(prefix='pdfcrowd-'), 'stream')
+    try:
+        with open(file_name, 'wb') as spool:
+            for chunk in chunks:
+                spool.write(chunk)
+            del chunks[:]
+            for chunk in iter(lambda: in_stream.read(CHUNK_SIZE), b''):
+                spool.write(chunk)
+    except:
+        remove_spooled_file(file_name)
+        raise
+    return None, file_name
+
+def remove_spooled_file(file_name):
+    if os.path.exists(file_name):
+        os.remove(file_name)
+    os.rmdir(os.path.dirname(file_name))
+
+class PrefetchedReader(io.RawIOBase):
+    """Reads the data read ahead from a socket and then the socket."""
+
+    def __init__(self, sock, data):
+        self.sock = sock
+        self.data = data
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.data:
+            return self.sock.recv_into(buffer)
+        size = min(len(buffer), len(self.data))
+        buffer[:size] = self.data[:size]
+        self.data = self.data[size:]
+        return size
+
+class PrefetchedSocket:
+    """Socket wrapper giving a response the data read ahead from the socket.
+
+    Closing the wrapper leaves the socket open for the response, the owner
+    of the connection closes it once the response is read.
+    """
+
+    def __init__(self, sock, data):
+        self.sock = sock
+        self.data = data
+
+    def makefile(self, mode, *args):
+        return io.BufferedReader(PrefetchedReader(self.sock, self.data))
+
+    def close(self):
+        pass
+
+class HTTPSConnection(httplib.HTTPSConnection):
+    """HTTPS connection which resumes the TLS session of an earlier one.
+
+    sessions -- a dict of the last sessions shared by the connections
+    """
+
+    def __init__(self, host, port, context, sessions):
+        httplib.HTTPSConnection.__init__(self, host, port, context=context)
+        self.sessions = sessions
+        self.tls_sock = None
+
+    def connect(self):
+        if not hasattr(ssl.SSLSocket, 'session'):
+            # sessions can't be resumed before Python 3.6
+            httplib.HTTPSConnection.connect(self)
+        else:
+            httplib.HTTPConnection.connect(self)
+            self.sock = self._context.wrap_socket(
+                self.sock, server_hostname=self.host,
+                session=self.sessions.get((self.host, self.port)))
+        self.tls_sock = self.sock
+
+    def saveSession(self):
+        # TLS 1.3 session tickets are received after the handshake, so the
+        # session is saved once a response has been read
+        session = getattr(self.tls_sock, 'session', None)
+        if session is not None:
+            self.sessions[(self.host, self.port)] = session
+
+    def close(self):
+        # a response with Connection: close closes the connection as soon
+        # as its headers are read, the session is lost after that
+        self.saveSession()
+        httplib.HTTPSConnection.close(self)
+
+# how often a conversion waiting for credits or for the rate limiter checks
+# its deadline
+WAIT_INTERVAL = 0.1
+
 class ConnectionHelper:
     def __init__(self, user_name, api_key):
         self.user_name = user_name
         self.api_key = api_key
 
-        self._reset_response_data()
+        self.local = threading.local()
+        self.ssl_contexts = {}
+        self.tls_sessions = {}
         self.setProxy(None, None, None, None)
         self.setUseHttp(False)
         self.setUserAgent('pdfcrowd_python_client/6.5.4 (https://pdfcrowd.com)')
+        self.setConnectionPool(connection_pool)
+        self.setRetryPolicy(RetryPolicy())
+        self.setCancellationToken(CancellationToken())
+        self.setCache(None)
+        self.setSingleFlight(None)
+        self.setAssetCache(asset_cache)
+        self.setTemplate(None)
+        self.setCreditTracker(None)
+        self.setRateLimiter(None)
+        self.setCircuitBreaker(None)
 
         self.retry_count = 1
+        self.connect_timeout = None
+        self.read_timeout = None
+        self.deadline = None
+        self.expect_continue_size = 1024 * 1024
+        self.expect_continue_timeout = 1.0
         self.converter_version = '24.04'
 
-    def _reset_response_data(self):
-        self.debug_log_url = None
-        self.credits = 999999
-        self.consumed_credits = 0
-        self.job_id = ''
-        self.page_count = 0
-        self.total_page_count = 0
-        self.output_size = 0
-        self.retry = 0
+    # the result of the last conversion is kept per thread, so that one
+    # helper can be used by many threads at once
+    def _get_result(self):
+        return getattr(self.local, 'result', _EMPTY_RESULT)
+
+    def _set_result(self, result):
+        self.local.result = result
 
     def post(self, fields, files, raw_data, out_stream = None):
-        body = encode_multipart_post_data(fields, files, raw_data)
+        if self.cache is not None or self.single_flight is not None:
+            return self._post_shared(fields, files, raw_data, out_stream)
+        body = MultipartBody(fields, files, raw_data, self.asset_cache,
+                             self.template)
         content_type = 'multipart/form-data; boundary=' + MULTIPART_BOUNDARY
         return self._do_post(body, content_type, out_stream)
 
+    # a large stream is spooled to a file, so that the memory use is bounded
+    def post_stream(self, fields, files, raw_data, in_stream, out_stream = None):
+        data, file_name = spool_stream(in_stream)
+        if file_name is None:
+            return self.post(fields, files, dict(raw_data, stream=data), out_stream)
+        try:
+            return self.post(fields, dict(files, stream=file_name), raw_data, out_stream)
+        finally:
+            remove_spooled_file(file_name)
+
+    # conversions with the same key have the same output, so it can be
+    # shared through the cache and among concurrent callers
+    def _post_shared(self, fields, files, raw_data, out_stream):
+        key = create_cache_key(self.user_name, self.converter_version,
+                               fields, files, raw_data, self.asset_cache)
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.get(key)
+        if entry is None:
+            fetch = lambda: self._fetch(key, fields, files, raw_data, out_stream)
+            if self.single_flight is None:
+                entry, fetched = fetch(), True
+            else:
+                entry, fetched = self.single_flight.do(key, fetch)
+            if fetched:
+                return out_stream if out_stream else entry[0]
+
+        output = self._set_shared_result(entry, out_stream)
+        if out_stream:
+            out_stream.write(output)
+            return out_stream
+        return output
+
+    # returns (output, headers) of a new conversion
+    def _fetch(self, key, fields, files, raw_data, out_stream):
+        body = MultipartBody(fields, files, raw_data, self.asset_cache,
+                             self.template)
+        content_type = 'multipart/form-data; boundary=' + MULTIPART_BOUNDARY
+        if out_stream:
+            tee = TeeStream(out_stream)
+            self._do_post(body, content_type, tee)
+            output = tee.getvalue()
+        else:
+            output = self._do_post(body, content_type)
+        headers = self._get_result().headers
+        if self.cache is not None:
+            self.cache.put(key, output, headers, 'url' in fields)
+        return output, headers
+
+    # a shared output is reported as a conversion which consumed no credits
+    def _set_shared_result(self, entry, out_stream):
+        output, headers = entry
+        result = create_result(None if out_stream else output, headers)
+        self._set_result(result._replace(consumed_credit_count=0))
+        return output
+
+    # the contexts are created once, so the CA store is loaded only once
+    def _get_ssl_context(self, host):
+        verify = host == 'api.pdfcrowd.com'
+        context = self.ssl_contexts.get(verify)
+        if context is None:
+            if verify:
+                context = ssl.create_default_context()
+            else:
+                context = ssl._create_unverified_context()
+            context = self.ssl_contexts.setdefault(verify, context)
+        return context
+
     def _create_connection(self, host, port):
-        kwargs = {}
-        if not self.use_http and host != 'api.pdfcrowd.com':
-            kwargs['context'] = ssl._create_unverified_context()
-        return self.conn_type(host, port, **kwargs)
+        if self.use_http:
+            return self.conn_type(host, port)
+        return self.conn_type(host, port, self._get_ssl_context(host),
+                              self.tls_sessions)
+
+    def _get_connection_key(self):
+        if self.proxy_host:
+            return self.use_http, self.proxy_host, self.proxy_port
+        return self.use_http, HOST, self.port
 
-    def _get_connection(self):
+    def _get_request_target(self):
         conv_selector = '/convert/{}/'.format(self.converter_version)
         if self.proxy_host:
-            conn = self._create_connection(self.proxy_host, self.proxy_port)
-            conn.putrequest('POST', 'http://{}:{}{}'.format(
-                HOST, self.port, conv_selector))
-            if self.proxy_user_name:
-                conn.putheader('Proxy-Authorization',
-                               encode_credentials(self.proxy_user_name,
-                                                  self.proxy_password))
-        else:
-            conn = self._create_connection(HOST, self.port)
-            conn.putrequest('POST', conv_selector)
-        return conn
+            return 'http://{}:{}{}'.format(HOST, self.port, conv_selector)
+        return conv_selector
+
+    def _get_request_headers(self, body, content_type):
+        headers = []
+        if self.proxy_host and self.proxy_user_name:
+            headers.append(('Proxy-Authorization',
+                            encode_credentials(self.proxy_user_name,
+                                               self.proxy_password)))
+        headers.append(('Content-Type', content_type))
+        headers.append(('Content-Length', str(len(body))))
+        if self.user_agent != None:
+            headers.append(('User-Agent', self.user_agent))
+        headers.append(('Authorization',
+                        encode_credentials(self.user_name, self.api_key)))
+        return headers
+
+    def _create_result(self, response, output):
+        return create_result(output, [
+            (name, value) for name, value in response.getheaders()
+            if name.lower().startswith('x-pdfcrowd-')])
 
     # sends a POST to the API
     def _do_post(self, body, content_type, out_stream=None):
         if not self.use_http and self.proxy_host:
             raise Error('HTTPS over a proxy is not supported.')
 
-        self._reset_response_data()
+        self._set_result(_EMPTY_RESULT)
 
-        while True:
-            try:
-                return self._exec_request(body, content_type, out_stream)
-            except Error as err:
-                if (err.getStatusCode() == 502 or err.getStatusCode() == 503) and self.retry_count > self.retry:
-                    self.retry += 1
-                    time.sleep(self.retry * 0.1)
-                else:
-                    raise
+        # the deadline covers all attempts
+        deadline = None
+        if self.deadline is not None:
+            deadline = _monotonic() + self.deadline
+
+        # the estimated credits are reserved until the conversion finishes
+        tracker = self.credit_tracker
+        if tracker is not None:
+            cost = None
+            while cost is None:
+                self._check_interrupted(deadline)
+                cost = tracker.acquire(WAIT_INTERVAL)
 
-    def _exec_request(self, body, content_type, out_stream):
+        # the body is sent again from its sources, files are reread
+        retry = 0
+        delay = 0
+        try:
+            while True:
+                self._check_interrupted(deadline)
+                try:
+                    output = self._exec_request(body, content_type, out_stream, deadline)
+                except Error as err:
+                    if self.retry_count > retry:
+                        delay = self.retry_policy.getDelay(err, delay)
+                        if delay is not None and \
+                           (deadline is None or _monotonic() + delay < deadline):
+                            retry += 1
+                            self.cancellation_token.wait(delay)
+                            continue
+                    raise
+                self.retry_policy.recordSuccess()
+                break
+        except:
+            if tracker is not None:
+                tracker.release(cost, self._get_result(), False)
+            raise
+        if tracker is not None:
+            tracker.release(cost, self._get_result(), True)
+        return output
+
+    def _check_interrupted(self, deadline):
+        if self.cancellation_token.isCancelled():
+            raise Error('The conversion was cancelled.')
+        if deadline is not None and _monotonic() >= deadline:
+            raise Error('The conversion deadline of {} seconds was exceeded.'.format(self.deadline))
+
+    # returns the timeout shortened to the time left until the deadline
+    def _get_timeout(self, timeout, deadline):
+        if deadline is None:
+            return timeout
+        self._check_interrupted(deadline)
+        remaining = deadline - _monotonic()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def _connect(self, conn, deadline):
+        if conn.sock is None:
+            timeout = self._get_timeout(self.connect_timeout, deadline)
+            conn.timeout = socket.getdefaulttimeout() if timeout is None else timeout
+            conn.connect()
+        sock = conn.sock
+        self._set_read_timeout(sock, deadline)
+        if not self.cancellation_token.register(conn, lambda: shutdown_socket(sock)):
+            raise Error('The conversion was cancelled.')
+        if deadline is not None:
+            conn.deadline_timer = DeadlineTimer(sock, deadline)
+        return sock
+
+    def _unregister_connection(self, conn):
+        self.cancellation_token.unregister(conn)
+        timer = getattr(conn, 'deadline_timer', None)
+        if timer is not None:
+            timer.cancel()
+            conn.deadline_timer = None
+
+    def _set_read_timeout(self, sock, deadline):
+        timeout = self._get_timeout(self.read_timeout, deadline)
+        sock.settimeout(socket.getdefaulttimeout() if timeout is None else timeout)
+
+    def _close_connection(self, conn):
+        self._unregister_connection(conn)
+        conn.close()
+
+    def _send_request(self, conn, body, content_type, deadline):
+        conn.putrequest('POST', self._get_request_target())
+        for name, value in self._get_request_headers(body, content_type):
+            conn.putheader(name, value)
+        expect = self._expects_continue(body)
+        if expect:
+            conn.putheader('Expect', '100-continue')
+        conn.endheaders()
+        if expect:
+            data = self._wait_for_continue(conn.sock, deadline)
+            if data is not None:
+                return self._get_early_response(conn, data)
+        body.send(conn)
+        return conn.getresponse()
+
+    # a large body is sent only after the server accepts the request headers,
+    # so that a rejected conversion doesn't upload the input
+    def _expects_continue(self, body):
+        return self.expect_continue_size is not None and \
+            len(body) >= self.expect_continue_size
+
+    # returns None if the body should be sent, or the data read of a final
+    # response which rejected the request before the body was sent
+    def _wait_for_continue(self, sock, deadline):
+        sock.settimeout(self._get_timeout(self.expect_continue_timeout, deadline))
+        try:
+            data = sock.recv(CHUNK_SIZE)
+        except socket.timeout:
+            # the server or a proxy doesn't answer 100-continue
+            return None
+        finally:
+            self._set_read_timeout(sock, deadline)
+        while data and b'\r\n\r\n' not in data:
+            chunk = sock.recv(CHUNK_SIZE)
+            if not chunk:
+                break
+            data += chunk
+        if not data:
+            raise httplib.BadStatusLine('')
+        if re.match(br'HTTP/\d\.\d 100\b', data):
+            return None
+        return data
+
+    def _get_early_response(self, conn, data):
+        sock = conn.sock
+        conn.sock = PrefetchedSocket(sock, data)
         try:
-            conn = self._get_connection()
-            conn.putheader('Content-Type', content_type)
-            conn.putheader('Content-Length', str(len(body)))
-            if self.user_agent != None:
-                conn.putheader('User-Agent', self.user_agent)
-            conn.putheader('Authorization',
-                           encode_credentials(self.user_name, self.api_key))
-            conn.endheaders()
-            body = body if isinstance(body, bytes) else body.encode()
-            conn.send(body)
             response = conn.getresponse()
+        finally:
+            # getresponse closes the wrapper of a Connection: close response,
+            # the socket is closed with the connection
+            conn.sock = sock
+        # the connection can't be reused, the server waits for the body
+        response.will_close = True
+        return response
+
+    def _exec_request(self, body, content_type, out_stream, deadline):
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return self._exec_limited_request(body, content_type, out_stream, deadline)
+        probe = breaker.acquire()
+        try:
+            output = self._exec_limited_request(body, content_type, out_stream, deadline)
+        except Error as err:
+            breaker.release(probe, err)
+            raise
+        except:
+            breaker.release(probe, finished=False)
+            raise
+        breaker.release(probe)
+        return output
+
+    def _exec_limited_request(self, body, content_type, out_stream, deadline):
+        limiter = self.rate_limiter
+        if limiter is None:
+            return self._exec_attempt(body, content_type, out_stream, deadline)
+        while not limiter.acquire(WAIT_INTERVAL):
+            self._check_interrupted(deadline)
+        started = _monotonic()
+        try:
+            output = self._exec_attempt(body, content_type, out_stream, deadline)
+        except Error as err:
+            limiter.release(err, _monotonic() - started)
+            raise
+        except:
+            limiter.release()
+            raise
+        limiter.release(None, _monotonic() - started)
+        return output
 
-            self.debug_log_url = response.getheader('X-Pdfcrowd-Debug-Log', '')
-            self.credits = int(response.getheader('X-Pdfcrowd-Remaining-Credits', 999999))
-            self.consumed_credits = int(response.getheader('X-Pdfcrowd-Consumed-Credits', 0))
-            self.job_id = response.getheader('X-Pdfcrowd-Job-Id', '')
-            self.page_count = int(response.getheader('X-Pdfcrowd-Pages', 0))
-            self.total_page_count = int(response.getheader('X-Pdfcrowd-Total-Pages', 0))
-            self.output_size = int(response.getheader('X-Pdfcrowd-Output-Size', 0))
-
+    def _exec_attempt(self, body, content_type, out_stream, deadline):
+        try:
+            return self._exec_pooled_request(body, content_type, out_stream, deadline)
+        except _SendError as err:
+            self._check_interrupted(deadline)
+            error = self._create_error(err.error)
+            error._connection_reset = is_connection_reset(err.error)
+            raise error
+        except (httplib.HTTPException, socket.error) as err:
+            self._check_interrupted(deadline)
+            raise self._create_error(err)
+
+    def _create_error(self, err):
+        if isinstance(err, ssl.SSLError):
+            return Error("400.356 - There was a problem connecting to PDFCrowd servers over HTTPS:\n" +
+                         "{} ({})".format(err.reason, err.errno) +
+                         "\nYou can still use the API over HTTP, you just need to add the following line right after PDFCrowd client initialization:\nclient.setUseHttp(True)",
+                         0)
+        error = Error(str(err))
+        error._connection_error = True
+        return error
+
+    def _exec_pooled_request(self, body, content_type, out_stream, deadline):
+        key = self._get_connection_key()
+        conn = self.pool.acquire(key)
+        response = None
+        if conn:
+            try:
+                sock = self._connect(conn, deadline)
+                response = self._send_request(conn, body, content_type, deadline)
+            except socket.timeout:
+                self._close_connection(conn)
+                raise
+            except (httplib.HTTPException, socket.error):
+                # the server has closed the idle connection, retry once
+                # with a new one
+                self._close_connection(conn)
+            except:
+                self._close_connection(conn)
+                raise
+        if response is None:
+            conn = self._create_connection(key[1], key[2])
+            try:
+                sock = self._connect(conn, deadline)
+                response = self._send_request(conn, body, content_type, deadline)
+            except (httplib.HTTPException, socket.error) as err:
+                self._close_connection(conn)
+                raise _SendError(err)
+            except:
+                self._close_connection(conn)
+                raise
+        try:
+            output = None
             if response.status > 299:
-                raise Error(response.read(), response.status)
-
-            if out_stream:
-                while True:
-                    data = response.read(16384)
-                    if data:
-                        out_stream.write(data)
-                    else:
-                        break
-                return out_stream
-
-            return response.read()
-        except httplib.HTTPException as err:
-            raise Error(str(err))
-        except ssl.SSLError as err:
-            raise Error("400.356 - There was a problem connecting to PDFCrowd servers over HTTPS:\n" +
-                        "{} ({})".format(err.reason, err.errno) +
-                        "\nYou can still use the API over HTTP, you just need to add the following line right after PDFCrowd client initialization:\nclient.setUseHttp(True)",
-                        0)
-        except socket.gaierror as err:
-            raise Error(str(err))
-        except socket.error as err:
-            raise Error(str(err))
+                error = Error(response.read(), response.status)
+                error._retry_after = response.getheader('Retry-After')
+            else:
+                error = None
+                if out_stream:
+                    while True:
+                        # the connection is released by a response which
+                        # closes it, so the socket is kept aside
+                        if deadline is not None:
+                            self._set_read_timeout(sock, deadline)
+                        data = response.read(16384)
+                        if data:
+                            out_stream.write(data)
+                        else:
+                            break
+                elif deadline is not None:
+                    chunks = []
+                    while True:
+                        self._set_read_timeout(sock, deadline)
+                        data = response.read(16384)
+                        if not data:
+                            break
+                        chunks.append(data)
+                    output = b''.join(chunks)
+                else:
+                    output = response.read()
+            # a cancelled download can end without an error
+            if self.cancellation_token.isCancelled():
+                raise Error('The conversion was cancelled.')
+        except:
+            self._close_connection(conn)
+            raise
+
+        self._release_connection(key, conn, response)
+        self._set_result(self._create_result(response, output))
+        if error is not None:
+            raise error
+        return out_stream if out_stream else output
+
+    def _release_connection(self, key, conn, response):
+        self._unregister_connection(conn)
+        if isinstance(conn, HTTPSConnection):
+            conn.saveSession()
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.release(key, conn)
 
     def setUseHttp(self, use_http):
         if use_http:
@@ -925,7 +2521,7 @@ class ConnectionHelper:
             self.conn_type = httplib.HTTPConnection
         else:
             self.port = 443
-            self.conn_type = httplib.HTTPSConnection
+            self.conn_type = HTTPSConnection
         self.use_http = use_http
 
     def setUserAgent(self, user_agent):
@@ -937,36 +2533,729 @@ class ConnectionHelper:
     def setConverterVersion(self, converter_version):
         self.converter_version = converter_version
 
+    def setConnectionPool(self, pool):
+        self.pool = pool
+
+    def setRetryPolicy(self, policy):
+        self.retry_policy = policy
+
+    def setConnectTimeout(self, timeout):
+        self.connect_timeout = timeout
+
+    def setReadTimeout(self, timeout):
+        self.read_timeout = timeout
+
+    def setDeadline(self, deadline):
+        self.deadline = deadline
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        # without a timeout the client and a server not answering
+        # 100-continue would wait for each other forever
+        if timeout is None or timeout <= 0:
+            raise Error('The timeout of Expect: 100-continue must be a positive number of seconds.')
+        self.expect_continue_size = min_size
+        self.expect_continue_timeout = timeout
+
+    def setCancellationToken(self, token):
+        self.cancellation_token = token
+
+    def setCache(self, cache):
+        self.cache = cache
+
+    def setSingleFlight(self, single_flight):
+        self.single_flight = single_flight
+
+    def setAssetCache(self, assets):
+        self.asset_cache = assets
+
+    def setTemplate(self, template):
+        self.template = template
+
+    def setCreditTracker(self, tracker):
+        self.credit_tracker = tracker
+
+    def setRateLimiter(self, limiter):
+        self.rate_limiter = limiter
+
+    def setCircuitBreaker(self, breaker):
+        self.circuit_breaker = breaker
+
     def setProxy(self, host, port, user_name, password):
         self.proxy_host = host
         self.proxy_port = port
         self.proxy_user_name = user_name
         self.proxy_password = password
 
+    def getConversionResult(self):
+        return self._get_result()
+
     def getDebugLogUrl(self):
-        return self.debug_log_url
+        return self._get_result().debug_log_url
 
     def getRemainingCreditCount(self):
-        return self.credits
+        return self._get_result().remaining_credit_count
 
     def getConsumedCreditCount(self):
-        return self.consumed_credits
+        return self._get_result().consumed_credit_count
 
     def getJobId(self):
-        return self.job_id
+        return self._get_result().job_id
 
     def getPageCount(self):
-        return self.page_count
+        return self._get_result().page_count
 
     def getTotalPageCount(self):
-        return self.total_page_count
+        return self._get_result().total_page_count
 
     def getOutputSize(self):
-        return self.output_size
+        return self._get_result().output_size
 
     def getConverterVersion(self):
         return self.converter_version
 
+def is_file(path):
+    try:
+        return os.path.isfile(path)
+    except (TypeError, ValueError):
+        # binary data containing null bytes
+        return False
+
+# the conversion methods of the explicit (method, argument) sources
+SOURCE_METHODS = ('convertUrl', 'convertFile', 'convertString', 'convertRawData', 'convertStream')
+
+def get_convert_method(converter, source):
+    """Returns the conversion method and its argument for the source.
+
+    A string source must be a URL or an existing file, so that a mistyped
+    file name is not converted as a text. Content is passed as bytes
+    (Python 3), as a stream or as an explicit (method, argument) pair,
+    e.g. ('convertString', '<p>text</p>').
+    """
+    if hasattr(source, 'read'):
+        return 'convertStream', source
+    if isinstance(source, tuple) and len(source) == 2 and source[0] in SOURCE_METHODS:
+        if not hasattr(converter, source[0]):
+            raise Error("Invalid source method '{}' of {}.".format(source[0], type(converter).__name__))
+        return source
+    if PYTHON_3 and isinstance(source, bytes):
+        if hasattr(converter, 'convertRawData'):
+            return 'convertRawData', source
+        return 'convertString', source.decode('utf-8')
+    if not isinstance(source, (str, type(u''))):
+        raise Error("Invalid source of type {}. Must be a URL, an existing file, bytes, a stream or a (method, argument) pair.".format(type(source).__name__))
+    if re.match(r'(?i)^https?://.*$', source):
+        return 'convertUrl', source
+    if is_file(source):
+        return 'convertFile', source
+    raise Error("Invalid source '{}'. Must be a URL or an existing file, pass content as bytes, a stream or a (method, argument) pair.".format(source[:100]))
+
+def convert_source(converter, source):
+    """Converts a URL, file path, raw data, stream or (method, argument) pair.
+
+    PdfToPdfClient accepts a PDF file path, raw PDF data or a list of them,
+    which are added after the files already added to the client.
+    """
+    if isinstance(converter, PdfToPdfClient):
+        files = dict(converter.files)
+        raw_data = dict(converter.raw_data)
+        file_id = converter.file_id
+        for item in (source if isinstance(source, (list, tuple)) else [source]):
+            if isinstance(item, bytes) and item[0:4] == b'%PDF':
+                raw_data['f_{}'.format(file_id)] = item
+            elif is_file(item) and os.path.getsize(item):
+                files['f_{}'.format(file_id)] = get_utf8_string(item)
+            else:
+                raise Error(create_invalid_value_message(item, "convertMany", "pdf-to-pdf", 'The file must exist and not be empty.', "add_pdf_file"), 470)
+            file_id += 1
+        return converter.helper.post(converter.fields, files, raw_data)
+
+    method, argument = get_convert_method(converter, source)
+    return getattr(converter, method)(argument)
+
+def run_conversion(converter, convert, *args):
+    """Runs convert(*args) and returns the ConversionResult, so that the
+    result of a conversion run in another thread reaches the caller."""
+    convert(*args)
+    return converter.helper._get_result()
+
+def import_futures():
+    try:
+        from concurrent import futures
+    except ImportError:
+        # Python 2 without the futures backport
+        raise Error('The batch conversion requires the concurrent.futures module, install the futures package.')
+    return futures
+
+class BatchExecutor:
+    """Runs conversions of a client in a pool of threads.
+
+    jobs -- the number of threads and of conversions in flight
+    """
+
+    def __init__(self, jobs=4):
+        self.jobs = jobs
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def setJobs(self, jobs):
+        with self.lock:
+            self.jobs = jobs
+            if self.executor is not None:
+                self.executor.shutdown(False)
+                self.executor = None
+
+    def submit(self, fn, *args):
+        futures = import_futures()
+        with self.lock:
+            if self.executor is None:
+                self.executor = futures.ThreadPoolExecutor(self.jobs)
+            return self.executor.submit(fn, *args)
+
+    def map(self, fn, sources, jobs=None):
+        """Yields (source, future) pairs in the order of completion.
+
+        Sources are consumed lazily, at most jobs conversions are in flight.
+        """
+        futures = import_futures()
+        jobs = jobs or self.jobs
+        sources = iter(sources)
+        pending = {}
+        try:
+            while True:
+                for source in sources:
+                    pending[self.submit(fn, source)] = source
+                    if len(pending) >= jobs:
+                        break
+                if not pending:
+                    return
+                done = futures.wait(pending, return_when=futures.FIRST_COMPLETED)[0]
+                for future in done:
+                    yield pending.pop(future), future
+        finally:
+            for future in pending:
+                future.cancel()
+
+def get_option_method(converter, option):
+    """Returns the name of the converter method setting a command line option."""
+    arg = option.lstrip('-').replace('-', '_')
+    method = ''.join([w.title() if w.islower() else w for w in arg.split('_')])
+    if hasattr(converter, 'set' + method):
+        return 'set' + method
+    method = method[0].lower() + method[1:]
+    if hasattr(converter, method):
+        return method
+    raise Error("Unknown option '{}'.".format(option))
+
+class Profile(collections.namedtuple('Profile', [
+        'converter', 'fields', 'files', 'raw_data', 'calls'])):
+    """Immutable and hashable options validated once for many conversions.
+
+    converter -- the converter class the options are valid for
+    fields, files, raw_data -- (name, value) pairs set by the options
+    calls -- (method, args) pairs of the options configuring the connection
+
+    Use fromDict or fromJson to create a profile and applyProfile of a
+    converter to use it.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def fromDict(cls, converter, options):
+        """Creates a profile from a dict of command line option names and
+        values, e.g. {'page-size': 'A4', 'no-margins': True}. Options
+        taking several values accept a list."""
+        scratch = converter('', '')
+        fields = dict(scratch.fields)
+        calls = []
+        for option, value in sorted(iter_items(options)):
+            method = get_option_method(scratch, option)
+            args = tuple(value) if isinstance(value, (list, tuple)) else (value,)
+            state = (dict(scratch.fields), dict(scratch.files), dict(scratch.raw_data))
+            try:
+                getattr(scratch, method)(*args)
+            except TypeError:
+                raise Error("Invalid number of arguments for '{}': {}".format(option, value))
+            if state == (scratch.fields, scratch.files, scratch.raw_data):
+                calls.append((method, args))
+        return cls(converter,
+                   tuple(sorted((name, value) for name, value in iter_items(scratch.fields)
+                                if name not in fields or fields[name] != value)),
+                   tuple(sorted(iter_items(scratch.files))),
+                   tuple(sorted(iter_items(scratch.raw_data))),
+                   tuple(calls))
+
+    @classmethod
+    def fromJson(cls, converter, text):
+        """Creates a profile from a JSON object of command line options."""
+        import json
+        return cls.fromDict(converter, json.loads(text))
+
+    def applyTo(self, converter):
+        if not isinstance(converter, self.converter):
+            raise Error('The profile is for {}.'.format(self.converter.__name__))
+        converter.fields.update(self.fields)
+        # the input files of the profile, e.g. of PdfToPdfClient.addPdfFile,
+        # are numbered after the files added to the converter
+        inputs = []
+        for items, target in ((self.files, converter.files),
+                              (self.raw_data, converter.raw_data)):
+            for name, value in items:
+                match = re.match(r'f_(\d+)$', name)
+                if match:
+                    inputs.append((int(match.group(1)), target, value))
+                else:
+                    target[name] = value
+        for number, target, value in sorted(inputs, key=lambda item: item[0]):
+            target['f_{}'.format(converter.file_id)] = value
+            converter.file_id += 1
+        for method, args in self.calls:
+            getattr(converter, method)(*args)
+
+# the command line worker protocol: frames of a kind byte, a 4-byte length
+# and the data; a request is an argv frame and stdin frames ended by an empty
+# one, the response is stdout and stderr frames ended by an exit or error frame
+WORKER_ARGV = b'a'
+WORKER_STDIN = b'i'
+WORKER_STDOUT = b'o'
+WORKER_STDERR = b'e'
+WORKER_EXIT = b'x'
+WORKER_ERROR = b'E'
+
+def get_worker_path():
+    """Returns the path of the worker socket or None if the platform has no
+    unix sockets.
+
+    The path is set by the PDFCROWD_WORKER_SOCKET environment variable, an
+    empty value disables the worker.
+    """
+    if not hasattr(socket, 'AF_UNIX') or not hasattr(os, 'getuid'):
+        return None
+    path = os.environ.get('PDFCROWD_WORKER_SOCKET')
+    if path is not None:
+        return path or None
+    return os.path.join(os.environ.get('TMPDIR', '/tmp'),
+                        'pdfcrowd-worker-{}.sock'.format(os.getuid()))
+
+def fs_encode(text):
+    return os.fsencode(text) if PYTHON_3 else text
+
+def fs_decode(data):
+    return os.fsdecode(data) if PYTHON_3 else data
+
+def send_frame(sock, kind, data):
+    sock.sendall(struct.pack('!cI', kind, len(data)) + data)
+
+def recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, CHUNK_SIZE))
+        if not chunk:
+            raise Error('The connection to the worker was closed.')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def recv_frame(sock):
+    kind, size = struct.unpack('!cI', recv_exact(sock, 5))
+    return kind, recv_exact(sock, size)
+
+def forward_to_worker(argv, converter_known, path = None):
+    """Runs the command line in a running worker.
+
+    Returns the exit status or None if no worker runs. The stdin is forwarded
+    if the command line uses it, the worker resolves relative paths against
+    the forwarded current directory.
+    """
+    path = path or get_worker_path()
+    try:
+        # the socket of another user could capture the credentials
+        if not path or os.stat(path).st_uid != os.getuid():
+            return None
+    except OSError:
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error:
+        # a stale socket of a worker which has exited
+        sock.close()
+        return None
+
+    skip = 2 if argv and argv[0] == 'help' else 1
+    out = sys.stdout.buffer if PYTHON_3 else sys.stdout
+    err = sys.stderr.buffer if PYTHON_3 else sys.stderr
+    try:
+        send_frame(sock, WORKER_ARGV, b'\0'.join(
+            [b'1' if converter_known else b'0',
+             fs_encode(os.path.basename(sys.argv[0])), fs_encode(os.getcwd())] +
+            [fs_encode(arg) for arg in argv]))
+        if '-' in argv[skip:]:
+            stdin = sys.stdin.buffer if PYTHON_3 else sys.stdin
+            for chunk in iter(lambda: stdin.read(CHUNK_SIZE), b''):
+                send_frame(sock, WORKER_STDIN, chunk)
+        send_frame(sock, WORKER_STDIN, b'')
+        while True:
+            kind, data = recv_frame(sock)
+            if kind == WORKER_STDOUT:
+                out.write(data)
+                out.flush()
+            elif kind == WORKER_STDERR:
+                err.write(data)
+                err.flush()
+            elif kind == WORKER_EXIT:
+                return int(data)
+            elif kind == WORKER_ERROR:
+                error, code = data.split(b'\0')
+                why = Error(fs_decode(error))
+                why.http_code = int(code) if code.isdigit() else (fs_decode(code) or None)
+                raise why
+            else:
+                raise Error('Unexpected response of the worker.')
+    except socket.error as why:
+        raise Error('The connection to the worker failed: {}'.format(why))
+    finally:
+        out.flush()
+        err.flush()
+        sock.close()
+
+class FrameReader(io.RawIOBase):
+    """A file-like object reading the data of frames until an empty one."""
+
+    def __init__(self, sock, kind):
+        self.sock = sock
+        self.kind = kind
+        self.data = b''
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.data and not self.eof:
+            kind, self.data = recv_frame(self.sock)
+            if kind != self.kind:
+                raise Error('Unexpected request of the script.')
+            self.eof = not self.data
+        size = min(len(buffer), len(self.data))
+        buffer[:size] = self.data[:size]
+        self.data = self.data[size:]
+        return size
+
+    def skip(self):
+        """Reads the remaining frames."""
+        self.data = b''
+        while not self.eof:
+            self.readinto(bytearray(1))
+            self.data = b''
+
+class FrameWriter:
+    """A file-like object sending the written text and data as frames."""
+
+    def __init__(self, sock, kind, lock):
+        self.sock = sock
+        self.kind = kind
+        self.lock = lock
+
+    def write(self, data):
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        if data:
+            with self.lock:
+                send_frame(self.sock, self.kind, data)
+
+    def flush(self):
+        pass
+
+class Worker:
+    """Runs the command lines forwarded by the scripts on a unix socket.
+
+    The scripts forward their command line when the worker runs, so they
+    don't pay for the Python startup and the option parser. The conversions
+    share the connection pool, the TLS contexts and sessions, the
+    RateLimiter and the CircuitBreaker.
+
+    path            -- the socket path, get_worker_path() by default
+    rate_limiter    -- the RateLimiter of all conversions, None for no limit
+    circuit_breaker -- the CircuitBreaker of all conversions or None
+    """
+
+    def __init__(self, path = None, rate_limiter = None, circuit_breaker = None):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise Error('Unix sockets are not supported on this platform.')
+        self.path = path or get_worker_path()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.ssl_contexts = {}
+        self.tls_sessions = {}
+        self.sock = None
+        self.closed = False
+
+    def serve(self):
+        """Accepts connections until close() is called."""
+        import stat
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(self.path)
+        except socket.error:
+            self.sock.close()
+            # no socket or a stale one of a worker which has exited, another
+            # file is not removed
+            if os.path.lexists(self.path):
+                if not stat.S_ISSOCK(os.lstat(self.path).st_mode):
+                    raise Error('{} exists and is not a socket.'.format(self.path))
+                os.unlink(self.path)
+        else:
+            self.sock.close()
+            raise Error('A worker is already running on {}.'.format(self.path))
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # only the owner may connect, the requests contain the credentials
+        umask = os.umask(0o177)
+        try:
+            self.sock.bind(self.path)
+        finally:
+            os.umask(umask)
+        self.sock.listen(128)
+        try:
+            while not self.closed:
+                try:
+                    conn = self.sock.accept()[0]
+                except socket.error:
+                    if self.closed:
+                        break
+                    raise
+                thread = threading.Thread(target=self._serve_connection,
+                                          args=(conn,))
+                thread.daemon = True
+                thread.start()
+        finally:
+            self.sock.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def close(self):
+        self.closed = True
+        if self.sock is not None:
+            shutdown_socket(self.sock)
+
+    def _setup(self, converter):
+        converter.helper.ssl_contexts = self.ssl_contexts
+        converter.helper.tls_sessions = self.tls_sessions
+        if self.rate_limiter is not None:
+            converter.setRateLimiter(self.rate_limiter)
+        if self.circuit_breaker is not None:
+            converter.setCircuitBreaker(self.circuit_breaker)
+
+    def _serve_connection(self, conn):
+        try:
+            kind, data = recv_frame(conn)
+            args = [fs_decode(arg) for arg in data.split(b'\0')]
+            # the stdin is read while the command line runs
+            frames = FrameReader(conn, WORKER_STDIN)
+            stdin = io.BufferedReader(frames)
+            if PYTHON_3:
+                stdin = io.TextIOWrapper(stdin)
+            lock = threading.Lock()
+            stderr = FrameWriter(conn, WORKER_STDERR, lock)
+            try:
+                run_cli(args[3:], args[0] == '1', stdin,
+                        FrameWriter(conn, WORKER_STDOUT, lock), stderr,
+                        self._setup, args[1], args[2])
+                status = 0
+            except SystemExit as why:
+                status = why.code
+                if status is not None and not isinstance(status, int):
+                    stderr.write('{}\n'.format(status))
+                    status = 1
+            except Error as why:
+                frames.skip()
+                send_frame(conn, WORKER_ERROR, b'\0'.join([
+                    fs_encode(get_utf8_string(why.error)),
+                    fs_encode(str(why.http_code or ''))]))
+                return
+            except Exception:
+                import traceback
+                stderr.write(traceback.format_exc())
+                status = 1
+            # the script sends all of the stdin before it reads the response
+            frames.skip()
+            send_frame(conn, WORKER_EXIT, str(status or 0).encode('ascii'))
+        except (socket.error, Error):
+            # the script has gone away
+            pass
+        finally:
+            conn.close()
+
+# the command line options taking a local file path by converter class
+file_options = {}
+
+# an existing file passed to the file setters of a scratch converter, it's
+# resolved on import since __file__ is relative to the current directory on
+# Python 2
+SCRATCH_FILE = os.path.abspath(__file__)
+
+def get_file_options(converter_class):
+    """Returns the names of the command line options of a converter taking
+    a local file path, i.e. of the setters storing their value in files."""
+    options = file_options.get(converter_class)
+    if options is None:
+        scratch = converter_class('', '')
+        options = set()
+        for name in dir(converter_class):
+            if not name.startswith('set'):
+                continue
+            files = dict(scratch.files)
+            try:
+                getattr(scratch, name)(SCRATCH_FILE)
+            except (Error, TypeError, ValueError):
+                continue
+            options.update(option for option in scratch.files
+                           if option not in files and not re.match(r'f_\d+$', option))
+        options = file_options[converter_class] = frozenset(options)
+    return options
+
+# the maximal number of parallel conversions of -jobs auto
+AUTO_JOBS_MAXIMUM = 32
+
+# short forms of the command line batch options, they are expanded before
+# the parsing, so that they don't make abbreviations of other options ambiguous
+BATCH_OPTION_ALIASES = {'-j': '-jobs', '-o': '-output-dir'}
+
+def get_cli_input(source, cwd = None):
+    """Returns the conversion method and its argument for a command line
+    source or None if the source is not a URL or a file.
+
+    cwd -- the directory of relative paths, the current one by default
+    """
+    if re.match('(?i)^https?://.*$', source):
+        return 'convertUrl', source
+    path = os.path.join(cwd or '', source)
+    if os.path.isfile(path):
+        return 'convertFile', path
+    return None
+
+def get_batch_name(source):
+    """Returns the file name of the source without the extension, the last
+    path segment or the host of a URL."""
+    if re.match('(?i)^https?://', source):
+        path = re.sub('[?#].*', '', source.split('://', 1)[1]).rstrip('/')
+        name = path.rsplit('/', 1)[-1]
+        if '/' in path:
+            name = os.path.splitext(name)[0]
+    else:
+        name = os.path.splitext(os.path.basename(source))[0]
+    return re.sub(r'[^\w.-]+', '_', name) or 'output'
+
+def read_manifest(lines):
+    """Yields (source, output name) pairs of the manifest lines.
+
+    A line contains a source optionally followed by a tab and the output file
+    name. Empty lines and lines starting with # are skipped.
+    """
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line.strip() and not line.startswith('#'):
+            source, _, name = line.partition('\t')
+            yield source.strip(), name.strip() or None
+
+class BatchJob(collections.namedtuple('BatchJob', [
+        'index', 'source', 'output', 'time', 'credits', 'pages', 'error'])):
+    """The outcome of a conversion of the command line batch mode.
+
+    output -- the path of the output file, None if the conversion failed
+    error  -- the error message of a failed conversion
+    """
+    __slots__ = ()
+
+def run_batch(converter, entries, output_dir, output_name, jobs, stderr,
+              cwd = None):
+    """Converts the (source, output name) entries in parallel and writes the
+    outputs to the directory.
+
+    output_name -- the template of the output file names of entries without
+                   a name, see the -output-name option
+    jobs        -- the number of parallel conversions or 'auto' to adapt it
+                   by an AdaptiveLimiter
+    cwd         -- the directory of relative paths, the current one by default
+
+    A summary of the conversions is written to stderr. Returns the number of
+    failed conversions. Conversions the account balance can't cover fail
+    without being sent.
+    """
+    output_dir = os.path.join(cwd or '', output_dir)
+    tracker = converter.helper.credit_tracker
+    if tracker is None:
+        tracker = CreditTracker()
+        converter.setCreditTracker(tracker)
+    if jobs == 'auto':
+        # the threads only bound the limiter
+        jobs = AUTO_JOBS_MAXIMUM
+        if converter.helper.rate_limiter is None:
+            converter.setRateLimiter(AdaptiveLimiter(maximum=jobs))
+    names = set()
+    lock = threading.Lock()
+
+    def convert(entry):
+        index, (source, name) = entry
+        if isinstance(converter, PdfToPdfClient):
+            output = convert_source(converter, os.path.join(cwd or '', source))
+        else:
+            method = get_cli_input(source, cwd)
+            if method is None:
+                raise Error("Invalid source '{}'. Must be a valid file or URL.".format(source))
+            output = getattr(converter, method[0])(method[1])
+        result = converter.helper._get_result()
+
+        if not name:
+            ext = 'zip' if output[:4] == b'PK\x03\x04' else converter.fields['output_format']
+            name = output_name.format(name=get_batch_name(source), index=index, ext=ext)
+        with lock:
+            # sources with the same name get a numbered output
+            base, ext = os.path.splitext(name)
+            number = 1
+            while name in names:
+                number += 1
+                name = '{}-{}{}'.format(base, number, ext)
+            names.add(name)
+        path = os.path.join(output_dir, name)
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError:
+            if not os.path.isdir(os.path.dirname(path)):
+                raise
+        with open(path, 'wb') as output_file:
+            output_file.write(output)
+        return path, result.consumed_credit_count, result.page_count
+
+    def timed(entry):
+        started = _monotonic()
+        try:
+            path, credits, pages = convert(entry)
+            error = None
+        except Exception as why:
+            path, credits, pages, error = None, 0, 0, str(why)
+        return BatchJob(entry[0], entry[1][0], path, _monotonic() - started,
+                        credits, pages, error)
+
+    started = _monotonic()
+    converter.batch.setJobs(jobs)
+    done = sorted(future.result() for source, future in
+                  converter.batch.map(timed, enumerate(entries, 1)))
+    for job in done:
+        if job.error is None:
+            stderr.write('{:7.2f}s {:5} credits {:5} pages  {} -> {}\n'.format(
+                job.time, job.credits, job.pages, job.source, job.output))
+        else:
+            stderr.write('{:7.2f}s FAILED  {}: {}\n'.format(
+                job.time, job.source, job.error))
+    failed = len([job for job in done if job.error is not None])
+    stderr.write('{} conversions, {} failed, {:.2f}s, {} credits, {} pages\n'.format(
+        len(done), failed, _monotonic() - started,
+        sum(job.credits for job in done), sum(job.pages for job in done)))
+    if tracker.getBalance() is not None:
+        stderr.write('{} credits remaining\n'.format(tracker.getBalance()))
+    return failed
+
 # generated code
 
 class HtmlToPdfClient:
@@ -984,22 +3273,21 @@ class HtmlToPdfClient:
         self.file_id = 1
         self.files = {}
         self.raw_data = {}
+        self.batch = BatchExecutor()
 
     def convertUrl(self, url):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_url"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrl", "html-to-pdf", 'Supported protocols are http:// and https://.', "convert_url"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
 
     def convertUrlToStream(self, url, out_stream):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_url_to_stream"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "html-to-pdf", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
 
     def convertUrlToFile(self, url, file_path):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_url_to_file"""
@@ -1020,16 +3308,14 @@ class HtmlToPdfClient:
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFile", "html-to-pdf", 'The file must exist and not be empty.', "convert_file"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
 
     def convertFileToStream(self, file, out_stream):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_file_to_stream"""
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFileToStream::file", "html-to-pdf", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
 
     def convertFileToFile(self, file, file_path):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_file_to_file"""
@@ -1050,16 +3336,14 @@ class HtmlToPdfClient:
         if not (text):
             raise Error(create_invalid_value_message(text, "convertString", "html-to-pdf", 'The string must not be empty.', "convert_string"), 470);
         
-        self.fields['text'] = get_utf8_string(text)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, text=get_utf8_string(text)), self.files, self.raw_data)
 
     def convertStringToStream(self, text, out_stream):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_string_to_stream"""
         if not (text):
             raise Error(create_invalid_value_message(text, "convertStringToStream::text", "html-to-pdf", 'The string must not be empty.', "convert_string_to_stream"), 470);
         
-        self.fields['text'] = get_utf8_string(text)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, text=get_utf8_string(text)), self.files, self.raw_data, out_stream)
 
     def convertStringToFile(self, text, file_path):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_string_to_file"""
@@ -1077,13 +3361,11 @@ class HtmlToPdfClient:
 
     def convertStream(self, in_stream):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream)
 
     def convertStreamToStream(self, in_stream, out_stream):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_stream_to_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream, out_stream)
 
     def convertStreamToFile(self, in_stream, file_path):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_stream_to_file"""
@@ -1856,6 +4138,10 @@ class HtmlToPdfClient:
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#get_output_size"""
         return self.helper.getOutputSize()
 
+    def getConversionResult(self):
+        """Returns the ConversionResult of the last conversion made by the calling thread."""
+        return self.helper.getConversionResult()
+
     def getVersion(self):
         """https://pdfcrowd.com/api/html-to-pdf-python/ref/#get_version"""
         return 'client {}, API v2, converter {}'.format(CLIENT_VERSION, self.helper.getConverterVersion())
@@ -2036,6 +4322,89 @@ class HtmlToPdfClient:
         self.helper.setRetryCount(count)
         return self
 
+    def setRetryPolicy(self, policy):
+        """Set the RetryPolicy deciding which failed requests are retried and how long to wait. Each client has its own policy by default."""
+        self.helper.setRetryPolicy(policy)
+        return self
+
+    def setConnectTimeout(self, timeout):
+        """Set the timeout in seconds for connecting to the API. No timeout is used by default."""
+        self.helper.setConnectTimeout(timeout)
+        return self
+
+    def setReadTimeout(self, timeout):
+        """Set the timeout in seconds for a single read from or write to the API connection. No timeout is used by default."""
+        self.helper.setReadTimeout(timeout)
+        return self
+
+    def setDeadline(self, deadline):
+        """Set the maximum duration in seconds of a conversion including all retries. There is no deadline by default."""
+        self.helper.setDeadline(deadline)
+        return self
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        """Set the request size in bytes from which the input is uploaded only after the API accepts the request, so that a rejected conversion doesn't upload it. The client waits for the API at most timeout seconds, which must be positive. Default is 1 MiB, None sends all requests at once."""
+        self.helper.setExpectContinue(min_size, timeout)
+        return self
+
+    def setCancellationToken(self, token):
+        """Set the CancellationToken which aborts the conversions in progress when cancelled."""
+        self.helper.setCancellationToken(token)
+        return self
+
+    def setCache(self, cache):
+        """Set the cache of conversion outputs, a DiskCache or a MemoryCache. A cached output is returned without calling the API. Outputs are not cached by default."""
+        self.helper.setCache(cache)
+        return self
+
+    def setSingleFlight(self, single_flight):
+        """Set the SingleFlight which sends one API request for identical conversions made at the same time and shares its output. Not used by default."""
+        self.helper.setSingleFlight(single_flight)
+        return self
+
+    def setAssetCache(self, assets):
+        """Set the AssetCache keeping small uploaded files such as watermarks in memory. A cache shared by all clients is used by default, None disables it."""
+        self.helper.setAssetCache(assets)
+        return self
+
+    def setCreditTracker(self, tracker):
+        """Set the CreditTracker which reserves the estimated credits of each conversion and rejects conversions the account balance can't cover. Share one tracker by all clients of an account. None by default."""
+        self.helper.setCreditTracker(tracker)
+        return self
+
+    def setRateLimiter(self, limiter):
+        """Set the RateLimiter which limits the rate and the concurrency of the API requests. Share one limiter by all clients of the process. None by default."""
+        self.helper.setRateLimiter(limiter)
+        return self
+
+    def setCircuitBreaker(self, breaker):
+        """Set the CircuitBreaker which fails conversions at once while the API can't be reached. Share one breaker by all clients of the process. None by default."""
+        self.helper.setCircuitBreaker(breaker)
+        return self
+
+    def freeze(self):
+        """Encode the options set so far once and reuse them in the following conversions. Options changed later make the conversions encode all options again until freeze is called again."""
+        self.helper.setTemplate(RequestTemplate(self.fields))
+        return self
+
+    def applyProfile(self, profile):
+        """Apply the options of a Profile created for this converter class. The options were validated when the profile was created."""
+        profile.applyTo(self)
+        return self
+
+    def setBatchJobs(self, jobs):
+        """Set the number of conversions run in parallel by submit and convertMany. Default is 4."""
+        self.batch.setJobs(jobs)
+        return self
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a background thread and return its concurrent.futures.Future resolving to the ConversionResult."""
+        return self.batch.submit(run_conversion, self, getattr(self, method), *args)
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources in background threads and yield (source, future) pairs as the conversions finish. The futures resolve to the ConversionResult objects."""
+        return self.batch.map(lambda source: run_conversion(self, convert_source, self, source), sources, jobs)
+
 class HtmlToImageClient:
     """Conversion from HTML to image.
 
@@ -2051,6 +4420,7 @@ class HtmlToImageClient:
         self.file_id = 1
         self.files = {}
         self.raw_data = {}
+        self.batch = BatchExecutor()
 
     def setOutputFormat(self, output_format):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#set_output_format"""
@@ -2065,16 +4435,14 @@ class HtmlToImageClient:
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrl", "html-to-image", 'Supported protocols are http:// and https://.', "convert_url"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
 
     def convertUrlToStream(self, url, out_stream):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_url_to_stream"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "html-to-image", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
 
     def convertUrlToFile(self, url, file_path):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_url_to_file"""
@@ -2095,16 +4463,14 @@ class HtmlToImageClient:
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFile", "html-to-image", 'The file must exist and not be empty.', "convert_file"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
 
     def convertFileToStream(self, file, out_stream):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_file_to_stream"""
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFileToStream::file", "html-to-image", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
 
     def convertFileToFile(self, file, file_path):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_file_to_file"""
@@ -2125,16 +4491,14 @@ class HtmlToImageClient:
         if not (text):
             raise Error(create_invalid_value_message(text, "convertString", "html-to-image", 'The string must not be empty.', "convert_string"), 470);
         
-        self.fields['text'] = get_utf8_string(text)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, text=get_utf8_string(text)), self.files, self.raw_data)
 
     def convertStringToStream(self, text, out_stream):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_string_to_stream"""
         if not (text):
             raise Error(create_invalid_value_message(text, "convertStringToStream::text", "html-to-image", 'The string must not be empty.', "convert_string_to_stream"), 470);
         
-        self.fields['text'] = get_utf8_string(text)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, text=get_utf8_string(text)), self.files, self.raw_data, out_stream)
 
     def convertStringToFile(self, text, file_path):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_string_to_file"""
@@ -2152,13 +4516,11 @@ class HtmlToImageClient:
 
     def convertStream(self, in_stream):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream)
 
     def convertStreamToStream(self, in_stream, out_stream):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_stream_to_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream, out_stream)
 
     def convertStreamToFile(self, in_stream, file_path):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_stream_to_file"""
@@ -2450,6 +4812,10 @@ class HtmlToImageClient:
         """https://pdfcrowd.com/api/html-to-image-python/ref/#get_output_size"""
         return self.helper.getOutputSize()
 
+    def getConversionResult(self):
+        """Returns the ConversionResult of the last conversion made by the calling thread."""
+        return self.helper.getConversionResult()
+
     def getVersion(self):
         """https://pdfcrowd.com/api/html-to-image-python/ref/#get_version"""
         return 'client {}, API v2, converter {}'.format(CLIENT_VERSION, self.helper.getConverterVersion())
@@ -2539,6 +4905,89 @@ class HtmlToImageClient:
         self.helper.setRetryCount(count)
         return self
 
+    def setRetryPolicy(self, policy):
+        """Set the RetryPolicy deciding which failed requests are retried and how long to wait. Each client has its own policy by default."""
+        self.helper.setRetryPolicy(policy)
+        return self
+
+    def setConnectTimeout(self, timeout):
+        """Set the timeout in seconds for connecting to the API. No timeout is used by default."""
+        self.helper.setConnectTimeout(timeout)
+        return self
+
+    def setReadTimeout(self, timeout):
+        """Set the timeout in seconds for a single read from or write to the API connection. No timeout is used by default."""
+        self.helper.setReadTimeout(timeout)
+        return self
+
+    def setDeadline(self, deadline):
+        """Set the maximum duration in seconds of a conversion including all retries. There is no deadline by default."""
+        self.helper.setDeadline(deadline)
+        return self
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        """Set the request size in bytes from which the input is uploaded only after the API accepts the request, so that a rejected conversion doesn't upload it. The client waits for the API at most timeout seconds, which must be positive. Default is 1 MiB, None sends all requests at once."""
+        self.helper.setExpectContinue(min_size, timeout)
+        return self
+
+    def setCancellationToken(self, token):
+        """Set the CancellationToken which aborts the conversions in progress when cancelled."""
+        self.helper.setCancellationToken(token)
+        return self
+
+    def setCache(self, cache):
+        """Set the cache of conversion outputs, a DiskCache or a MemoryCache. A cached output is returned without calling the API. Outputs are not cached by default."""
+        self.helper.setCache(cache)
+        return self
+
+    def setSingleFlight(self, single_flight):
+        """Set the SingleFlight which sends one API request for identical conversions made at the same time and shares its output. Not used by default."""
+        self.helper.setSingleFlight(single_flight)
+        return self
+
+    def setAssetCache(self, assets):
+        """Set the AssetCache keeping small uploaded files such as watermarks in memory. A cache shared by all clients is used by default, None disables it."""
+        self.helper.setAssetCache(assets)
+        return self
+
+    def setCreditTracker(self, tracker):
+        """Set the CreditTracker which reserves the estimated credits of each conversion and rejects conversions the account balance can't cover. Share one tracker by all clients of an account. None by default."""
+        self.helper.setCreditTracker(tracker)
+        return self
+
+    def setRateLimiter(self, limiter):
+        """Set the RateLimiter which limits the rate and the concurrency of the API requests. Share one limiter by all clients of the process. None by default."""
+        self.helper.setRateLimiter(limiter)
+        return self
+
+    def setCircuitBreaker(self, breaker):
+        """Set the CircuitBreaker which fails conversions at once while the API can't be reached. Share one breaker by all clients of the process. None by default."""
+        self.helper.setCircuitBreaker(breaker)
+        return self
+
+    def freeze(self):
+        """Encode the options set so far once and reuse them in the following conversions. Options changed later make the conversions encode all options again until freeze is called again."""
+        self.helper.setTemplate(RequestTemplate(self.fields))
+        return self
+
+    def applyProfile(self, profile):
+        """Apply the options of a Profile created for this converter class. The options were validated when the profile was created."""
+        profile.applyTo(self)
+        return self
+
+    def setBatchJobs(self, jobs):
+        """Set the number of conversions run in parallel by submit and convertMany. Default is 4."""
+        self.batch.setJobs(jobs)
+        return self
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a background thread and return its concurrent.futures.Future resolving to the ConversionResult."""
+        return self.batch.submit(run_conversion, self, getattr(self, method), *args)
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources in background threads and yield (source, future) pairs as the conversions finish. The futures resolve to the ConversionResult objects."""
+        return self.batch.map(lambda source: run_conversion(self, convert_source, self, source), sources, jobs)
+
 class ImageToImageClient:
     """Conversion from one image format to another image format.
 
@@ -2554,22 +5003,21 @@ class ImageToImageClient:
         self.file_id = 1
         self.files = {}
         self.raw_data = {}
+        self.batch = BatchExecutor()
 
     def convertUrl(self, url):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_url"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrl", "image-to-image", 'Supported protocols are http:// and https://.', "convert_url"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
 
     def convertUrlToStream(self, url, out_stream):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_url_to_stream"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "image-to-image", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
 
     def convertUrlToFile(self, url, file_path):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_url_to_file"""
@@ -2590,16 +5038,14 @@ class ImageToImageClient:
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFile", "image-to-image", 'The file must exist and not be empty.', "convert_file"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
 
     def convertFileToStream(self, file, out_stream):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_file_to_stream"""
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFileToStream::file", "image-to-image", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
 
     def convertFileToFile(self, file, file_path):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_file_to_file"""
@@ -2617,13 +5063,11 @@ class ImageToImageClient:
 
     def convertRawData(self, data):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_raw_data"""
-        self.raw_data['file'] = data
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
 
     def convertRawDataToStream(self, data, out_stream):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_raw_data_to_stream"""
-        self.raw_data['file'] = data
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
 
     def convertRawDataToFile(self, data, file_path):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_raw_data_to_file"""
@@ -2641,13 +5085,11 @@ class ImageToImageClient:
 
     def convertStream(self, in_stream):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream)
 
     def convertStreamToStream(self, in_stream, out_stream):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_stream_to_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream, out_stream)
 
     def convertStreamToFile(self, in_stream, file_path):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_stream_to_file"""
@@ -2858,6 +5300,10 @@ class ImageToImageClient:
         """https://pdfcrowd.com/api/image-to-image-python/ref/#get_output_size"""
         return self.helper.getOutputSize()
 
+    def getConversionResult(self):
+        """Returns the ConversionResult of the last conversion made by the calling thread."""
+        return self.helper.getConversionResult()
+
     def getVersion(self):
         """https://pdfcrowd.com/api/image-to-image-python/ref/#get_version"""
         return 'client {}, API v2, converter {}'.format(CLIENT_VERSION, self.helper.getConverterVersion())
@@ -2916,6 +5362,89 @@ class ImageToImageClient:
         self.helper.setRetryCount(count)
         return self
 
+    def setRetryPolicy(self, policy):
+        """Set the RetryPolicy deciding which failed requests are retried and how long to wait. Each client has its own policy by default."""
+        self.helper.setRetryPolicy(policy)
+        return self
+
+    def setConnectTimeout(self, timeout):
+        """Set the timeout in seconds for connecting to the API. No timeout is used by default."""
+        self.helper.setConnectTimeout(timeout)
+        return self
+
+    def setReadTimeout(self, timeout):
+        """Set the timeout in seconds for a single read from or write to the API connection. No timeout is used by default."""
+        self.helper.setReadTimeout(timeout)
+        return self
+
+    def setDeadline(self, deadline):
+        """Set the maximum duration in seconds of a conversion including all retries. There is no deadline by default."""
+        self.helper.setDeadline(deadline)
+        return self
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        """Set the request size in bytes from which the input is uploaded only after the API accepts the request, so that a rejected conversion doesn't upload it. The client waits for the API at most timeout seconds, which must be positive. Default is 1 MiB, None sends all requests at once."""
+        self.helper.setExpectContinue(min_size, timeout)
+        return self
+
+    def setCancellationToken(self, token):
+        """Set the CancellationToken which aborts the conversions in progress when cancelled."""
+        self.helper.setCancellationToken(token)
+        return self
+
+    def setCache(self, cache):
+        """Set the cache of conversion outputs, a DiskCache or a MemoryCache. A cached output is returned without calling the API. Outputs are not cached by default."""
+        self.helper.setCache(cache)
+        return self
+
+    def setSingleFlight(self, single_flight):
+        """Set the SingleFlight which sends one API request for identical conversions made at the same time and shares its output. Not used by default."""
+        self.helper.setSingleFlight(single_flight)
+        return self
+
+    def setAssetCache(self, assets):
+        """Set the AssetCache keeping small uploaded files such as watermarks in memory. A cache shared by all clients is used by default, None disables it."""
+        self.helper.setAssetCache(assets)
+        return self
+
+    def setCreditTracker(self, tracker):
+        """Set the CreditTracker which reserves the estimated credits of each conversion and rejects conversions the account balance can't cover. Share one tracker by all clients of an account. None by default."""
+        self.helper.setCreditTracker(tracker)
+        return self
+
+    def setRateLimiter(self, limiter):
+        """Set the RateLimiter which limits the rate and the concurrency of the API requests. Share one limiter by all clients of the process. None by default."""
+        self.helper.setRateLimiter(limiter)
+        return self
+
+    def setCircuitBreaker(self, breaker):
+        """Set the CircuitBreaker which fails conversions at once while the API can't be reached. Share one breaker by all clients of the process. None by default."""
+        self.helper.setCircuitBreaker(breaker)
+        return self
+
+    def freeze(self):
+        """Encode the options set so far once and reuse them in the following conversions. Options changed later make the conversions encode all options again until freeze is called again."""
+        self.helper.setTemplate(RequestTemplate(self.fields))
+        return self
+
+    def applyProfile(self, profile):
+        """Apply the options of a Profile created for this converter class. The options were validated when the profile was created."""
+        profile.applyTo(self)
+        return self
+
+    def setBatchJobs(self, jobs):
+        """Set the number of conversions run in parallel by submit and convertMany. Default is 4."""
+        self.batch.setJobs(jobs)
+        return self
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a background thread and return its concurrent.futures.Future resolving to the ConversionResult."""
+        return self.batch.submit(run_conversion, self, getattr(self, method), *args)
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources in background threads and yield (source, future) pairs as the conversions finish. The futures resolve to the ConversionResult objects."""
+        return self.batch.map(lambda source: run_conversion(self, convert_source, self, source), sources, jobs)
+
 class PdfToPdfClient:
     """Conversion from PDF to PDF.
 
@@ -2931,6 +5460,7 @@ class PdfToPdfClient:
         self.file_id = 1
         self.files = {}
         self.raw_data = {}
+        self.batch = BatchExecutor()
 
     def setAction(self, action):
         """https://pdfcrowd.com/api/pdf-to-pdf-python/ref/#set_action"""
@@ -3219,6 +5749,10 @@ class PdfToPdfClient:
         """https://pdfcrowd.com/api/pdf-to-pdf-python/ref/#get_output_size"""
         return self.helper.getOutputSize()
 
+    def getConversionResult(self):
+        """Returns the ConversionResult of the last conversion made by the calling thread."""
+        return self.helper.getConversionResult()
+
     def getVersion(self):
         """https://pdfcrowd.com/api/pdf-to-pdf-python/ref/#get_version"""
         return 'client {}, API v2, converter {}'.format(CLIENT_VERSION, self.helper.getConverterVersion())
@@ -3261,6 +5795,89 @@ class PdfToPdfClient:
         self.helper.setRetryCount(count)
         return self
 
+    def setRetryPolicy(self, policy):
+        """Set the RetryPolicy deciding which failed requests are retried and how long to wait. Each client has its own policy by default."""
+        self.helper.setRetryPolicy(policy)
+        return self
+
+    def setConnectTimeout(self, timeout):
+        """Set the timeout in seconds for connecting to the API. No timeout is used by default."""
+        self.helper.setConnectTimeout(timeout)
+        return self
+
+    def setReadTimeout(self, timeout):
+        """Set the timeout in seconds for a single read from or write to the API connection. No timeout is used by default."""
+        self.helper.setReadTimeout(timeout)
+        return self
+
+    def setDeadline(self, deadline):
+        """Set the maximum duration in seconds of a conversion including all retries. There is no deadline by default."""
+        self.helper.setDeadline(deadline)
+        return self
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        """Set the request size in bytes from which the input is uploaded only after the API accepts the request, so that a rejected conversion doesn't upload it. The client waits for the API at most timeout seconds, which must be positive. Default is 1 MiB, None sends all requests at once."""
+        self.helper.setExpectContinue(min_size, timeout)
+        return self
+
+    def setCancellationToken(self, token):
+        """Set the CancellationToken which aborts the conversions in progress when cancelled."""
+        self.helper.setCancellationToken(token)
+        return self
+
+    def setCache(self, cache):
+        """Set the cache of conversion outputs, a DiskCache or a MemoryCache. A cached output is returned without calling the API. Outputs are not cached by default."""
+        self.helper.setCache(cache)
+        return self
+
+    def setSingleFlight(self, single_flight):
+        """Set the SingleFlight which sends one API request for identical conversions made at the same time and shares its output. Not used by default."""
+        self.helper.setSingleFlight(single_flight)
+        return self
+
+    def setAssetCache(self, assets):
+        """Set the AssetCache keeping small uploaded files such as watermarks in memory. A cache shared by all clients is used by default, None disables it."""
+        self.helper.setAssetCache(assets)
+        return self
+
+    def setCreditTracker(self, tracker):
+        """Set the CreditTracker which reserves the estimated credits of each conversion and rejects conversions the account balance can't cover. Share one tracker by all clients of an account. None by default."""
+        self.helper.setCreditTracker(tracker)
+        return self
+
+    def setRateLimiter(self, limiter):
+        """Set the RateLimiter which limits the rate and the concurrency of the API requests. Share one limiter by all clients of the process. None by default."""
+        self.helper.setRateLimiter(limiter)
+        return self
+
+    def setCircuitBreaker(self, breaker):
+        """Set the CircuitBreaker which fails conversions at once while the API can't be reached. Share one breaker by all clients of the process. None by default."""
+        self.helper.setCircuitBreaker(breaker)
+        return self
+
+    def freeze(self):
+        """Encode the options set so far once and reuse them in the following conversions. Options changed later make the conversions encode all options again until freeze is called again."""
+        self.helper.setTemplate(RequestTemplate(self.fields))
+        return self
+
+    def applyProfile(self, profile):
+        """Apply the options of a Profile created for this converter class. The options were validated when the profile was created."""
+        profile.applyTo(self)
+        return self
+
+    def setBatchJobs(self, jobs):
+        """Set the number of conversions run in parallel by submit and convertMany. Default is 4."""
+        self.batch.setJobs(jobs)
+        return self
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a background thread and return its concurrent.futures.Future resolving to the ConversionResult."""
+        return self.batch.submit(run_conversion, self, getattr(self, method), *args)
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources in background threads and yield (source, future) pairs as the conversions finish. The futures resolve to the ConversionResult objects."""
+        return self.batch.map(lambda source: run_conversion(self, convert_source, self, source), sources, jobs)
+
 class ImageToPdfClient:
     """Conversion from an image to PDF.
 
@@ -3276,22 +5893,21 @@ class ImageToPdfClient:
         self.file_id = 1
         self.files = {}
         self.raw_data = {}
+        self.batch = BatchExecutor()
 
     def convertUrl(self, url):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_url"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrl", "image-to-pdf", 'Supported protocols are http:// and https://.', "convert_url"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
 
     def convertUrlToStream(self, url, out_stream):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_url_to_stream"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "image-to-pdf", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
 
     def convertUrlToFile(self, url, file_path):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_url_to_file"""
@@ -3312,16 +5928,14 @@ class ImageToPdfClient:
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFile", "image-to-pdf", 'The file must exist and not be empty.', "convert_file"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
 
     def convertFileToStream(self, file, out_stream):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_file_to_stream"""
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFileToStream::file", "image-to-pdf", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
 
     def convertFileToFile(self, file, file_path):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_file_to_file"""
@@ -3339,13 +5953,11 @@ class ImageToPdfClient:
 
     def convertRawData(self, data):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_raw_data"""
-        self.raw_data['file'] = data
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
 
     def convertRawDataToStream(self, data, out_stream):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_raw_data_to_stream"""
-        self.raw_data['file'] = data
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
 
     def convertRawDataToFile(self, data, file_path):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_raw_data_to_file"""
@@ -3363,13 +5975,11 @@ class ImageToPdfClient:
 
     def convertStream(self, in_stream):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream)
 
     def convertStreamToStream(self, in_stream, out_stream):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_stream_to_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream, out_stream)
 
     def convertStreamToFile(self, in_stream, file_path):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_stream_to_file"""
@@ -3761,6 +6371,10 @@ class ImageToPdfClient:
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#get_output_size"""
         return self.helper.getOutputSize()
 
+    def getConversionResult(self):
+        """Returns the ConversionResult of the last conversion made by the calling thread."""
+        return self.helper.getConversionResult()
+
     def getVersion(self):
         """https://pdfcrowd.com/api/image-to-pdf-python/ref/#get_version"""
         return 'client {}, API v2, converter {}'.format(CLIENT_VERSION, self.helper.getConverterVersion())
@@ -3819,6 +6433,89 @@ class ImageToPdfClient:
         self.helper.setRetryCount(count)
         return self
 
+    def setRetryPolicy(self, policy):
+        """Set the RetryPolicy deciding which failed requests are retried and how long to wait. Each client has its own policy by default."""
+        self.helper.setRetryPolicy(policy)
+        return self
+
+    def setConnectTimeout(self, timeout):
+        """Set the timeout in seconds for connecting to the API. No timeout is used by default."""
+        self.helper.setConnectTimeout(timeout)
+        return self
+
+    def setReadTimeout(self, timeout):
+        """Set the timeout in seconds for a single read from or write to the API connection. No timeout is used by default."""
+        self.helper.setReadTimeout(timeout)
+        return self
+
+    def setDeadline(self, deadline):
+        """Set the maximum duration in seconds of a conversion including all retries. There is no deadline by default."""
+        self.helper.setDeadline(deadline)
+        return self
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        """Set the request size in bytes from which the input is uploaded only after the API accepts the request, so that a rejected conversion doesn't upload it. The client waits for the API at most timeout seconds, which must be positive. Default is 1 MiB, None sends all requests at once."""
+        self.helper.setExpectContinue(min_size, timeout)
+        return self
+
+    def setCancellationToken(self, token):
+        """Set the CancellationToken which aborts the conversions in progress when cancelled."""
+        self.helper.setCancellationToken(token)
+        return self
+
+    def setCache(self, cache):
+        """Set the cache of conversion outputs, a DiskCache or a MemoryCache. A cached output is returned without calling the API. Outputs are not cached by default."""
+        self.helper.setCache(cache)
+        return self
+
+    def setSingleFlight(self, single_flight):
+        """Set the SingleFlight which sends one API request for identical conversions made at the same time and shares its output. Not used by default."""
+        self.helper.setSingleFlight(single_flight)
+        return self
+
+    def setAssetCache(self, assets):
+        """Set the AssetCache keeping small uploaded files such as watermarks in memory. A cache shared by all clients is used by default, None disables it."""
+        self.helper.setAssetCache(assets)
+        return self
+
+    def setCreditTracker(self, tracker):
+        """Set the CreditTracker which reserves the estimated credits of each conversion and rejects conversions the account balance can't cover. Share one tracker by all clients of an account. None by default."""
+        self.helper.setCreditTracker(tracker)
+        return self
+
+    def setRateLimiter(self, limiter):
+        """Set the RateLimiter which limits the rate and the concurrency of the API requests. Share one limiter by all clients of the process. None by default."""
+        self.helper.setRateLimiter(limiter)
+        return self
+
+    def setCircuitBreaker(self, breaker):
+        """Set the CircuitBreaker which fails conversions at once while the API can't be reached. Share one breaker by all clients of the process. None by default."""
+        self.helper.setCircuitBreaker(breaker)
+        return self
+
+    def freeze(self):
+        """Encode the options set so far once and reuse them in the following conversions. Options changed later make the conversions encode all options again until freeze is called again."""
+        self.helper.setTemplate(RequestTemplate(self.fields))
+        return self
+
+    def applyProfile(self, profile):
+        """Apply the options of a Profile created for this converter class. The options were validated when the profile was created."""
+        profile.applyTo(self)
+        return self
+
+    def setBatchJobs(self, jobs):
+        """Set the number of conversions run in parallel by submit and convertMany. Default is 4."""
+        self.batch.setJobs(jobs)
+        return self
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a background thread and return its concurrent.futures.Future resolving to the ConversionResult."""
+        return self.batch.submit(run_conversion, self, getattr(self, method), *args)
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources in background threads and yield (source, future) pairs as the conversions finish. The futures resolve to the ConversionResult objects."""
+        return self.batch.map(lambda source: run_conversion(self, convert_source, self, source), sources, jobs)
+
 class PdfToHtmlClient:
     """Conversion from PDF to HTML.
 
@@ -3834,22 +6531,21 @@ class PdfToHtmlClient:
         self.file_id = 1
         self.files = {}
         self.raw_data = {}
+        self.batch = BatchExecutor()
 
     def convertUrl(self, url):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_url"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrl", "pdf-to-html", 'Supported protocols are http:// and https://.', "convert_url"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
 
     def convertUrlToStream(self, url, out_stream):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_url_to_stream"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "pdf-to-html", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
 
     def convertUrlToFile(self, url, file_path):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_url_to_file"""
@@ -3873,16 +6569,14 @@ class PdfToHtmlClient:
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFile", "pdf-to-html", 'The file must exist and not be empty.', "convert_file"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
 
     def convertFileToStream(self, file, out_stream):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_file_to_stream"""
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFileToStream::file", "pdf-to-html", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
 
     def convertFileToFile(self, file, file_path):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_file_to_file"""
@@ -3903,13 +6597,11 @@ class PdfToHtmlClient:
 
     def convertRawData(self, data):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_raw_data"""
-        self.raw_data['file'] = data
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
 
     def convertRawDataToStream(self, data, out_stream):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_raw_data_to_stream"""
-        self.raw_data['file'] = data
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
 
     def convertRawDataToFile(self, data, file_path):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_raw_data_to_file"""
@@ -3930,13 +6622,11 @@ class PdfToHtmlClient:
 
     def convertStream(self, in_stream):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream)
 
     def convertStreamToStream(self, in_stream, out_stream):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_stream_to_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream, out_stream)
 
     def convertStreamToFile(self, in_stream, file_path):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_stream_to_file"""
@@ -4100,6 +6790,10 @@ class PdfToHtmlClient:
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#get_output_size"""
         return self.helper.getOutputSize()
 
+    def getConversionResult(self):
+        """Returns the ConversionResult of the last conversion made by the calling thread."""
+        return self.helper.getConversionResult()
+
     def getVersion(self):
         """https://pdfcrowd.com/api/pdf-to-html-python/ref/#get_version"""
         return 'client {}, API v2, converter {}'.format(CLIENT_VERSION, self.helper.getConverterVersion())
@@ -4158,6 +6852,89 @@ class PdfToHtmlClient:
         self.helper.setRetryCount(count)
         return self
 
+    def setRetryPolicy(self, policy):
+        """Set the RetryPolicy deciding which failed requests are retried and how long to wait. Each client has its own policy by default."""
+        self.helper.setRetryPolicy(policy)
+        return self
+
+    def setConnectTimeout(self, timeout):
+        """Set the timeout in seconds for connecting to the API. No timeout is used by default."""
+        self.helper.setConnectTimeout(timeout)
+        return self
+
+    def setReadTimeout(self, timeout):
+        """Set the timeout in seconds for a single read from or write to the API connection. No timeout is used by default."""
+        self.helper.setReadTimeout(timeout)
+        return self
+
+    def setDeadline(self, deadline):
+        """Set the maximum duration in seconds of a conversion including all retries. There is no deadline by default."""
+        self.helper.setDeadline(deadline)
+        return self
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        """Set the request size in bytes from which the input is uploaded only after the API accepts the request, so that a rejected conversion doesn't upload it. The client waits for the API at most timeout seconds, which must be positive. Default is 1 MiB, None sends all requests at once."""
+        self.helper.setExpectContinue(min_size, timeout)
+        return self
+
+    def setCancellationToken(self, token):
+        """Set the CancellationToken which aborts the conversions in progress when cancelled."""
+        self.helper.setCancellationToken(token)
+        return self
+
+    def setCache(self, cache):
+        """Set the cache of conversion outputs, a DiskCache or a MemoryCache. A cached output is returned without calling the API. Outputs are not cached by default."""
+        self.helper.setCache(cache)
+        return self
+
+    def setSingleFlight(self, single_flight):
+        """Set the SingleFlight which sends one API request for identical conversions made at the same time and shares its output. Not used by default."""
+        self.helper.setSingleFlight(single_flight)
+        return self
+
+    def setAssetCache(self, assets):
+        """Set the AssetCache keeping small uploaded files such as watermarks in memory. A cache shared by all clients is used by default, None disables it."""
+        self.helper.setAssetCache(assets)
+        return self
+
+    def setCreditTracker(self, tracker):
+        """Set the CreditTracker which reserves the estimated credits of each conversion and rejects conversions the account balance can't cover. Share one tracker by all clients of an account. None by default."""
+        self.helper.setCreditTracker(tracker)
+        return self
+
+    def setRateLimiter(self, limiter):
+        """Set the RateLimiter which limits the rate and the concurrency of the API requests. Share one limiter by all clients of the process. None by default."""
+        self.helper.setRateLimiter(limiter)
+        return self
+
+    def setCircuitBreaker(self, breaker):
+        """Set the CircuitBreaker which fails conversions at once while the API can't be reached. Share one breaker by all clients of the process. None by default."""
+        self.helper.setCircuitBreaker(breaker)
+        return self
+
+    def freeze(self):
+        """Encode the options set so far once and reuse them in the following conversions. Options changed later make the conversions encode all options again until freeze is called again."""
+        self.helper.setTemplate(RequestTemplate(self.fields))
+        return self
+
+    def applyProfile(self, profile):
+        """Apply the options of a Profile created for this converter class. The options were validated when the profile was created."""
+        profile.applyTo(self)
+        return self
+
+    def setBatchJobs(self, jobs):
+        """Set the number of conversions run in parallel by submit and convertMany. Default is 4."""
+        self.batch.setJobs(jobs)
+        return self
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a background thread and return its concurrent.futures.Future resolving to the ConversionResult."""
+        return self.batch.submit(run_conversion, self, getattr(self, method), *args)
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources in background threads and yield (source, future) pairs as the conversions finish. The futures resolve to the ConversionResult objects."""
+        return self.batch.map(lambda source: run_conversion(self, convert_source, self, source), sources, jobs)
+
     def _isOutputTypeValid(self, file_path):
         extension = os.path.splitext(file_path)[1].lower()
         return (extension == '.zip') == self.isZippedOutput()
@@ -4176,22 +6953,21 @@ class PdfToTextClient:
         self.file_id = 1
         self.files = {}
         self.raw_data = {}
+        self.batch = BatchExecutor()
 
     def convertUrl(self, url):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_url"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrl", "pdf-to-text", 'Supported protocols are http:// and https://.', "convert_url"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
 
     def convertUrlToStream(self, url, out_stream):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_url_to_stream"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "pdf-to-text", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
 
     def convertUrlToFile(self, url, file_path):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_url_to_file"""
@@ -4212,16 +6988,14 @@ class PdfToTextClient:
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFile", "pdf-to-text", 'The file must exist and not be empty.', "convert_file"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
 
     def convertFileToStream(self, file, out_stream):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_file_to_stream"""
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFileToStream::file", "pdf-to-text", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
 
     def convertFileToFile(self, file, file_path):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_file_to_file"""
@@ -4239,13 +7013,11 @@ class PdfToTextClient:
 
     def convertRawData(self, data):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_raw_data"""
-        self.raw_data['file'] = data
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
 
     def convertRawDataToStream(self, data, out_stream):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_raw_data_to_stream"""
-        self.raw_data['file'] = data
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
 
     def convertRawDataToFile(self, data, file_path):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_raw_data_to_file"""
@@ -4263,13 +7035,11 @@ class PdfToTextClient:
 
     def convertStream(self, in_stream):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream)
 
     def convertStreamToStream(self, in_stream, out_stream):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_stream_to_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream, out_stream)
 
     def convertStreamToFile(self, in_stream, file_path):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_stream_to_file"""
@@ -4419,6 +7189,10 @@ class PdfToTextClient:
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#get_output_size"""
         return self.helper.getOutputSize()
 
+    def getConversionResult(self):
+        """Returns the ConversionResult of the last conversion made by the calling thread."""
+        return self.helper.getConversionResult()
+
     def getVersion(self):
         """https://pdfcrowd.com/api/pdf-to-text-python/ref/#get_version"""
         return 'client {}, API v2, converter {}'.format(CLIENT_VERSION, self.helper.getConverterVersion())
@@ -4469,6 +7243,89 @@ class PdfToTextClient:
         self.helper.setRetryCount(count)
         return self
 
+    def setRetryPolicy(self, policy):
+        """Set the RetryPolicy deciding which failed requests are retried and how long to wait. Each client has its own policy by default."""
+        self.helper.setRetryPolicy(policy)
+        return self
+
+    def setConnectTimeout(self, timeout):
+        """Set the timeout in seconds for connecting to the API. No timeout is used by default."""
+        self.helper.setConnectTimeout(timeout)
+        return self
+
+    def setReadTimeout(self, timeout):
+        """Set the timeout in seconds for a single read from or write to the API connection. No timeout is used by default."""
+        self.helper.setReadTimeout(timeout)
+        return self
+
+    def setDeadline(self, deadline):
+        """Set the maximum duration in seconds of a conversion including all retries. There is no deadline by default."""
+        self.helper.setDeadline(deadline)
+        return self
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        """Set the request size in bytes from which the input is uploaded only after the API accepts the request, so that a rejected conversion doesn't upload it. The client waits for the API at most timeout seconds, which must be positive. Default is 1 MiB, None sends all requests at once."""
+        self.helper.setExpectContinue(min_size, timeout)
+        return self
+
+    def setCancellationToken(self, token):
+        """Set the CancellationToken which aborts the conversions in progress when cancelled."""
+        self.helper.setCancellationToken(token)
+        return self
+
+    def setCache(self, cache):
+        """Set the cache of conversion outputs, a DiskCache or a MemoryCache. A cached output is returned without calling the API. Outputs are not cached by default."""
+        self.helper.setCache(cache)
+        return self
+
+    def setSingleFlight(self, single_flight):
+        """Set the SingleFlight which sends one API request for identical conversions made at the same time and shares its output. Not used by default."""
+        self.helper.setSingleFlight(single_flight)
+        return self
+
+    def setAssetCache(self, assets):
+        """Set the AssetCache keeping small uploaded files such as watermarks in memory. A cache shared by all clients is used by default, None disables it."""
+        self.helper.setAssetCache(assets)
+        return self
+
+    def setCreditTracker(self, tracker):
+        """Set the CreditTracker which reserves the estimated credits of each conversion and rejects conversions the account balance can't cover. Share one tracker by all clients of an account. None by default."""
+        self.helper.setCreditTracker(tracker)
+        return self
+
+    def setRateLimiter(self, limiter):
+        """Set the RateLimiter which limits the rate and the concurrency of the API requests. Share one limiter by all clients of the process. None by default."""
+        self.helper.setRateLimiter(limiter)
+        return self
+
+    def setCircuitBreaker(self, breaker):
+        """Set the CircuitBreaker which fails conversions at once while the API can't be reached. Share one breaker by all clients of the process. None by default."""
+        self.helper.setCircuitBreaker(breaker)
+        return self
+
+    def freeze(self):
+        """Encode the options set so far once and reuse them in the following conversions. Options changed later make the conversions encode all options again until freeze is called again."""
+        self.helper.setTemplate(RequestTemplate(self.fields))
+        return self
+
+    def applyProfile(self, profile):
+        """Apply the options of a Profile created for this converter class. The options were validated when the profile was created."""
+        profile.applyTo(self)
+        return self
+
+    def setBatchJobs(self, jobs):
+        """Set the number of conversions run in parallel by submit and convertMany. Default is 4."""
+        self.batch.setJobs(jobs)
+        return self
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a background thread and return its concurrent.futures.Future resolving to the ConversionResult."""
+        return self.batch.submit(run_conversion, self, getattr(self, method), *args)
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources in background threads and yield (source, future) pairs as the conversions finish. The futures resolve to the ConversionResult objects."""
+        return self.batch.map(lambda source: run_conversion(self, convert_source, self, source), sources, jobs)
+
 class PdfToImageClient:
     """Conversion from PDF to image.
 
@@ -4484,22 +7341,21 @@ class PdfToImageClient:
         self.file_id = 1
         self.files = {}
         self.raw_data = {}
+        self.batch = BatchExecutor()
 
     def convertUrl(self, url):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_url"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrl", "pdf-to-image", 'Supported protocols are http:// and https://.', "convert_url"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
 
     def convertUrlToStream(self, url, out_stream):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_url_to_stream"""
         if not re.match(r'(?i)^https?://.*$', url):
             raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "pdf-to-image", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
         
-        self.fields['url'] = get_utf8_string(url)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
 
     def convertUrlToFile(self, url, file_path):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_url_to_file"""
@@ -4520,16 +7376,14 @@ class PdfToImageClient:
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFile", "pdf-to-image", 'The file must exist and not be empty.', "convert_file"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
 
     def convertFileToStream(self, file, out_stream):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_file_to_stream"""
         if not (os.path.isfile(file) and os.path.getsize(file)):
             raise Error(create_invalid_value_message(file, "convertFileToStream::file", "pdf-to-image", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
         
-        self.files['file'] = get_utf8_string(file)
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
 
     def convertFileToFile(self, file, file_path):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_file_to_file"""
@@ -4547,13 +7401,11 @@ class PdfToImageClient:
 
     def convertRawData(self, data):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_raw_data"""
-        self.raw_data['file'] = data
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
 
     def convertRawDataToStream(self, data, out_stream):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_raw_data_to_stream"""
-        self.raw_data['file'] = data
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
 
     def convertRawDataToFile(self, data, file_path):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_raw_data_to_file"""
@@ -4571,13 +7423,11 @@ class PdfToImageClient:
 
     def convertStream(self, in_stream):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        return self.helper.post(self.fields, self.files, self.raw_data)
+        return self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream)
 
     def convertStreamToStream(self, in_stream, out_stream):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_stream_to_stream"""
-        self.raw_data['stream'] = in_stream.read()
-        self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+        self.helper.post_stream(self.fields, self.files, self.raw_data, in_stream, out_stream)
 
     def convertStreamToFile(self, in_stream, file_path):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_stream_to_file"""
@@ -4707,6 +7557,10 @@ class PdfToImageClient:
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#get_output_size"""
         return self.helper.getOutputSize()
 
+    def getConversionResult(self):
+        """Returns the ConversionResult of the last conversion made by the calling thread."""
+        return self.helper.getConversionResult()
+
     def getVersion(self):
         """https://pdfcrowd.com/api/pdf-to-image-python/ref/#get_version"""
         return 'client {}, API v2, converter {}'.format(CLIENT_VERSION, self.helper.getConverterVersion())
@@ -4757,10 +7611,116 @@ class PdfToImageClient:
         self.helper.setRetryCount(count)
         return self
 
+    def setRetryPolicy(self, policy):
+        """Set the RetryPolicy deciding which failed requests are retried and how long to wait. Each client has its own policy by default."""
+        self.helper.setRetryPolicy(policy)
+        return self
+
+    def setConnectTimeout(self, timeout):
+        """Set the timeout in seconds for connecting to the API. No timeout is used by default."""
+        self.helper.setConnectTimeout(timeout)
+        return self
+
+    def setReadTimeout(self, timeout):
+        """Set the timeout in seconds for a single read from or write to the API connection. No timeout is used by default."""
+        self.helper.setReadTimeout(timeout)
+        return self
+
+    def setDeadline(self, deadline):
+        """Set the maximum duration in seconds of a conversion including all retries. There is no deadline by default."""
+        self.helper.setDeadline(deadline)
+        return self
+
+    def setExpectContinue(self, min_size, timeout=1.0):
+        """Set the request size in bytes from which the input is uploaded only after the API accepts the request, so that a rejected conversion doesn't upload it. The client waits for the API at most timeout seconds, which must be positive. Default is 1 MiB, None sends all requests at once."""
+        self.helper.setExpectContinue(min_size, timeout)
+        return self
+
+    def setCancellationToken(self, token):
+        """Set the CancellationToken which aborts the conversions in progress when cancelled."""
+        self.helper.setCancellationToken(token)
+        return self
+
+    def setCache(self, cache):
+        """Set the cache of conversion outputs, a DiskCache or a MemoryCache. A cached output is returned without calling the API. Outputs are not cached by default."""
+        self.helper.setCache(cache)
+        return self
+
+    def setSingleFlight(self, single_flight):
+        """Set the SingleFlight which sends one API request for identical conversions made at the same time and shares its output. Not used by default."""
+        self.helper.setSingleFlight(single_flight)
+        return self
+
+    def setAssetCache(self, assets):
+        """Set the AssetCache keeping small uploaded files such as watermarks in memory. A cache shared by all clients is used by default, None disables it."""
+        self.helper.setAssetCache(assets)
+        return self
+
+    def setCreditTracker(self, tracker):
+        """Set the CreditTracker which reserves the estimated credits of each conversion and rejects conversions the account balance can't cover. Share one tracker by all clients of an account. None by default."""
+        self.helper.setCreditTracker(tracker)
+        return self
+
+    def setRateLimiter(self, limiter):
+        """Set the RateLimiter which limits the rate and the concurrency of the API requests. Share one limiter by all clients of the process. None by default."""
+        self.helper.setRateLimiter(limiter)
+        return self
+
+    def setCircuitBreaker(self, breaker):
+        """Set the CircuitBreaker which fails conversions at once while the API can't be reached. Share one breaker by all clients of the process. None by default."""
+        self.helper.setCircuitBreaker(breaker)
+        return self
+
+    def freeze(self):
+        """Encode the options set so far once and reuse them in the following conversions. Options changed later make the conversions encode all options again until freeze is called again."""
+        self.helper.setTemplate(RequestTemplate(self.fields))
+        return self
+
+    def applyProfile(self, profile):
+        """Apply the options of a Profile created for this converter class. The options were validated when the profile was created."""
+        profile.applyTo(self)
+        return self
+
+    def setBatchJobs(self, jobs):
+        """Set the number of conversions run in parallel by submit and convertMany. Default is 4."""
+        self.batch.setJobs(jobs)
+        return self
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a background thread and return its concurrent.futures.Future resolving to the ConversionResult."""
+        return self.batch.submit(run_conversion, self, getattr(self, method), *args)
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources in background threads and yield (source, future) pairs as the conversions finish. The futures resolve to the ConversionResult objects."""
+        return self.batch.map(lambda source: run_conversion(self, convert_source, self, source), sources, jobs)
+
+
+def run_cli(argv, converter_known = False, stdin = None, stdout = None,
+            stderr = None, setup = None, prog = None, cwd = None):
+    """Runs the command line in this process.
+
+    stdin, stdout, stderr -- the standard streams are used by default
+    setup -- called with the converter before the options are applied
+    prog -- the program name in the usage, sys.argv[0] by default
+    cwd -- the directory of relative source and output paths, the current
+           one by default
+    """
+    import argparse
+
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+
+    class ArgumentParser(argparse.ArgumentParser):
+        def __init__(self, **kwargs):
+            argparse.ArgumentParser.__init__(self, prog = prog, **kwargs)
+
+        def _print_message(self, message, file = None):
+            if message:
+                (stdout if file is sys.stdout else stderr).write(message)
 
-def main(argv, converter_known = False):
     def show_help():
-        print("""
+        stdout.write("""
 usage: pdfcrowd.py <converter> [options] [args]
 help: pdfcrowd.py help <converter>
 
@@ -4773,18 +7733,40 @@ available converters:
   pdf2html - Conversion from PDF to HTML.
   pdf2text - Conversion from PDF to text.
   pdf2image - Conversion from PDF to image.
-        """)
+
+run conversions of the scripts in a long-running process:
+  pdfcrowd.py worker
+""")
 
     def term_error(message):
-        sys.stderr.write(message + '\n')
+        stderr.write(message + '\n')
         sys.exit(1)
 
+    def jobs_count(value):
+        if value == 'auto':
+            return value
+        try:
+            jobs = int(value)
+        except ValueError:
+            jobs = 0
+        if jobs < 1:
+            raise argparse.ArgumentTypeError("invalid value '{}', use a positive number or auto".format(value))
+        return jobs
+
     def add_generic_args(parser, nsource = 1):
         parser.add_argument('source',
-                            help = "Source to be converted. It can be URL, path to a local file or '-' to use stdin as an input text." if nsource == 1 else "Input files used for a conversion.",
-                            nargs = nsource)
+                            help = "Source to be converted. It can be URL, path to a local file or '-' to use stdin as an input. Several sources are converted in the batch mode." if nsource == 1 else "Input files used for a conversion, '-' reads a file from stdin. Each file is converted separately in the batch mode.",
+                            nargs = '*')
         parser.add_argument('-user-name', help = 'Your user name at pdfcrowd.com.')
         parser.add_argument('-api-key', help = 'Your API key at pdfcrowd.com.')
+        parser.add_argument('-output-dir', dest = '_output_dir', metavar = 'DIR',
+                            help = 'Convert the sources in the batch mode and write the outputs to the directory. The batch mode is used also for a manifest' + (' or several sources' if nsource == 1 else '') + ', the default directory is the current one then. A summary of the conversions is printed at the end. -o is a short form.')
+        parser.add_argument('-jobs', dest = '_jobs', metavar = 'N', type = jobs_count, default = 4,
+                            help = 'The number of conversions running in parallel in the batch mode. auto adapts it to the latency and the overload responses of the API. -j is a short form. Default is 4.')
+        parser.add_argument('-output-name', dest = '_output_name', metavar = 'TEMPLATE', default = '{name}.{ext}',
+                            help = 'The output file name in the batch mode. {name} is the file name of the source without the extension or the last path segment of the URL, {index} is the number of the source and {ext} is the output extension. Default is {name}.{ext}.')
+        parser.add_argument('-manifest', dest = '_manifest', metavar = 'FILE',
+                            help = "A file with a source per line converted in the batch mode, '-' reads the list from stdin. The source can be followed by a tab and the output file name.")
 
     if not len(argv):
         show_help()
@@ -4814,7 +7796,7 @@ available converters:
     if converter == 'html2pdf':
         converter_name = 'HtmlToPdfClient'
 
-        parser = argparse.ArgumentParser(usage = usage,
+        parser = ArgumentParser(usage = usage,
                                          description = 'Conversion from HTML to PDF.',
                                          add_help = False,
                                          epilog = epilog)
@@ -5148,7 +8130,7 @@ available converters:
     if converter == 'html2image':
         converter_name = 'HtmlToImageClient'
 
-        parser = argparse.ArgumentParser(usage = usage,
+        parser = ArgumentParser(usage = usage,
                                          description = 'Conversion from HTML to image.',
                                          add_help = False,
                                          epilog = epilog)
@@ -5295,7 +8277,7 @@ available converters:
     if converter == 'image2image':
         converter_name = 'ImageToImageClient'
 
-        parser = argparse.ArgumentParser(usage = usage,
+        parser = ArgumentParser(usage = usage,
                                          description = 'Conversion from one image format to another image format.',
                                          add_help = False,
                                          epilog = epilog)
@@ -5379,7 +8361,7 @@ available converters:
     if converter == 'pdf2pdf':
         converter_name = 'PdfToPdfClient'
 
-        parser = argparse.ArgumentParser(usage = usage,
+        parser = ArgumentParser(usage = usage,
                                          description = 'Conversion from PDF to PDF.',
                                          add_help = False,
                                          epilog = epilog)
@@ -5491,7 +8473,7 @@ available converters:
     if converter == 'image2pdf':
         converter_name = 'ImageToPdfClient'
 
-        parser = argparse.ArgumentParser(usage = usage,
+        parser = ArgumentParser(usage = usage,
                                          description = 'Conversion from an image to PDF.',
                                          add_help = False,
                                          epilog = epilog)
@@ -5644,7 +8626,7 @@ available converters:
     if converter == 'pdf2html':
         converter_name = 'PdfToHtmlClient'
 
-        parser = argparse.ArgumentParser(usage = usage,
+        parser = ArgumentParser(usage = usage,
                                          description = 'Conversion from PDF to HTML.',
                                          add_help = False,
                                          epilog = epilog)
@@ -5714,7 +8696,7 @@ available converters:
     if converter == 'pdf2text':
         converter_name = 'PdfToTextClient'
 
-        parser = argparse.ArgumentParser(usage = usage,
+        parser = ArgumentParser(usage = usage,
                                          description = 'Conversion from PDF to text.',
                                          add_help = False,
                                          epilog = epilog)
@@ -5780,7 +8762,7 @@ available converters:
     if converter == 'pdf2image':
         converter_name = 'PdfToImageClient'
 
-        parser = argparse.ArgumentParser(usage = usage,
+        parser = ArgumentParser(usage = usage,
                                          description = 'Conversion from PDF to image.',
                                          add_help = False,
                                          epilog = epilog)
@@ -5845,7 +8827,20 @@ available converters:
         parser.print_help()
         sys.exit()
 
-    args = parser.parse_args(argv[1:])
+    args = parser.parse_args([BATCH_OPTION_ALIASES.get(arg, arg) for arg in argv[1:]])
+
+    if not args.source and not args._manifest:
+        parser.error('the following arguments are required: source')
+
+    batch = (args._output_dir is not None or args._manifest or
+             (len(args.source) > 1 and converter_name != 'PdfToPdfClient'))
+    if batch:
+        try:
+            args._output_name.format(name = '', index = 0, ext = '')
+        except (KeyError, IndexError, ValueError) as why:
+            term_error("Invalid output name '{}': {}".format(args._output_name, why))
+        if '-' in args.source:
+            term_error("The batch mode can't convert stdin.")
 
     if not args.user_name:
         term_error('Missing user name.')
@@ -5854,6 +8849,8 @@ available converters:
         term_error('Missing API key.')
 
     converter = getattr(sys.modules[__name__], converter_name)(args.user_name, args.api_key)
+    if setup:
+        setup(converter)
 
     def invoke_method(method, value, arg):
         if arg in multi_args.keys():
@@ -5866,14 +8863,11 @@ available converters:
 
     def get_input(source):
         if source == '-':
-            lines = (line for line in sys.stdin)
-            return 'convertString', ''.join(lines)
-
-        if re.match('(?i)^https?://.*$', source):
-            return 'convertUrl', source
+            return 'convertStream', getattr(stdin, 'buffer', stdin)
 
-        if os.path.isfile(source):
-            return 'convertFile', source
+        method = get_cli_input(source, cwd)
+        if method:
+            return method
 
         term_error("Invalid source '{}'. Must be a valid file, URL, or '-'.".format(source))
 
@@ -5882,6 +8876,8 @@ available converters:
     for arg in vars(args):
         if not arg.startswith('_') and arg != 'source':
             value = getattr(args, arg)
+            if value and arg in get_file_options(converter.__class__):
+                value = os.path.join(cwd or '', value)
             if value:
                 method = ''.join([w.title() if w.islower() else w for w in arg.split('_')])
                 try:
@@ -5889,17 +8885,92 @@ available converters:
                 except AttributeError:
                     invoke_method(method[0].lower() + method[1:], value, arg)
 
+    if batch:
+        entries = [(source, None) for source in args.source]
+        manifest = None
+        if args._manifest == '-':
+            entries = itertools.chain(entries, read_manifest(stdin))
+        elif args._manifest:
+            manifest = open(os.path.join(cwd or '', args._manifest))
+            entries = itertools.chain(entries, read_manifest(manifest))
+        try:
+            failed = run_batch(converter, entries, args._output_dir or '.',
+                               args._output_name, args._jobs, stderr, cwd)
+        finally:
+            if manifest:
+                manifest.close()
+        if failed:
+            sys.exit(1)
+        return
+
+    # the output is written as it is received
+    out_stream = getattr(stdout, 'buffer', stdout)
     if converter_name == 'PdfToPdfClient':
-        for in_file in args.source:
-            converter.addPdfFile(in_file)
-        out = converter.convert()
+        spooled = []
+        try:
+            for in_file in args.source:
+                if in_file != '-':
+                    converter.addPdfFile(os.path.join(cwd or '', in_file))
+                    continue
+                data, file_name = spool_stream(getattr(stdin, 'buffer', stdin))
+                if file_name is None:
+                    converter.addPdfRawData(data)
+                else:
+                    spooled.append(file_name)
+                    converter.addPdfFile(file_name)
+            converter.convertToStream(out_stream)
+        finally:
+            for file_name in spooled:
+                remove_spooled_file(file_name)
     else:
         method, args = get_input(args.source[0])
-        out = getattr(converter, method)(args)
-    if PYTHON_3:
-        sys.stdout.buffer.write(out)
-    else:
-        sys.stdout.write(out)
+        getattr(converter, method + 'ToStream')(args, out_stream)
+
+def run_worker(argv):
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(
+        prog = 'pdfcrowd.py worker',
+        description = 'Run the conversions of the html2pdf, pdf2pdf, ... scripts in a long-running process. The scripts forward their command line and stdin to the worker while it runs.',
+        epilog = 'produced by: www.pdfcrowd.com')
+    parser.add_argument('-socket',
+                        help = 'The path of the unix socket. The scripts use the path set by the PDFCROWD_WORKER_SOCKET environment variable. Default is {}.'.format(get_worker_path()))
+    parser.add_argument('-rate', type = float,
+                        help = 'The maximum number of API requests per second of all conversions.')
+    parser.add_argument('-burst', type = int, default = 1,
+                        help = 'The number of API requests which can be sent at once after a pause. Default is 1.')
+    parser.add_argument('-concurrency', type = int,
+                        help = 'The maximum number of API requests in progress at once.')
+    parser.add_argument('-failure-threshold', type = int,
+                        help = 'Fail the conversions at once after the number of consecutive connection errors or 5xx responses until a probe request succeeds.')
+    parser.add_argument('-reset-timeout', type = float, default = 30.0,
+                        help = 'The seconds before the first probe request after the failures. Default is 30.')
+    args = parser.parse_args(argv)
+
+    limiter = None
+    if args.rate is not None or args.concurrency is not None:
+        limiter = RateLimiter(args.rate, args.burst, args.concurrency)
+    breaker = None
+    if args.failure_threshold is not None:
+        breaker = CircuitBreaker(args.failure_threshold, args.reset_timeout)
+    worker = Worker(args.socket, limiter, breaker)
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.close())
+    sys.stderr.write('Listening on {}\n'.format(worker.path))
+    try:
+        worker.serve()
+    except KeyboardInterrupt:
+        pass
+
+def main(argv, converter_known = False):
+    """Runs the command line in the worker if it runs, otherwise in this process."""
+    if argv and argv[0] == 'worker':
+        return run_worker(argv[1:])
+    status = forward_to_worker(argv, converter_known)
+    if status is None:
+        run_cli(argv, converter_known)
+    elif status:
+        sys.exit(status)
 
 if __name__ == "__main__":
     main(sys.argv[1:])
@@ -0,0 +1,1656 @@
+# Copyright (C) 2009-2018 pdfcrowd.com
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Asyncio clients for the PDFCrowd API (Python 3.7+).
+
+The converter classes accept the same options as their counterparts in
+the pdfcrowd module. The conversion methods are coroutines and the
+convert*ToIterator methods return async iterators over the output.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import os
+import re
+import weakref
+
+import pdfcrowd
+from pdfcrowd import (
+    Error, MultipartBody, MULTIPART_BOUNDARY, CHUNK_SIZE,
+    create_invalid_value_message, get_utf8_string, read_file_chunks)
+
+__version__ = pdfcrowd.__version__
+
+# the maximum number of output chunks buffered by the iterators
+ITERATOR_QUEUE_SIZE = 16
+
+async def write_stream(out_stream, data):
+    result = out_stream.write(data)
+    if inspect.isawaitable(result):
+        await result
+
+async def read_stream(in_stream):
+    data = in_stream.read()
+    if inspect.isawaitable(data):
+        data = await data
+    return data
+
+class QueueStream:
+    """Output stream feeding chunks to an asyncio queue."""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    async def write(self, data):
+        await self.queue.put(data)
+
+async def iterate(helper, convert):
+    """Runs convert(out_stream) and yields the chunks written to out_stream.
+
+    The result of the conversion is passed to the iterating task.
+    """
+    queue = asyncio.Queue(ITERATOR_QUEUE_SIZE)
+
+    async def run():
+        try:
+            await convert(QueueStream(queue))
+        except asyncio.CancelledError:
+            raise
+        except BaseException:
+            await queue.put(None)
+            raise
+        await queue.put(None)
+        return helper._get_result()
+
+    task = asyncio.ensure_future(run())
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        helper._set_result(await task)
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def run_conversion(converter, conversion):
+    """Awaits the conversion and returns its ConversionResult, so that the
+    result of a conversion run in another task reaches the caller."""
+    await conversion
+    return converter.helper._get_result()
+
+async def convert_many(converter, sources, jobs):
+    """Yields (source, task) pairs in the order of completion, the tasks
+    resolve to the ConversionResult objects.
+
+    Sources are consumed lazily, at most jobs conversions are in flight.
+    """
+    async def convert(source):
+        await pdfcrowd.convert_source(converter, source)
+        return converter.helper._get_result()
+
+    sources = iter(sources)
+    pending = {}
+    try:
+        while True:
+            for source in sources:
+                pending[asyncio.ensure_future(convert(source))] = source
+                if len(pending) >= jobs:
+                    break
+            if not pending:
+                return
+            done = (await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))[0]
+            for task in done:
+                yield pending.pop(task), task
+    finally:
+        for task in pending:
+            task.cancel()
+
+class SingleFlight:
+    """Shares one conversion among the tasks requesting it at the same time."""
+
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key, fn):
+        """Returns (value, True) to the task which awaited fn(), the tasks
+        waiting for it get (value, False) or the error raised by fn().
+
+        If the task awaiting fn() is cancelled, a waiting task takes over
+        and awaits fn() itself, the cancellation is not passed on.
+        """
+        key = (asyncio.get_event_loop(), key)
+        while True:
+            future = self.calls.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future), False
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # this task was cancelled
+                    raise
+
+        future = self.calls[key] = asyncio.get_event_loop().create_future()
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # nobody may be waiting for the error
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self.calls[key]
+        return value, True
+
+class Connection:
+    """HTTP/1.1 connection built on asyncio streams."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.loop = asyncio.get_event_loop()
+
+    def close(self):
+        if self.loop.is_closed():
+            # the transport can't close without its loop, the socket is
+            # closed when the transport is collected
+            sock = self.writer.get_extra_info('socket')
+            if sock is not None:
+                pdfcrowd.shutdown_socket(sock)
+            return
+        self.writer.close()
+
+    def abort(self):
+        """Drops the connection, can be called from any thread."""
+        self.loop.call_soon_threadsafe(self.writer.transport.abort)
+
+    def is_closing(self):
+        return self.writer.is_closing() or self.reader.at_eof()
+
+class Response:
+    """Response read from a Connection, a subset of HTTPResponse."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.version = None
+        self.status = None
+        self.headers = {}
+        self.length = None
+        self.chunked = False
+        self.chunk_left = 0
+        self.will_close = False
+
+    async def read_head(self):
+        """Reads the status line and headers of a response, including an
+        interim one."""
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionResetError('Remote end closed connection without response')
+        self.version, status = line.split(None, 2)[:2]
+        self.status = int(status)
+        self.headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, value = line.decode('latin-1').split(':', 1)
+            self.headers[name.strip().lower()] = value.strip()
+
+    async def begin(self):
+        # skip interim responses
+        while self.status is None or self.status < 200:
+            await self.read_head()
+
+        connection = self.headers.get('connection', '').lower()
+        self.will_close = self.version != b'HTTP/1.1' or connection == 'close'
+        if self.headers.get('transfer-encoding', '').lower() == 'chunked':
+            self.chunked = True
+        elif 'content-length' in self.headers:
+            self.length = int(self.headers['content-length'])
+        else:
+            self.will_close = True
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    def getheaders(self):
+        return list(self.headers.items())
+
+    async def read(self, amt=None):
+        if amt is None:
+            data = []
+            while True:
+                chunk = await self.read(CHUNK_SIZE)
+                if not chunk:
+                    return b''.join(data)
+                data.append(chunk)
+
+        if self.chunked:
+            if self.chunk_left is None:
+                return b''
+            if not self.chunk_left:
+                line = await self.reader.readline()
+                self.chunk_left = int(line.split(b';', 1)[0], 16)
+                if not self.chunk_left:
+                    # skip trailers
+                    while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    self.chunk_left = None
+                    return b''
+            data = await self.reader.readexactly(min(amt, self.chunk_left))
+            self.chunk_left -= len(data)
+            if not self.chunk_left:
+                await self.reader.readexactly(2)
+            return data
+
+        if self.length is None:
+            return await self.reader.read(amt)
+        if not self.length:
+            return b''
+        data = await self.reader.readexactly(min(amt, self.length))
+        self.length -= len(data)
+        return data
+
+class ConnectionPool(pdfcrowd.ConnectionPool):
+    """Pool of idle keep-alive connections of the running event loop.
+
+    The connections of closed event loops are dropped, e.g. after
+    asyncio.run() returns.
+    """
+
+    def acquire(self, key):
+        self._drop_closed_loops()
+        key = (asyncio.get_event_loop(), key)
+        while True:
+            conn = pdfcrowd.ConnectionPool.acquire(self, key)
+            if conn is None or not conn.is_closing():
+                return conn
+            conn.close()
+
+    def release(self, key, conn):
+        self._drop_closed_loops()
+        if not conn.is_closing():
+            key = (asyncio.get_event_loop(), key)
+            with self.lock:
+                conns = self.idle.setdefault(key, [])
+                if len(conns) < self.max_per_host:
+                    conns.append((conn, pdfcrowd._monotonic()))
+                    return
+        conn.close()
+
+    def _drop_closed_loops(self):
+        closed = []
+        with self.lock:
+            for key in list(self.idle):
+                if key[0].is_closed():
+                    closed.extend(conn for conn, idle in self.idle.pop(key))
+        for conn in closed:
+            conn.close()
+
+# the pool shared by all asyncio converter classes
+connection_pool = ConnectionPool()
+
+# the results of the last conversions of the helpers in the current context,
+# one variable for all helpers as the contexts keep their variables
+_results = contextvars.ContextVar('results', default=weakref.WeakKeyDictionary())
+
+class ConnectionHelper(pdfcrowd.ConnectionHelper):
+    def __init__(self, user_name, api_key):
+        pdfcrowd.ConnectionHelper.__init__(self, user_name, api_key)
+        self.setConnectionPool(connection_pool)
+
+    # the result of the last conversion is kept per task
+    def _get_result(self):
+        return _results.get().get(self, pdfcrowd._EMPTY_RESULT)
+
+    def _set_result(self, result):
+        results = weakref.WeakKeyDictionary(_results.get())
+        results[self] = result
+        _results.set(results)
+
+    async def post(self, fields, files, raw_data, out_stream = None):
+        if self.cache is not None or self.single_flight is not None:
+            return await self._post_shared(fields, files, raw_data, out_stream)
+        body = MultipartBody(fields, files, raw_data, self.asset_cache,
+                             self.template)
+        content_type = 'multipart/form-data; boundary=' + MULTIPART_BOUNDARY
+        return await self._do_post(body, content_type, out_stream)
+
+    # hashing the inputs and the cache access block, so they run in
+    # the default executor
+    async def _post_shared(self, fields, files, raw_data, out_stream):
+        loop = asyncio.get_event_loop()
+        key = await loop.run_in_executor(
+            None, pdfcrowd.create_cache_key, self.user_name,
+            self.converter_version, fields, files, raw_data, self.asset_cache)
+        entry = None
+        if self.cache is not None:
+            entry = await loop.run_in_executor(None, self.cache.get, key)
+        if entry is None:
+            fetch = lambda: self._fetch(key, fields, files, raw_data, out_stream)
+            if self.single_flight is None:
+                entry, fetched = await fetch(), True
+            else:
+                entry, fetched = await self.single_flight.do(key, fetch)
+            if fetched:
+                return out_stream if out_stream else entry[0]
+
+        output = self._set_shared_result(entry, out_stream)
+        if out_stream:
+            await write_stream(out_stream, output)
+            return out_stream
+        return output
+
+    async def _fetch(self, key, fields, files, raw_data, out_stream):
+        body = MultipartBody(fields, files, raw_data, self.asset_cache,
+                             self.template)
+        content_type = 'multipart/form-data; boundary=' + MULTIPART_BOUNDARY
+        if out_stream:
+            tee = pdfcrowd.TeeStream(out_stream)
+            await self._do_post(body, content_type, tee)
+            output = tee.getvalue()
+        else:
+            output = await self._do_post(body, content_type)
+        headers = self._get_result().headers
+        if self.cache is not None:
+            await asyncio.get_event_loop().run_in_executor(
+                None, self.cache.put, key, output, headers, 'url' in fields)
+        return output, headers
+
+    async def _create_connection(self, host, port):
+        kwargs = {}
+        if not self.use_http:
+            kwargs['ssl'] = self._get_ssl_context(host)
+        reader, writer = await asyncio.open_connection(host, port, **kwargs)
+        return Connection(reader, writer)
+
+    def _get_host_header(self):
+        if self.port == (80 if self.use_http else 443):
+            return pdfcrowd.HOST
+        return '{}:{}'.format(pdfcrowd.HOST, self.port)
+
+    # sends a POST to the API
+    async def _do_post(self, body, content_type, out_stream=None):
+        if not self.use_http and self.proxy_host:
+            raise Error('HTTPS over a proxy is not supported.')
+
+        self._set_result(pdfcrowd._EMPTY_RESULT)
+
+        # the deadline covers all attempts
+        deadline = None
+        if self.deadline is not None:
+            deadline = pdfcrowd._monotonic() + self.deadline
+
+        # the estimated credits are reserved until the conversion finishes,
+        # the tracker is polled not to block the event loop
+        tracker = self.credit_tracker
+        if tracker is not None:
+            cost = None
+            while True:
+                self._check_interrupted(deadline)
+                cost = tracker.acquire(0)
+                if cost is not None:
+                    break
+                await self._sleep(pdfcrowd.WAIT_INTERVAL)
+
+        # the body is sent again from its sources, files are reread
+        retry = 0
+        delay = 0
+        try:
+            while True:
+                self._check_interrupted(deadline)
+                try:
+                    output = await self._exec_request(body, content_type, out_stream, deadline)
+                except Error as err:
+                    if self.retry_count > retry:
+                        delay = self.retry_policy.getDelay(err, delay)
+                        if delay is not None and \
+                           (deadline is None or pdfcrowd._monotonic() + delay < deadline):
+                            retry += 1
+                            await self._sleep(delay)
+                            continue
+                    raise
+                self.retry_policy.recordSuccess()
+                break
+        except BaseException:
+            if tracker is not None:
+                tracker.release(cost, self._get_result(), False)
+            raise
+        if tracker is not None:
+            tracker.release(cost, self._get_result(), True)
+        return output
+
+    # sleeps until the delay passes or the conversion is cancelled
+    async def _sleep(self, delay):
+        loop = asyncio.get_event_loop()
+        cancelled = asyncio.Event()
+        key = object()
+        if self.cancellation_token.register(
+                key, lambda: loop.call_soon_threadsafe(cancelled.set)):
+            try:
+                await asyncio.wait_for(cancelled.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.cancellation_token.unregister(key)
+
+    async def _wait(self, aw, timeout):
+        if timeout is None:
+            return await aw
+        return await asyncio.wait_for(aw, timeout)
+
+    async def _send_request(self, conn, body, content_type, expect=False):
+        head = ['POST {} HTTP/1.1'.format(self._get_request_target()),
+                'Host: {}'.format(self._get_host_header()),
+                'Accept-Encoding: identity']
+        for name, value in self._get_request_headers(body, content_type):
+            head.append('{}: {}'.format(name, value))
+        if expect:
+            head.append('Expect: 100-continue')
+        head += ['', '']
+        conn.writer.write('\r\n'.join(head).encode('latin-1'))
+        if not expect:
+            await self._send_body(conn, body)
+        return Response(conn.reader)
+
+    async def _send_body(self, conn, body):
+        writer = conn.writer
+        loop = asyncio.get_event_loop()
+        for part in body.parts:
+            if isinstance(part, tuple):
+                await self._send_file(loop, writer, *part)
+            elif part:
+                writer.write(part)
+                await writer.drain()
+        await writer.drain()
+
+    async def _send_file(self, loop, writer, file_name, size):
+        if hasattr(loop, 'sendfile') and size:
+            await writer.drain()
+            with open(file_name, 'rb') as f:
+                if await loop.sendfile(writer.transport, f, 0, size) == size:
+                    return
+            raise Error('The file {} was changed during the upload.'.format(file_name))
+        for chunk in read_file_chunks(file_name, size):
+            writer.write(chunk)
+            await writer.drain()
+
+    async def _exec_request(self, body, content_type, out_stream, deadline):
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return await self._exec_limited_request(body, content_type, out_stream, deadline)
+        probe = breaker.acquire()
+        try:
+            output = await self._exec_limited_request(body, content_type, out_stream, deadline)
+        except Error as err:
+            breaker.release(probe, err)
+            raise
+        except BaseException:
+            breaker.release(probe, finished=False)
+            raise
+        breaker.release(probe)
+        return output
+
+    async def _exec_limited_request(self, body, content_type, out_stream, deadline):
+        limiter = self.rate_limiter
+        if limiter is None:
+            return await self._exec_attempt(body, content_type, out_stream, deadline)
+        # the limiter is polled not to block the event loop
+        while True:
+            self._check_interrupted(deadline)
+            wait = limiter.tryAcquire()
+            if wait is None:
+                break
+            await self._sleep(min(wait or pdfcrowd.WAIT_INTERVAL,
+                                  pdfcrowd.WAIT_INTERVAL))
+        started = pdfcrowd._monotonic()
+        try:
+            output = await self._exec_attempt(body, content_type, out_stream, deadline)
+        except Error as err:
+            limiter.release(err, pdfcrowd._monotonic() - started)
+            raise
+        except BaseException:
+            limiter.release()
+            raise
+        limiter.release(None, pdfcrowd._monotonic() - started)
+        return output
+
+    async def _exec_attempt(self, body, content_type, out_stream, deadline):
+        try:
+            return await self._exec_pooled_request(body, content_type, out_stream, deadline)
+        except pdfcrowd._SendError as err:
+            self._check_interrupted(deadline)
+            error = self._create_error(err.error)
+            error._connection_reset = \
+                isinstance(err.error, (asyncio.IncompleteReadError, ConnectionError))
+            raise error
+        except asyncio.TimeoutError:
+            self._check_interrupted(deadline)
+            error = Error('timed out')
+            error._connection_error = True
+            raise error
+        except (asyncio.IncompleteReadError, OSError, ValueError) as err:
+            self._check_interrupted(deadline)
+            raise self._create_error(err)
+
+    # uploads the request and waits for the response headers
+    async def _start_request(self, conn, body, content_type, deadline):
+        if not self.cancellation_token.register(conn, conn.abort):
+            raise Error('The conversion was cancelled.')
+        expect = self._expects_continue(body)
+        response = await self._wait(self._send_request(conn, body, content_type, expect),
+                                    self._get_timeout(None, deadline))
+        rejected = False
+        if expect:
+            # the body is sent after a 100 response or when none comes in time
+            head = asyncio.ensure_future(response.read_head())
+            try:
+                await asyncio.wait([head], timeout=self._get_timeout(
+                    self.expect_continue_timeout, deadline))
+                rejected = head.done() and not head.exception() and response.status >= 200
+                if not rejected:
+                    await self._wait(self._send_body(conn, body),
+                                     self._get_timeout(None, deadline))
+                await self._wait(head, self._get_timeout(self.read_timeout, deadline))
+            finally:
+                head.cancel()
+        await self._wait(response.begin(),
+                         self._get_timeout(self.read_timeout, deadline))
+        if rejected:
+            # the connection can't be reused, the server waits for the body
+            response.will_close = True
+        return response
+
+    async def _exec_pooled_request(self, body, content_type, out_stream, deadline):
+        key = self._get_connection_key()
+        conn = self.pool.acquire(key)
+        response = None
+        if conn:
+            try:
+                response = await self._start_request(conn, body, content_type, deadline)
+            except asyncio.TimeoutError:
+                self._close_connection(conn)
+                raise
+            except (asyncio.IncompleteReadError, OSError):
+                # the server has closed the idle connection, retry once
+                # with a new one
+                self._close_connection(conn)
+            except:
+                self._close_connection(conn)
+                raise
+        if response is None:
+            try:
+                conn = await self._wait(
+                    self._create_connection(key[1], key[2]),
+                    self._get_timeout(self.connect_timeout, deadline))
+            except asyncio.TimeoutError:
+                raise
+            except (asyncio.IncompleteReadError, OSError) as err:
+                raise pdfcrowd._SendError(err)
+            try:
+                response = await self._start_request(conn, body, content_type, deadline)
+            except asyncio.TimeoutError:
+                self._close_connection(conn)
+                raise
+            except (asyncio.IncompleteReadError, OSError) as err:
+                self._close_connection(conn)
+                raise pdfcrowd._SendError(err)
+            except:
+                self._close_connection(conn)
+                raise
+        try:
+            output = None
+            if response.status > 299:
+                error = Error(await self._wait(
+                    response.read(),
+                    self._get_timeout(self.read_timeout, deadline)), response.status)
+                error._retry_after = response.getheader('Retry-After')
+            else:
+                error = None
+                if out_stream:
+                    while True:
+                        data = await self._wait(
+                            response.read(16384),
+                            self._get_timeout(self.read_timeout, deadline))
+                        if data:
+                            await write_stream(out_stream, data)
+                        else:
+                            break
+                elif self.read_timeout is not None or deadline is not None:
+                    chunks = []
+                    while True:
+                        data = await self._wait(
+                            response.read(16384),
+                            self._get_timeout(self.read_timeout, deadline))
+                        if not data:
+                            break
+                        chunks.append(data)
+                    output = b''.join(chunks)
+                else:
+                    output = await response.read()
+            # a cancelled download can end without an error
+            if self.cancellation_token.isCancelled():
+                raise Error('The conversion was cancelled.')
+        except:
+            self._close_connection(conn)
+            raise
+
+        self._release_connection(key, conn, response)
+        self._set_result(self._create_result(response, output))
+        if error is not None:
+            raise error
+        return out_stream if out_stream else output
+
+# generated code
+
+class HtmlToPdfClient(pdfcrowd.HtmlToPdfClient):
+    """Conversion from HTML to PDF with asyncio."""
+
+    def __init__(self, user_name, api_key):
+        pdfcrowd.HtmlToPdfClient.__init__(self, user_name, api_key)
+        self.helper = ConnectionHelper(user_name, api_key)
+
+    async def convertUrl(self, url):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_url"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrl", "html-to-pdf", 'Supported protocols are http:// and https://.', "convert_url"), 470);
+        
+        return await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
+
+    async def convertUrlToStream(self, url, out_stream):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_url_to_stream"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "html-to-pdf", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
+
+    async def convertUrlToFile(self, url, file_path):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_url_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertUrlToFile::file_path", "html-to-pdf", 'The string must not be empty.', "convert_url_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertUrlToStream(url, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertFile(self, file):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_file"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFile", "html-to-pdf", 'The file must exist and not be empty.', "convert_file"), 470);
+        
+        return await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
+
+    async def convertFileToStream(self, file, out_stream):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_file_to_stream"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFileToStream::file", "html-to-pdf", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
+        
+        await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
+
+    async def convertFileToFile(self, file, file_path):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_file_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertFileToFile::file_path", "html-to-pdf", 'The string must not be empty.', "convert_file_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertFileToStream(file, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertString(self, text):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_string"""
+        if not (text):
+            raise Error(create_invalid_value_message(text, "convertString", "html-to-pdf", 'The string must not be empty.', "convert_string"), 470);
+        
+        return await self.helper.post(dict(self.fields, text=get_utf8_string(text)), self.files, self.raw_data)
+
+    async def convertStringToStream(self, text, out_stream):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_string_to_stream"""
+        if not (text):
+            raise Error(create_invalid_value_message(text, "convertStringToStream::text", "html-to-pdf", 'The string must not be empty.', "convert_string_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, text=get_utf8_string(text)), self.files, self.raw_data, out_stream)
+
+    async def convertStringToFile(self, text, file_path):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_string_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStringToFile::file_path", "html-to-pdf", 'The string must not be empty.', "convert_string_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStringToStream(text, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertStream(self, in_stream):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_stream"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)))
+
+    async def convertStreamToStream(self, in_stream, out_stream):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_stream_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)), out_stream)
+
+    async def convertStreamToFile(self, in_stream, file_path):
+        """https://pdfcrowd.com/api/html-to-pdf-python/ref/#convert_stream_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStreamToFile::file_path", "html-to-pdf", 'The string must not be empty.', "convert_stream_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStreamToStream(in_stream, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    def convertUrlToIterator(self, url):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertUrlToStream(url, out_stream))
+
+    def convertFileToIterator(self, file):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertFileToStream(file, out_stream))
+
+    def convertStringToIterator(self, text):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStringToStream(text, out_stream))
+
+    def convertStreamToIterator(self, in_stream):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStreamToStream(in_stream, out_stream))
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a task and return the task resolving to the ConversionResult."""
+        return asyncio.ensure_future(run_conversion(self, getattr(self, method)(*args)))
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources concurrently and yield (source, task) pairs as the conversions finish. The tasks resolve to the ConversionResult objects."""
+        return convert_many(self, sources, jobs or self.batch.jobs)
+
+
+class HtmlToImageClient(pdfcrowd.HtmlToImageClient):
+    """Conversion from HTML to image with asyncio."""
+
+    def __init__(self, user_name, api_key):
+        pdfcrowd.HtmlToImageClient.__init__(self, user_name, api_key)
+        self.helper = ConnectionHelper(user_name, api_key)
+
+    async def convertUrl(self, url):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_url"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrl", "html-to-image", 'Supported protocols are http:// and https://.', "convert_url"), 470);
+        
+        return await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
+
+    async def convertUrlToStream(self, url, out_stream):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_url_to_stream"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "html-to-image", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
+
+    async def convertUrlToFile(self, url, file_path):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_url_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertUrlToFile::file_path", "html-to-image", 'The string must not be empty.', "convert_url_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertUrlToStream(url, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertFile(self, file):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_file"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFile", "html-to-image", 'The file must exist and not be empty.', "convert_file"), 470);
+        
+        return await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
+
+    async def convertFileToStream(self, file, out_stream):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_file_to_stream"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFileToStream::file", "html-to-image", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
+        
+        await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
+
+    async def convertFileToFile(self, file, file_path):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_file_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertFileToFile::file_path", "html-to-image", 'The string must not be empty.', "convert_file_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertFileToStream(file, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertString(self, text):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_string"""
+        if not (text):
+            raise Error(create_invalid_value_message(text, "convertString", "html-to-image", 'The string must not be empty.', "convert_string"), 470);
+        
+        return await self.helper.post(dict(self.fields, text=get_utf8_string(text)), self.files, self.raw_data)
+
+    async def convertStringToStream(self, text, out_stream):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_string_to_stream"""
+        if not (text):
+            raise Error(create_invalid_value_message(text, "convertStringToStream::text", "html-to-image", 'The string must not be empty.', "convert_string_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, text=get_utf8_string(text)), self.files, self.raw_data, out_stream)
+
+    async def convertStringToFile(self, text, file_path):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_string_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStringToFile::file_path", "html-to-image", 'The string must not be empty.', "convert_string_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStringToStream(text, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertStream(self, in_stream):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_stream"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)))
+
+    async def convertStreamToStream(self, in_stream, out_stream):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_stream_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)), out_stream)
+
+    async def convertStreamToFile(self, in_stream, file_path):
+        """https://pdfcrowd.com/api/html-to-image-python/ref/#convert_stream_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStreamToFile::file_path", "html-to-image", 'The string must not be empty.', "convert_stream_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStreamToStream(in_stream, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    def convertUrlToIterator(self, url):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertUrlToStream(url, out_stream))
+
+    def convertFileToIterator(self, file):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertFileToStream(file, out_stream))
+
+    def convertStringToIterator(self, text):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStringToStream(text, out_stream))
+
+    def convertStreamToIterator(self, in_stream):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStreamToStream(in_stream, out_stream))
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a task and return the task resolving to the ConversionResult."""
+        return asyncio.ensure_future(run_conversion(self, getattr(self, method)(*args)))
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources concurrently and yield (source, task) pairs as the conversions finish. The tasks resolve to the ConversionResult objects."""
+        return convert_many(self, sources, jobs or self.batch.jobs)
+
+
+class ImageToImageClient(pdfcrowd.ImageToImageClient):
+    """Conversion from one image format to another image format with asyncio."""
+
+    def __init__(self, user_name, api_key):
+        pdfcrowd.ImageToImageClient.__init__(self, user_name, api_key)
+        self.helper = ConnectionHelper(user_name, api_key)
+
+    async def convertUrl(self, url):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_url"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrl", "image-to-image", 'Supported protocols are http:// and https://.', "convert_url"), 470);
+        
+        return await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
+
+    async def convertUrlToStream(self, url, out_stream):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_url_to_stream"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "image-to-image", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
+
+    async def convertUrlToFile(self, url, file_path):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_url_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertUrlToFile::file_path", "image-to-image", 'The string must not be empty.', "convert_url_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertUrlToStream(url, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertFile(self, file):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_file"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFile", "image-to-image", 'The file must exist and not be empty.', "convert_file"), 470);
+        
+        return await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
+
+    async def convertFileToStream(self, file, out_stream):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_file_to_stream"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFileToStream::file", "image-to-image", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
+        
+        await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
+
+    async def convertFileToFile(self, file, file_path):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_file_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertFileToFile::file_path", "image-to-image", 'The string must not be empty.', "convert_file_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertFileToStream(file, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertRawData(self, data):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_raw_data"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
+
+    async def convertRawDataToStream(self, data, out_stream):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_raw_data_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
+
+    async def convertRawDataToFile(self, data, file_path):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_raw_data_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertRawDataToFile::file_path", "image-to-image", 'The string must not be empty.', "convert_raw_data_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertRawDataToStream(data, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertStream(self, in_stream):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_stream"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)))
+
+    async def convertStreamToStream(self, in_stream, out_stream):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_stream_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)), out_stream)
+
+    async def convertStreamToFile(self, in_stream, file_path):
+        """https://pdfcrowd.com/api/image-to-image-python/ref/#convert_stream_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStreamToFile::file_path", "image-to-image", 'The string must not be empty.', "convert_stream_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStreamToStream(in_stream, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    def convertUrlToIterator(self, url):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertUrlToStream(url, out_stream))
+
+    def convertFileToIterator(self, file):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertFileToStream(file, out_stream))
+
+    def convertRawDataToIterator(self, data):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertRawDataToStream(data, out_stream))
+
+    def convertStreamToIterator(self, in_stream):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStreamToStream(in_stream, out_stream))
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a task and return the task resolving to the ConversionResult."""
+        return asyncio.ensure_future(run_conversion(self, getattr(self, method)(*args)))
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources concurrently and yield (source, task) pairs as the conversions finish. The tasks resolve to the ConversionResult objects."""
+        return convert_many(self, sources, jobs or self.batch.jobs)
+
+
+class PdfToPdfClient(pdfcrowd.PdfToPdfClient):
+    """Conversion from PDF to PDF with asyncio."""
+
+    def __init__(self, user_name, api_key):
+        pdfcrowd.PdfToPdfClient.__init__(self, user_name, api_key)
+        self.helper = ConnectionHelper(user_name, api_key)
+
+    async def convert(self):
+        """https://pdfcrowd.com/api/pdf-to-pdf-python/ref/#convert"""
+        return await self.helper.post(self.fields, self.files, self.raw_data)
+
+    async def convertToStream(self, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-pdf-python/ref/#convert_to_stream"""
+        await self.helper.post(self.fields, self.files, self.raw_data, out_stream)
+
+    async def convertToFile(self, file_path):
+        """https://pdfcrowd.com/api/pdf-to-pdf-python/ref/#convert_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertToFile", "pdf-to-pdf", 'The string must not be empty.', "convert_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        await self.convertToStream(output_file)
+        output_file.close()
+
+    def convertToIterator(self):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertToStream(out_stream))
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a task and return the task resolving to the ConversionResult."""
+        return asyncio.ensure_future(run_conversion(self, getattr(self, method)(*args)))
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources concurrently and yield (source, task) pairs as the conversions finish. The tasks resolve to the ConversionResult objects."""
+        return convert_many(self, sources, jobs or self.batch.jobs)
+
+
+class ImageToPdfClient(pdfcrowd.ImageToPdfClient):
+    """Conversion from an image to PDF with asyncio."""
+
+    def __init__(self, user_name, api_key):
+        pdfcrowd.ImageToPdfClient.__init__(self, user_name, api_key)
+        self.helper = ConnectionHelper(user_name, api_key)
+
+    async def convertUrl(self, url):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_url"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrl", "image-to-pdf", 'Supported protocols are http:// and https://.', "convert_url"), 470);
+        
+        return await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
+
+    async def convertUrlToStream(self, url, out_stream):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_url_to_stream"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "image-to-pdf", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
+
+    async def convertUrlToFile(self, url, file_path):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_url_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertUrlToFile::file_path", "image-to-pdf", 'The string must not be empty.', "convert_url_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertUrlToStream(url, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertFile(self, file):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_file"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFile", "image-to-pdf", 'The file must exist and not be empty.', "convert_file"), 470);
+        
+        return await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
+
+    async def convertFileToStream(self, file, out_stream):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_file_to_stream"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFileToStream::file", "image-to-pdf", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
+        
+        await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
+
+    async def convertFileToFile(self, file, file_path):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_file_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertFileToFile::file_path", "image-to-pdf", 'The string must not be empty.', "convert_file_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertFileToStream(file, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertRawData(self, data):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_raw_data"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
+
+    async def convertRawDataToStream(self, data, out_stream):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_raw_data_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
+
+    async def convertRawDataToFile(self, data, file_path):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_raw_data_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertRawDataToFile::file_path", "image-to-pdf", 'The string must not be empty.', "convert_raw_data_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertRawDataToStream(data, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertStream(self, in_stream):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_stream"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)))
+
+    async def convertStreamToStream(self, in_stream, out_stream):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_stream_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)), out_stream)
+
+    async def convertStreamToFile(self, in_stream, file_path):
+        """https://pdfcrowd.com/api/image-to-pdf-python/ref/#convert_stream_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStreamToFile::file_path", "image-to-pdf", 'The string must not be empty.', "convert_stream_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStreamToStream(in_stream, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    def convertUrlToIterator(self, url):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertUrlToStream(url, out_stream))
+
+    def convertFileToIterator(self, file):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertFileToStream(file, out_stream))
+
+    def convertRawDataToIterator(self, data):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertRawDataToStream(data, out_stream))
+
+    def convertStreamToIterator(self, in_stream):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStreamToStream(in_stream, out_stream))
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a task and return the task resolving to the ConversionResult."""
+        return asyncio.ensure_future(run_conversion(self, getattr(self, method)(*args)))
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources concurrently and yield (source, task) pairs as the conversions finish. The tasks resolve to the ConversionResult objects."""
+        return convert_many(self, sources, jobs or self.batch.jobs)
+
+
+class PdfToHtmlClient(pdfcrowd.PdfToHtmlClient):
+    """Conversion from PDF to HTML with asyncio."""
+
+    def __init__(self, user_name, api_key):
+        pdfcrowd.PdfToHtmlClient.__init__(self, user_name, api_key)
+        self.helper = ConnectionHelper(user_name, api_key)
+
+    async def convertUrl(self, url):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_url"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrl", "pdf-to-html", 'Supported protocols are http:// and https://.', "convert_url"), 470);
+        
+        return await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
+
+    async def convertUrlToStream(self, url, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_url_to_stream"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "pdf-to-html", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
+
+    async def convertUrlToFile(self, url, file_path):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_url_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertUrlToFile::file_path", "pdf-to-html", 'The string must not be empty.', "convert_url_to_file"), 470);
+        
+        if not (self._isOutputTypeValid(file_path)):
+            raise Error(create_invalid_value_message(file_path, "convertUrlToFile::file_path", "pdf-to-html", 'The converter generates an HTML or ZIP file. If ZIP file is generated, the file path must have a ZIP or zip extension.', "convert_url_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertUrlToStream(url, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertFile(self, file):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_file"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFile", "pdf-to-html", 'The file must exist and not be empty.', "convert_file"), 470);
+        
+        return await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
+
+    async def convertFileToStream(self, file, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_file_to_stream"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFileToStream::file", "pdf-to-html", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
+        
+        await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
+
+    async def convertFileToFile(self, file, file_path):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_file_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertFileToFile::file_path", "pdf-to-html", 'The string must not be empty.', "convert_file_to_file"), 470);
+        
+        if not (self._isOutputTypeValid(file_path)):
+            raise Error(create_invalid_value_message(file_path, "convertFileToFile::file_path", "pdf-to-html", 'The converter generates an HTML or ZIP file. If ZIP file is generated, the file path must have a ZIP or zip extension.', "convert_file_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertFileToStream(file, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertRawData(self, data):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_raw_data"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
+
+    async def convertRawDataToStream(self, data, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_raw_data_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
+
+    async def convertRawDataToFile(self, data, file_path):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_raw_data_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertRawDataToFile::file_path", "pdf-to-html", 'The string must not be empty.', "convert_raw_data_to_file"), 470);
+        
+        if not (self._isOutputTypeValid(file_path)):
+            raise Error(create_invalid_value_message(file_path, "convertRawDataToFile::file_path", "pdf-to-html", 'The converter generates an HTML or ZIP file. If ZIP file is generated, the file path must have a ZIP or zip extension.', "convert_raw_data_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertRawDataToStream(data, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertStream(self, in_stream):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_stream"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)))
+
+    async def convertStreamToStream(self, in_stream, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_stream_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)), out_stream)
+
+    async def convertStreamToFile(self, in_stream, file_path):
+        """https://pdfcrowd.com/api/pdf-to-html-python/ref/#convert_stream_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStreamToFile::file_path", "pdf-to-html", 'The string must not be empty.', "convert_stream_to_file"), 470);
+        
+        if not (self._isOutputTypeValid(file_path)):
+            raise Error(create_invalid_value_message(file_path, "convertStreamToFile::file_path", "pdf-to-html", 'The converter generates an HTML or ZIP file. If ZIP file is generated, the file path must have a ZIP or zip extension.', "convert_stream_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStreamToStream(in_stream, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    def convertUrlToIterator(self, url):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertUrlToStream(url, out_stream))
+
+    def convertFileToIterator(self, file):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertFileToStream(file, out_stream))
+
+    def convertRawDataToIterator(self, data):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertRawDataToStream(data, out_stream))
+
+    def convertStreamToIterator(self, in_stream):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStreamToStream(in_stream, out_stream))
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a task and return the task resolving to the ConversionResult."""
+        return asyncio.ensure_future(run_conversion(self, getattr(self, method)(*args)))
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources concurrently and yield (source, task) pairs as the conversions finish. The tasks resolve to the ConversionResult objects."""
+        return convert_many(self, sources, jobs or self.batch.jobs)
+
+
+class PdfToTextClient(pdfcrowd.PdfToTextClient):
+    """Conversion from PDF to text with asyncio."""
+
+    def __init__(self, user_name, api_key):
+        pdfcrowd.PdfToTextClient.__init__(self, user_name, api_key)
+        self.helper = ConnectionHelper(user_name, api_key)
+
+    async def convertUrl(self, url):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_url"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrl", "pdf-to-text", 'Supported protocols are http:// and https://.', "convert_url"), 470);
+        
+        return await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
+
+    async def convertUrlToStream(self, url, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_url_to_stream"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "pdf-to-text", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
+
+    async def convertUrlToFile(self, url, file_path):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_url_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertUrlToFile::file_path", "pdf-to-text", 'The string must not be empty.', "convert_url_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertUrlToStream(url, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertFile(self, file):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_file"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFile", "pdf-to-text", 'The file must exist and not be empty.', "convert_file"), 470);
+        
+        return await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
+
+    async def convertFileToStream(self, file, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_file_to_stream"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFileToStream::file", "pdf-to-text", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
+        
+        await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
+
+    async def convertFileToFile(self, file, file_path):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_file_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertFileToFile::file_path", "pdf-to-text", 'The string must not be empty.', "convert_file_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertFileToStream(file, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertRawData(self, data):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_raw_data"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
+
+    async def convertRawDataToStream(self, data, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_raw_data_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
+
+    async def convertRawDataToFile(self, data, file_path):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_raw_data_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertRawDataToFile::file_path", "pdf-to-text", 'The string must not be empty.', "convert_raw_data_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertRawDataToStream(data, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertStream(self, in_stream):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_stream"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)))
+
+    async def convertStreamToStream(self, in_stream, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_stream_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)), out_stream)
+
+    async def convertStreamToFile(self, in_stream, file_path):
+        """https://pdfcrowd.com/api/pdf-to-text-python/ref/#convert_stream_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStreamToFile::file_path", "pdf-to-text", 'The string must not be empty.', "convert_stream_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStreamToStream(in_stream, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    def convertUrlToIterator(self, url):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertUrlToStream(url, out_stream))
+
+    def convertFileToIterator(self, file):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertFileToStream(file, out_stream))
+
+    def convertRawDataToIterator(self, data):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertRawDataToStream(data, out_stream))
+
+    def convertStreamToIterator(self, in_stream):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStreamToStream(in_stream, out_stream))
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a task and return the task resolving to the ConversionResult."""
+        return asyncio.ensure_future(run_conversion(self, getattr(self, method)(*args)))
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources concurrently and yield (source, task) pairs as the conversions finish. The tasks resolve to the ConversionResult objects."""
+        return convert_many(self, sources, jobs or self.batch.jobs)
+
+
+class PdfToImageClient(pdfcrowd.PdfToImageClient):
+    """Conversion from PDF to image with asyncio."""
+
+    def __init__(self, user_name, api_key):
+        pdfcrowd.PdfToImageClient.__init__(self, user_name, api_key)
+        self.helper = ConnectionHelper(user_name, api_key)
+
+    async def convertUrl(self, url):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_url"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrl", "pdf-to-image", 'Supported protocols are http:// and https://.', "convert_url"), 470);
+        
+        return await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data)
+
+    async def convertUrlToStream(self, url, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_url_to_stream"""
+        if not re.match(r'(?i)^https?://.*$', url):
+            raise Error(create_invalid_value_message(url, "convertUrlToStream::url", "pdf-to-image", 'Supported protocols are http:// and https://.', "convert_url_to_stream"), 470);
+        
+        await self.helper.post(dict(self.fields, url=get_utf8_string(url)), self.files, self.raw_data, out_stream)
+
+    async def convertUrlToFile(self, url, file_path):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_url_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertUrlToFile::file_path", "pdf-to-image", 'The string must not be empty.', "convert_url_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertUrlToStream(url, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertFile(self, file):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_file"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFile", "pdf-to-image", 'The file must exist and not be empty.', "convert_file"), 470);
+        
+        return await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data)
+
+    async def convertFileToStream(self, file, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_file_to_stream"""
+        if not (os.path.isfile(file) and os.path.getsize(file)):
+            raise Error(create_invalid_value_message(file, "convertFileToStream::file", "pdf-to-image", 'The file must exist and not be empty.', "convert_file_to_stream"), 470);
+        
+        await self.helper.post(self.fields, dict(self.files, file=get_utf8_string(file)), self.raw_data, out_stream)
+
+    async def convertFileToFile(self, file, file_path):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_file_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertFileToFile::file_path", "pdf-to-image", 'The string must not be empty.', "convert_file_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertFileToStream(file, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertRawData(self, data):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_raw_data"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data))
+
+    async def convertRawDataToStream(self, data, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_raw_data_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, file=data), out_stream)
+
+    async def convertRawDataToFile(self, data, file_path):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_raw_data_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertRawDataToFile::file_path", "pdf-to-image", 'The string must not be empty.', "convert_raw_data_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertRawDataToStream(data, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    async def convertStream(self, in_stream):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_stream"""
+        return await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)))
+
+    async def convertStreamToStream(self, in_stream, out_stream):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_stream_to_stream"""
+        await self.helper.post(self.fields, self.files, dict(self.raw_data, stream=await read_stream(in_stream)), out_stream)
+
+    async def convertStreamToFile(self, in_stream, file_path):
+        """https://pdfcrowd.com/api/pdf-to-image-python/ref/#convert_stream_to_file"""
+        if not (file_path):
+            raise Error(create_invalid_value_message(file_path, "convertStreamToFile::file_path", "pdf-to-image", 'The string must not be empty.', "convert_stream_to_file"), 470);
+        
+        output_file = open(file_path, 'wb')
+        try:
+            await self.convertStreamToStream(in_stream, output_file)
+            output_file.close()
+        except Error:
+            output_file.close()
+            os.remove(file_path)
+            raise
+
+    def convertUrlToIterator(self, url):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertUrlToStream(url, out_stream))
+
+    def convertFileToIterator(self, file):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertFileToStream(file, out_stream))
+
+    def convertRawDataToIterator(self, data):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertRawDataToStream(data, out_stream))
+
+    def convertStreamToIterator(self, in_stream):
+        """Returns an async iterator over the output chunks."""
+        return iterate(self.helper, lambda out_stream: self.convertStreamToStream(in_stream, out_stream))
+
+    def submit(self, method, *args):
+        """Run the conversion method with the arguments in a task and return the task resolving to the ConversionResult."""
+        return asyncio.ensure_future(run_conversion(self, getattr(self, method)(*args)))
+
+    def convertMany(self, sources, jobs=None):
+        """Convert the sources concurrently and yield (source, task) pairs as the conversions finish. The tasks resolve to the ConversionResult objects."""
+        return convert_many(self, sources, jobs or self.batch.jobs)
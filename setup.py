@@ -23,12 +23,16 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
+import sys
+
 try:
     from setuptools import setup
 except ImportError:
     from distutils.core import setup
 
 py_modules=['pdfcrowd']
+if sys.version_info >= (3, 7):
+    py_modules.append('pdfcrowd_async')
 
 setup(name='pdfcrowd',
       version='6.5.4',
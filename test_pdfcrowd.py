@@ -0,0 +1,1052 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2009-2018 pdfcrowd.com
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Behaviour tests of the client against a local HTTP server.
+
+Unlike tests.py, they don't use the PDFCrowd API:
+
+    python -m unittest test_pdfcrowd
+"""
+
+import collections
+import io
+import os
+import shutil
+import socket
+import ssl
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+import pdfcrowd
+
+PYTHON_3 = sys.version_info[0] >= 3
+
+try:
+    from concurrent import futures
+except ImportError:
+    # Python 2 without the futures backport
+    futures = None
+
+# the self-signed certificate and key of the TLS server
+CERTIFICATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_pdfcrowd.pem')
+
+def text_stream():
+    if PYTHON_3:
+        return io.StringIO()
+    import StringIO
+    return StringIO.StringIO()
+
+Request = collections.namedtuple('Request', ['path', 'headers', 'body', 'client'])
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections.append(self.connection)
+            self.server.resumed.append(getattr(self.connection, 'session_reused', None))
+
+    def handle_expect_100(self):
+        self.server.expects.append(self.headers.get('Content-Length'))
+        if self.server.reject is None:
+            return BaseHTTPRequestHandler.handle_expect_100(self)
+        status, body = self.server.reject
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = True
+        return False
+
+    def do_POST(self):
+        server = self.server
+        size = int(self.headers.get('Content-Length', 0))
+        chunks = []
+        while size > 0:
+            chunk = self.rfile.read(min(size, 65536))
+            if not chunk:
+                return
+            chunks.append(chunk)
+            size -= len(chunk)
+            if server.read_delay:
+                time.sleep(server.read_delay)
+        body = b''.join(chunks)
+        with server.lock:
+            server.requests.append(Request(self.path, dict(self.headers.items()),
+                                           body, self.client_address))
+            response = server.responses.pop(0) if server.responses else None
+            job_id = 'job{}'.format(len(server.requests))
+        if server.delay:
+            time.sleep(server.delay)
+        status, output, headers = response or (
+            200, b'%PDF-output-' + str(len(body)).encode(), {})
+        self.send_response(status)
+        all_headers = {'Content-Length': str(len(output)),
+                       'X-Pdfcrowd-Job-Id': job_id,
+                       'X-Pdfcrowd-Remaining-Credits': '1000',
+                       'X-Pdfcrowd-Consumed-Credits': '2',
+                       'X-Pdfcrowd-Pages': '3',
+                       'X-Pdfcrowd-Total-Pages': '3',
+                       'X-Pdfcrowd-Output-Size': str(len(output))}
+        all_headers.update(headers)
+        for name, value in all_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(output)
+
+class ApiServer(ThreadingMixIn, HTTPServer):
+    """The API server answering every conversion with the size of its body.
+
+    responses -- (status, output, headers) of the next requests
+    delay -- seconds before a response is sent
+    read_delay -- seconds after each 64 kB of the request body read
+    reject -- (status, body) rejecting the requests expecting 100-continue
+
+    The connections use TLS if tls is True, resumed records whether they
+    resumed a TLS session.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, tls = False):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), Handler)
+        self.context = None
+        if tls:
+            self.context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23))
+            self.context.load_cert_chain(CERTIFICATE)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.responses = []
+        self.expects = []
+        self.delay = 0
+        self.read_delay = 0
+        self.reject = None
+        self.connections = []
+        self.resumed = []
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.05,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def get_request(self):
+        sock, address = HTTPServer.get_request(self)
+        if self.context is not None:
+            sock = self.context.wrap_socket(sock, server_side=True)
+        return sock, address
+
+    def handle_error(self, request, client_address):
+        # clients aborting their requests are expected
+        pass
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        # ends the handlers waiting for the next request of pooled connections
+        with self.lock:
+            for connection in self.connections:
+                pdfcrowd.shutdown_socket(connection)
+
+    def configure(self, converter):
+        converter.setUseHttp(self.context is None)
+        converter.helper.port = self.server_address[1]
+
+    def bodies(self):
+        return [request.body for request in self.requests]
+
+class ServerTestCase(unittest.TestCase):
+    tls = False
+
+    def setUp(self):
+        self.host = pdfcrowd.HOST
+        pdfcrowd.HOST = '127.0.0.1'
+        self.server = ApiServer(self.tls)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        pdfcrowd.HOST = self.host
+        pdfcrowd.connection_pool.clear()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def client(self, cls = pdfcrowd.HtmlToPdfClient):
+        client = cls('user', 'key')
+        self.server.configure(client)
+        return client
+
+    def write_file(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+class Recorder:
+    """Records the calls of a function replacing it in its class or module."""
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+        self.original = getattr(owner, name)
+        self.calls = 0
+        setattr(owner, name, self)
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.original(*args, **kwargs)
+
+    def __get__(self, instance, owner):
+        return lambda *args, **kwargs: self(instance, *args, **kwargs)
+
+    def restore(self):
+        setattr(self.owner, self.name, self.original)
+
+def parse_parts(body):
+    """Returns the sorted (headers, content) pairs of a multipart body."""
+    boundary = b'--' + pdfcrowd.MULTIPART_BOUNDARY.encode()
+    parts = body.split(boundary)
+    assert parts[0] == b'' and parts[-1] == b'--\r\n'
+    return sorted(tuple(part[2:-2].split(b'\r\n\r\n', 1)) for part in parts[1:-1])
+
+class ConnectionTest(ServerTestCase):
+    def test_reuses_connection(self):
+        client = self.client()
+        for i in range(3):
+            self.assertEqual(client.convertString('<p>x</p>')[:12], b'%PDF-output-')
+        self.assertEqual(len(set(r.client for r in self.server.requests)), 1)
+
+    def test_closed_connection_is_not_reused(self):
+        self.server.responses = [(200, b'%PDF', {'Connection': 'close'})]
+        client = self.client()
+        client.convertString('<p>x</p>')
+        client.convertString('<p>x</p>')
+        self.assertEqual(len(set(r.client for r in self.server.requests)), 2)
+
+class UploadTest(ServerTestCase):
+    def test_uploads_file(self):
+        path = self.write_file('input.html', b'<p>file</p>' * 1000)
+        self.client().convertFile(path)
+        self.assertIn(b'<p>file</p>' * 1000, self.server.requests[0].body)
+
+    def test_uploads_files_and_raw_data(self):
+        path = self.write_file('a.pdf', b'%PDF-1.4 file')
+        client = self.client(pdfcrowd.PdfToPdfClient)
+        client.addPdfFile(path)
+        client.addPdfRawData(b'%PDF-1.4 raw data' + b' ' * 300)
+        client.convert()
+        body = self.server.requests[0].body
+        self.assertIn(b'name="f_1"', body)
+        self.assertIn(b'%PDF-1.4 file', body)
+        self.assertIn(b'name="f_2"', body)
+        self.assertIn(b'%PDF-1.4 raw data', body)
+
+@unittest.skipUnless(PYTHON_3, 'files are sent in chunks in Python 2')
+class FileTestCase(ServerTestCase):
+    def setUp(self):
+        ServerTestCase.setUp(self)
+        self.data = os.urandom(300000)
+        self.path = self.write_file('input.html', self.data)
+
+class SendFileTest(FileTestCase):
+    def test_sendfile_over_http(self):
+        sendfile = Recorder(socket.socket, 'sendfile')
+        try:
+            self.client().convertFile(self.path)
+        finally:
+            sendfile.restore()
+        self.assertEqual(sendfile.calls, 1)
+        self.assertIn(self.data, self.server.requests[0].body)
+
+class MappedFileTest(FileTestCase):
+    tls = True
+
+    def test_mmap_over_tls(self):
+        import mmap
+        mapped = Recorder(mmap, 'mmap')
+        try:
+            self.client().convertFile(self.path)
+        finally:
+            mapped.restore()
+        self.assertEqual(mapped.calls, 1)
+        self.assertIn(self.data, self.server.requests[0].body)
+
+class ResultTest(ServerTestCase):
+    def test_conversion_result(self):
+        client = self.client()
+        self.assertEqual(client.getJobId(), '')
+        output = client.convertString('<p>x</p>')
+        result = client.getConversionResult()
+        self.assertEqual(result.getOutput(), output)
+        self.assertEqual(client.getJobId(), 'job1')
+        self.assertEqual(client.getConsumedCreditCount(), 2)
+        self.assertEqual(client.getRemainingCreditCount(), 1000)
+        self.assertEqual(result.getHeader('x-pdfcrowd-pages'), '3')
+
+    def test_results_of_threads_are_isolated(self):
+        self.server.delay = 0.01
+        client = self.client()
+        errors = []
+        def convert(text):
+            for i in range(5):
+                output = client.convertString(text)
+                result = client.getConversionResult()
+                if result.getOutput() != output or client.getOutputSize() != len(output):
+                    errors.append((text, output, result))
+        threads = [threading.Thread(target=convert, args=('<p>{}</p>'.format('x' * i),))
+                   for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.server.requests), 40)
+
+    @unittest.skipUnless(futures, 'the batch conversions need concurrent.futures')
+    def test_submit_returns_result(self):
+        client = self.client()
+        result = client.submit('convertString', '<p>x</p>').result()
+        self.assertEqual(result.getJobId(), 'job1')
+        self.assertEqual(result.getOutput()[:12], b'%PDF-output-')
+
+class StatelessTest(ServerTestCase):
+    def test_inputs_do_not_leak_into_later_calls(self):
+        client = self.client()
+        client.convertUrl('http://example.com/')
+        client.convertString('<p>x</p>')
+        first, second = self.server.bodies()
+        self.assertIn(b'name="url"', first)
+        self.assertNotIn(b'name="text"', first)
+        self.assertIn(b'name="text"', second)
+        self.assertNotIn(b'name="url"', second)
+
+    def test_concurrent_calls_send_own_inputs(self):
+        self.server.delay = 0.01
+        client = self.client()
+        def convert(i):
+            for j in range(5):
+                if i % 2:
+                    client.convertUrl('http://example.com/{}'.format(i))
+                else:
+                    client.convertString('<p>{}</p>'.format(i))
+        threads = [threading.Thread(target=convert, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for body in self.server.bodies():
+            self.assertEqual(body.count(b'name="url"') + body.count(b'name="text"'), 1)
+        self.assertEqual(len(self.server.requests), 30)
+
+@unittest.skipUnless(futures, 'the batch conversions need concurrent.futures')
+class BatchTest(ServerTestCase):
+    def test_convert_many_sources(self):
+        path = self.write_file('a.html', b'<p>file</p>')
+        sources = [path, 'http://example.com/', b'<p>bytes</p>',
+                   io.BytesIO(b'<p>stream</p>'), ('convertString', '<p>pair</p>')]
+        results = dict((id(source), future.result())
+                       for source, future in self.client().convertMany(sources))
+        self.assertEqual(len(results), 5)
+        bodies = b''.join(self.server.bodies())
+        for data in (b'<p>file</p>', b'http://example.com/', b'<p>bytes</p>',
+                     b'<p>stream</p>', b'<p>pair</p>'):
+            self.assertIn(data, bodies)
+
+    def test_mistyped_file_is_not_converted(self):
+        path = self.write_file('report.html', b'<p>report</p>')
+        results = dict(self.client().convertMany([path, path.replace('report', 'reprot')]))
+        self.assertIsNone(results[path].exception())
+        error = results[path.replace('report', 'reprot')].exception()
+        self.assertIsInstance(error, pdfcrowd.Error)
+        self.assertIn('existing file', str(error))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_sources_are_consumed_lazily(self):
+        self.server.delay = 0.1
+        pulled = []
+        def sources():
+            for i in range(6):
+                pulled.append(i)
+                yield ('convertString', '<p>{}</p>'.format(i))
+        in_flight = []
+        for source, future in self.client().convertMany(sources(), jobs=2):
+            in_flight.append(len(pulled) - len(in_flight))
+            future.result()
+        self.assertEqual(len(in_flight), 6)
+        self.assertLessEqual(max(in_flight), 2)
+
+    def test_submit_runs_in_parallel(self):
+        self.server.delay = 0.2
+        client = self.client().setBatchJobs(4)
+        started = time.time()
+        tasks = [client.submit('convertString', '<p>{}</p>'.format(i)) for i in range(4)]
+        self.assertEqual(len(set(task.result().getJobId() for task in tasks)), 4)
+        self.assertLess(time.time() - started, 0.6)
+
+    def test_pdf_to_pdf_joins_lists(self):
+        paths = [self.write_file(name, b'%PDF-1.4 ' + name.encode()) for name in ('a.pdf', 'b.pdf')]
+        client = self.client(pdfcrowd.PdfToPdfClient).setAction('join')
+        for source, future in client.convertMany([paths, paths[:1]]):
+            future.result()
+        bodies = sorted(self.server.bodies(), key=len)
+        self.assertNotIn(b'name="f_2"', bodies[0])
+        self.assertIn(b'%PDF-1.4 b.pdf', bodies[1])
+
+class RetryTest(ServerTestCase):
+    def client(self):
+        client = ServerTestCase.client(self)
+        client.setRetryPolicy(pdfcrowd.RetryPolicy(base=0.01, cap=0.05))
+        return client
+
+    def test_retries_after_retry_after(self):
+        self.server.responses = [(429, b'busy', {'Retry-After': '0'})]
+        client = self.client().setRetryCount(1)
+        self.assertEqual(client.convertString('<p>x</p>')[:12], b'%PDF-output-')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_gives_up_after_retry_count(self):
+        self.server.responses = [(503, b'busy', {})] * 3
+        client = self.client().setRetryCount(2)
+        with self.assertRaises(pdfcrowd.Error) as cm:
+            client.convertString('<p>x</p>')
+        self.assertEqual(cm.exception.getStatusCode(), 503)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_does_not_retry_client_errors(self):
+        self.server.responses = [(400, b'bad', {})]
+        with self.assertRaises(pdfcrowd.Error):
+            self.client().setRetryCount(3).convertString('<p>x</p>')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_retries_closed_pooled_connection(self):
+        client = self.client().setRetryCount(0)
+        client.convertString('<p>x</p>')
+        with self.server.lock:
+            for connection in self.server.connections:
+                pdfcrowd.shutdown_socket(connection)
+        self.assertEqual(client.convertString('<p>x</p>')[:12], b'%PDF-output-')
+        self.assertEqual(len(set(r.client for r in self.server.requests)), 2)
+
+class DeadlineTest(ServerTestCase):
+    def assertFailsWithin(self, client, seconds, message):
+        started = time.time()
+        with self.assertRaises(pdfcrowd.Error) as cm:
+            client.convertString('<p>x</p>')
+        self.assertLess(time.time() - started, seconds)
+        self.assertIn(message, str(cm.exception))
+
+    def test_deadline_of_slow_response(self):
+        self.server.delay = 2
+        self.assertFailsWithin(self.client().setDeadline(0.3), 1.5, 'deadline')
+
+    def test_deadline_of_slow_upload(self):
+        self.server.read_delay = 0.02
+        path = self.write_file('input.html', b'x' * (8 << 20))
+        client = self.client().setDeadline(0.5).setExpectContinue(None)
+        started = time.time()
+        with self.assertRaises(pdfcrowd.Error) as cm:
+            client.convertFile(path)
+        self.assertLess(time.time() - started, 1.5)
+        self.assertIn('deadline', str(cm.exception))
+
+    def test_cancellation(self):
+        self.server.delay = 2
+        token = pdfcrowd.CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+        self.assertFailsWithin(self.client().setCancellationToken(token), 1.5, 'cancelled')
+
+    def test_pooled_connection_outlives_deadline(self):
+        client = self.client().setDeadline(0.2)
+        client.convertString('<p>x</p>')
+        time.sleep(0.3)
+        client.convertString('<p>x</p>')
+        self.assertEqual(len(set(r.client for r in self.server.requests)), 1)
+
+    def test_deadlines_share_one_thread(self):
+        self.server.delay = 0.3
+        def convert():
+            self.client().setDeadline(5).convertString('<p>x</p>')
+        threads = [threading.Thread(target=convert) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.15)
+        names = [thread.name for thread in threading.enumerate()]
+        for thread in threads:
+            thread.join()
+        self.assertEqual(names.count('pdfcrowd-deadlines'), 1)
+        self.assertEqual(len(self.server.requests), 6)
+        # the thread ends with the last pending deadline
+        for i in range(100):
+            if pdfcrowd.deadline_scheduler.thread is None:
+                break
+            time.sleep(0.01)
+        self.assertIsNone(pdfcrowd.deadline_scheduler.thread)
+
+class TlsTest(ServerTestCase):
+    tls = True
+
+    def setUp(self):
+        ServerTestCase.setUp(self)
+        # every connection is closed after its response
+        self.server.responses = [(200, b'%PDF', {'Connection': 'close'})] * 3
+
+    def test_context_is_created_once(self):
+        create = Recorder(ssl, '_create_unverified_context')
+        try:
+            client = self.client()
+            for i in range(3):
+                client.convertString('<p>x</p>')
+        finally:
+            create.restore()
+        self.assertEqual(create.calls, 1)
+        self.assertEqual(len(set(r.client for r in self.server.requests)), 3)
+
+    @unittest.skipUnless(hasattr(ssl.SSLSocket, 'session'), 'sessions are resumed in Python 3.6+')
+    def test_session_is_resumed(self):
+        client = self.client()
+        for i in range(3):
+            client.convertString('<p>x</p>')
+        self.assertEqual(self.server.resumed, [False, True, True])
+
+class DiskCacheTest(ServerTestCase):
+    def setUp(self):
+        ServerTestCase.setUp(self)
+        self.cache_directory = os.path.join(self.directory, 'cache')
+
+    def test_hit_keeps_result_without_credits(self):
+        client = self.client().setCache(pdfcrowd.DiskCache(self.cache_directory))
+        output = client.convertString('<p>x</p>')
+        self.assertEqual(client.convertString('<p>x</p>'), output)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(client.getJobId(), 'job1')
+        self.assertEqual(client.getConsumedCreditCount(), 0)
+
+    def test_cache_is_shared(self):
+        self.client().setCache(pdfcrowd.DiskCache(self.cache_directory)).convertString('<p>x</p>')
+        cache = pdfcrowd.DiskCache(self.cache_directory)
+        client = self.client().setCache(cache)
+        self.assertEqual(client.convertString('<p>x</p>')[:12], b'%PDF-output-')
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual((cache.getHitCount(), cache.getMissCount()), (1, 0))
+
+    def test_url_outputs_expire(self):
+        client = self.client().setCache(pdfcrowd.DiskCache(self.cache_directory, url_ttl=0))
+        client.convertUrl('http://example.com/')
+        time.sleep(0.01)
+        client.convertUrl('http://example.com/')
+        client.convertString('<p>x</p>')
+        time.sleep(0.01)
+        client.convertString('<p>x</p>')
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_evicts_least_recently_used(self):
+        cache = pdfcrowd.DiskCache(self.cache_directory)
+        client = self.client().setCache(cache)
+        client.convertString('<p>a</p>')
+        size = sum(os.path.getsize(os.path.join(self.cache_directory, name))
+                   for name in os.listdir(self.cache_directory))
+        cache.max_size = size * 2
+        for text in ('<p>b</p>', '<p>a</p>', '<p>c</p>', '<p>a</p>', '<p>b</p>'):
+            time.sleep(0.01)
+            client.convertString(text)
+        # b is evicted by c, a stays as the recently used one
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(len(os.listdir(self.cache_directory)), 2)
+
+class MemoryCacheTest(ServerTestCase):
+    def test_hit_and_miss(self):
+        cache = pdfcrowd.MemoryCache()
+        client = self.client().setCache(cache)
+        first = client.convertString('<p>x</p>')
+        self.assertIs(client.convertString('<p>x</p>'), first)
+        client.convertString('<p>y</p>')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual((cache.getHitCount(), cache.getMissCount()), (1, 2))
+
+    def test_evicts_least_recently_used(self):
+        cache = pdfcrowd.MemoryCache(max_size=40)
+        client = self.client().setCache(cache)
+        for text in ('<p>a</p>', '<p>b</p>', '<p>a</p>', '<p>c</p>', '<p>a</p>', '<p>b</p>'):
+            client.convertString(text)
+        # b is evicted by c, a stays as the recently used one
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_options_are_part_of_the_key(self):
+        client = self.client().setCache(pdfcrowd.MemoryCache())
+        client.convertString('<p>x</p>')
+        client.setPageSize('Letter').convertString('<p>x</p>')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_file_changes_are_part_of_the_key(self):
+        path = self.write_file('input.html', b'<p>a</p>')
+        client = self.client().setCache(pdfcrowd.MemoryCache())
+        client.convertFile(path)
+        client.convertFile(path)
+        self.write_file('input.html', b'<p>changed</p>')
+        client.convertFile(path)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_url_outputs_expire(self):
+        client = self.client().setCache(pdfcrowd.MemoryCache(url_ttl=0))
+        client.convertUrl('http://example.com/')
+        time.sleep(0.01)
+        client.convertUrl('http://example.com/')
+        self.assertEqual(len(self.server.requests), 2)
+
+class SingleFlightTest(ServerTestCase):
+    def convert_in_threads(self, single_flight, count = 4):
+        outputs = []
+        errors = []
+        def convert():
+            client = self.client().setSingleFlight(single_flight).setRetryCount(0)
+            try:
+                outputs.append(client.convertString('<p>x</p>'))
+            except pdfcrowd.Error as why:
+                errors.append(why)
+        threads = [threading.Thread(target=convert) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outputs, errors
+
+    def test_identical_conversions_share_one_request(self):
+        self.server.delay = 0.3
+        outputs, errors = self.convert_in_threads(pdfcrowd.SingleFlight())
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(set(outputs)), 1)
+        self.assertEqual(len(outputs), 4)
+
+    def test_error_is_shared(self):
+        self.server.delay = 0.3
+        self.server.responses = [(400, b'bad', {})]
+        outputs, errors = self.convert_in_threads(pdfcrowd.SingleFlight())
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(errors), 4)
+
+    def test_finished_conversions_are_not_shared(self):
+        client = self.client().setSingleFlight(pdfcrowd.SingleFlight())
+        client.convertString('<p>x</p>')
+        client.convertString('<p>x</p>')
+        self.assertEqual(len(self.server.requests), 2)
+
+class AssetCacheTest(ServerTestCase):
+    def setUp(self):
+        ServerTestCase.setUp(self)
+        self.assets = pdfcrowd.AssetCache()
+        self.watermark = self.write_file('watermark.pdf', b'%PDF-1.4 watermark')
+
+    def client(self, cls = pdfcrowd.HtmlToPdfClient):
+        client = ServerTestCase.client(self, cls)
+        client.setAssetCache(self.assets)
+        return client
+
+    def test_watermark_is_kept(self):
+        client = self.client().setPageWatermark(self.watermark)
+        client.convertString('<p>x</p>')
+        client.convertString('<p>x</p>')
+        self.assertEqual(list(self.assets.entries), [os.path.abspath(self.watermark)])
+        for body in self.server.bodies():
+            self.assertIn(b'%PDF-1.4 watermark', body)
+
+    def test_changed_file_is_read_again(self):
+        client = self.client().setPageWatermark(self.watermark)
+        client.convertString('<p>x</p>')
+        self.write_file('watermark.pdf', b'%PDF-1.4 changed watermark')
+        client.convertString('<p>x</p>')
+        self.assertIn(b'%PDF-1.4 changed watermark', self.server.requests[1].body)
+        self.assertEqual(self.assets.size, len(b'%PDF-1.4 changed watermark'))
+
+    def test_large_file_is_not_kept(self):
+        self.assets.max_file_size = 10
+        client = self.client().setPageWatermark(self.watermark)
+        client.convertString('<p>x</p>')
+        self.assertEqual(self.assets.size, 0)
+        self.assertIn(b'%PDF-1.4 watermark', self.server.requests[0].body)
+
+    def test_inputs_are_not_kept(self):
+        path = self.write_file('input.html', b'<p>file</p>')
+        self.client().convertFile(path)
+        client = self.client(pdfcrowd.PdfToPdfClient)
+        client.addPdfFile(self.watermark)
+        client.convert()
+        self.assertEqual(self.assets.size, 0)
+        self.assertIn(b'%PDF-1.4 watermark', self.server.requests[1].body)
+
+class TemplateTest(ServerTestCase):
+    def configure(self, client):
+        return client.setPageSize('Letter').setNoMargins(True).setTitle('Title')
+
+    def test_frozen_body_is_equivalent(self):
+        self.configure(self.client()).convertString('<p>x</p>')
+        self.configure(self.client()).freeze().convertString('<p>x</p>')
+        first, second = self.server.bodies()
+        self.assertEqual(len(first), len(second))
+        self.assertEqual(parse_parts(first), parse_parts(second))
+
+    def test_options_changed_after_freeze(self):
+        path = self.write_file('input.html', b'<p>file</p>')
+        self.configure(self.client()).setTitle('Other').convertFile(path)
+        client = self.configure(self.client()).freeze()
+        client.setTitle('Other').convertFile(path)
+        client.freeze().convertFile(path)
+        first, second, third = [parse_parts(body) for body in self.server.bodies()]
+        self.assertEqual(first, second)
+        self.assertEqual(first, third)
+
+    def test_template_is_encoded_once(self):
+        client = self.configure(self.client()).freeze()
+        encode = Recorder(pdfcrowd, 'encode_fields')
+        try:
+            client.convertString('<p>x</p>')
+            client.convertString('<p>y</p>')
+        finally:
+            encode.restore()
+        # only the text fields are encoded per conversion
+        self.assertEqual(encode.calls, 2)
+        self.assertIn(b'Title', self.server.requests[1].body)
+
+class ProfileTest(ServerTestCase):
+    def test_profile_body_equals_setters(self):
+        profile = pdfcrowd.Profile.fromDict(
+            pdfcrowd.HtmlToPdfClient, {'page-size': 'Letter', 'no-margins': True,
+                                       'page-watermark': self.write_file('w.pdf', b'%PDF-1.4 w')})
+        self.client().applyProfile(profile).convertString('<p>x</p>')
+        self.client().setPageSize('Letter').setNoMargins(True).setPageWatermark(
+            os.path.join(self.directory, 'w.pdf')).convertString('<p>x</p>')
+        first, second = self.server.bodies()
+        self.assertEqual(parse_parts(first), parse_parts(second))
+
+    def test_profile_is_hashable(self):
+        options = {'page-size': 'A4', 'margin-top': '1in'}
+        first = pdfcrowd.Profile.fromDict(pdfcrowd.HtmlToPdfClient, options)
+        second = pdfcrowd.Profile.fromJson(pdfcrowd.HtmlToPdfClient, '{"margin-top": "1in", "page-size": "A4"}')
+        self.assertEqual(first, second)
+        self.assertEqual(len(set([first, second])), 1)
+
+    def test_invalid_options_are_rejected(self):
+        self.assertRaises(pdfcrowd.Error, pdfcrowd.Profile.fromDict,
+                          pdfcrowd.HtmlToPdfClient, {'no-such-option': 1})
+        self.assertRaises(pdfcrowd.Error, pdfcrowd.Profile.fromDict,
+                          pdfcrowd.HtmlToPdfClient, {'page-watermark': 'missing.pdf'})
+
+    def test_profile_inputs_follow_converter_inputs(self):
+        paths = [self.write_file(name, b'%PDF-1.4 ' + name.encode()) for name in ('a.pdf', 'b.pdf')]
+        profile = pdfcrowd.Profile.fromDict(
+            pdfcrowd.PdfToPdfClient, {'add-pdf-file': paths[0], 'action': 'join'})
+        client = pdfcrowd.PdfToPdfClient('user', 'key')
+        client.applyProfile(profile)
+        client.addPdfFile(paths[1])
+        self.assertEqual(client.files, {'f_1': paths[0], 'f_2': paths[1]})
+        self.assertEqual(client.fields['action'], 'join')
+
+class CommandLineTest(ServerTestCase):
+    def run_cli(self, *args, **kwargs):
+        stdout = kwargs.get('stdout', io.BytesIO())
+        stderr = text_stream()
+        try:
+            pdfcrowd.run_cli([kwargs.get('converter', 'html2pdf'),
+                              '-user-name', 'user', '-api-key', 'key'] + list(args),
+                             stdin = kwargs.get('stdin'), stdout = stdout, stderr = stderr,
+                             setup = self.server.configure, cwd = self.directory)
+            status = 0
+        except SystemExit as why:
+            status = why.code
+        return status, stderr.getvalue()
+
+    def test_binary_stdin_to_stdout(self):
+        data = b'%PDF-1.4 \xff\x00' + b'x' * 1000
+        stdout = io.BytesIO()
+        status, stderr = self.run_cli('-', converter = 'pdf2pdf',
+                                      stdin = io.BytesIO(data), stdout = stdout)
+        self.assertEqual(status, 0)
+        self.assertIn(data, self.server.requests[0].body)
+        self.assertEqual(stdout.getvalue()[:12], b'%PDF-output-')
+
+    @unittest.skipUnless(futures, 'the batch mode needs concurrent.futures')
+    def test_batch_output(self):
+        self.write_file('a.html', b'<p>a</p>')
+        os.mkdir(os.path.join(self.directory, 'sub'))
+        self.write_file(os.path.join('sub', 'a.html'), b'<p>sub</p>')
+        status, stderr = self.run_cli('-o', 'out', '-j', '2', 'a.html', 'sub/a.html')
+        self.assertEqual(status, 0)
+        out = os.path.join(self.directory, 'out')
+        self.assertEqual(sorted(os.listdir(out)), ['a-2.pdf', 'a.pdf'])
+        self.assertIn('2 conversions, 0 failed', stderr)
+        with open(os.path.join(out, 'a.pdf'), 'rb') as f:
+            self.assertEqual(f.read()[:12], b'%PDF-output-')
+
+    @unittest.skipUnless(futures, 'the batch mode needs concurrent.futures')
+    def test_batch_failure_sets_status(self):
+        self.write_file('a.html', b'<p>a</p>')
+        self.server.responses = [(400, b'bad', {})]
+        status, stderr = self.run_cli('-o', 'out', 'a.html')
+        self.assertEqual(status, 1)
+        self.assertIn('FAILED', stderr)
+
+    def test_invalid_jobs(self):
+        for jobs in ('0', '-1', 'x'):
+            status, stderr = self.run_cli('-j', jobs, '-o', 'out', 'a.html')
+            self.assertEqual(status, 2)
+            self.assertIn('invalid value', stderr)
+
+    def test_file_options_are_relative_to_cwd(self):
+        self.write_file('a.html', b'<p>a</p>')
+        self.write_file('watermark.pdf', b'%PDF-1.4 watermark')
+        status, stderr = self.run_cli('-page-watermark', 'watermark.pdf', 'a.html')
+        self.assertEqual(status, 0)
+        self.assertIn(b'%PDF-1.4 watermark', self.server.requests[0].body)
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'the worker needs unix sockets')
+class WorkerTest(ServerTestCase):
+    class Worker(pdfcrowd.Worker):
+        def __init__(self, path, server):
+            pdfcrowd.Worker.__init__(self, path)
+            self.server = server
+            self.converters = []
+
+        def _setup(self, converter):
+            pdfcrowd.Worker._setup(self, converter)
+            self.server.configure(converter)
+            self.converters.append(converter)
+
+    def setUp(self):
+        ServerTestCase.setUp(self)
+        self.path = os.path.join(self.directory, 'worker.sock')
+        self.worker = WorkerTest.Worker(self.path, self.server)
+        self.thread = threading.Thread(target=self.worker.serve)
+        self.thread.daemon = True
+        self.thread.start()
+        while not os.path.exists(self.path):
+            time.sleep(0.01)
+        self.cwd = os.getcwd()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.worker.close()
+        self.thread.join(5)
+        ServerTestCase.tearDown(self)
+
+    def forward(self, args, stdin = b''):
+        stdout = sys.stdout
+        old_stdin = sys.stdin
+        if PYTHON_3:
+            sys.stdout = io.TextIOWrapper(io.BytesIO())
+            sys.stdin = io.TextIOWrapper(io.BytesIO(stdin))
+        else:
+            sys.stdout = io.BytesIO()
+            sys.stdin = io.BytesIO(stdin)
+        try:
+            status = pdfcrowd.forward_to_worker(
+                ['html2pdf', '-user-name', 'user', '-api-key', 'key'] + args,
+                False, self.path)
+            output = (sys.stdout.buffer if PYTHON_3 else sys.stdout).getvalue()
+        finally:
+            sys.stdout = stdout
+            sys.stdin = old_stdin
+        return status, output
+
+    def test_round_trip(self):
+        self.write_file('a.html', b'<p>a</p>')
+        status, output = self.forward(['a.html'])
+        self.assertEqual(status, 0)
+        self.assertEqual(output[:12], b'%PDF-output-')
+        self.assertIn(b'<p>a</p>', self.server.requests[0].body)
+
+    def test_stdin(self):
+        status, output = self.forward(['-'], b'<p>stdin</p>')
+        self.assertEqual(status, 0)
+        self.assertIn(b'<p>stdin</p>', self.server.requests[0].body)
+
+    def test_option_values_are_not_paths(self):
+        self.write_file('a.html', b'<p>a</p>')
+        os.mkdir(os.path.join(self.directory, 'landscape'))
+        status, output = self.forward(['-orientation', 'landscape', 'a.html'])
+        self.assertEqual(status, 0)
+        self.assertIn(b'\r\n\r\nlandscape\r\n', self.server.requests[0].body)
+
+    def test_client_certificate_is_relative_to_script(self):
+        self.write_file('a.html', b'<p>a</p>')
+        self.write_file('cert.p12', b'certificate')
+        status, output = self.forward(['-client-certificate', 'cert.p12', 'a.html'])
+        self.assertEqual(status, 0)
+        self.assertEqual(self.worker.converters[0].files['client_certificate'],
+                         os.path.join(os.getcwd(), 'cert.p12'))
+        self.assertIn(b'\r\n\r\ncertificate\r\n', self.server.requests[0].body)
+
+    def test_no_worker(self):
+        self.assertIsNone(pdfcrowd.forward_to_worker(
+            ['html2pdf'], False, os.path.join(self.directory, 'missing.sock')))
+
+    def test_refuses_to_replace_other_files(self):
+        path = self.write_file('not-a-socket', b'keep')
+        self.assertRaises(pdfcrowd.Error, pdfcrowd.Worker(path).serve)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'keep')
+
+class ExpectContinueTest(ServerTestCase):
+    def setUp(self):
+        ServerTestCase.setUp(self)
+        self.path = self.write_file('input.html', b'x' * 100000)
+
+    def test_small_body_is_sent_at_once(self):
+        self.client().convertString('<p>x</p>')
+        self.assertEqual(self.server.expects, [])
+
+    @unittest.skipUnless(PYTHON_3, 'the server answers 100-continue in Python 3')
+    def test_accepted_body_is_sent(self):
+        client = self.client().setExpectContinue(1000)
+        self.assertEqual(client.convertFile(self.path)[:12], b'%PDF-output-')
+        self.assertEqual(len(self.server.expects), 1)
+        self.assertIn(b'x' * 100000, self.server.requests[0].body)
+
+    @unittest.skipUnless(PYTHON_3, 'the server answers 100-continue in Python 3')
+    def test_rejected_body_is_not_sent(self):
+        self.server.reject = (402, b'402.100 - no credits')
+        client = self.client().setExpectContinue(1000)
+        with self.assertRaises(pdfcrowd.Error) as cm:
+            client.convertFile(self.path)
+        self.assertEqual(cm.exception.getStatusCode(), '402')
+        self.assertEqual(self.server.requests, [])
+        # the rejected connection is not reused
+        self.server.reject = None
+        self.assertEqual(client.convertFile(self.path)[:12], b'%PDF-output-')
+
+    def test_timeout_is_required(self):
+        for timeout in (None, 0):
+            self.assertRaises(pdfcrowd.Error, self.client().setExpectContinue, 1000, timeout)
+
+class CreditTrackerTest(ServerTestCase):
+    def test_credit_tracker_rejects_locally(self):
+        tracker = pdfcrowd.CreditTracker(reserve=5)
+        self.server.responses = [
+            (200, b'%PDF', {'X-Pdfcrowd-Remaining-Credits': '6',
+                            'X-Pdfcrowd-Consumed-Credits': '3'})]
+        client = self.client().setCreditTracker(tracker)
+        client.convertString('<p>x</p>')
+        self.assertEqual(tracker.getBalance(), 6)
+        with self.assertRaises(pdfcrowd.Error) as cm:
+            client.convertString('<p>x</p>')
+        self.assertIn('Not enough credits', str(cm.exception))
+        self.assertEqual(len(self.server.requests), 1)
+
+class RateLimiterTest(ServerTestCase):
+    def convert_in_threads(self, clients):
+        errors = []
+        def convert(client):
+            try:
+                client.convertString('<p>x</p>')
+            except pdfcrowd.Error as why:
+                errors.append(why)
+        threads = [threading.Thread(target=convert, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_rate_limiter_bounds_concurrency(self):
+        self.server.delay = 0.1
+        limiter = pdfcrowd.RateLimiter(concurrency=2)
+        peak = []
+        acquire = limiter.acquire
+        def tracking_acquire(timeout=None):
+            acquired = acquire(timeout)
+            peak.append(limiter.getRunning())
+            return acquired
+        limiter.acquire = tracking_acquire
+        clients = [self.client().setRateLimiter(limiter) for i in range(6)]
+        self.assertEqual(self.convert_in_threads(clients), [])
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(limiter.getRunning(), 0)
+
+    def test_rate_limiter_spaces_requests(self):
+        limiter = pdfcrowd.RateLimiter(rate=20)
+        client = self.client().setRateLimiter(limiter)
+        started = time.time()
+        for i in range(5):
+            client.convertString('<p>x</p>')
+        self.assertGreaterEqual(time.time() - started, 0.18)
+
+    def test_adaptive_limiter_backs_off(self):
+        self.server.delay = 0.05
+        limiter = pdfcrowd.AdaptiveLimiter(initial=8)
+        self.server.responses = [(503, b'busy', {})]
+        client = self.client().setRateLimiter(limiter).setRetryCount(0)
+        with self.assertRaises(pdfcrowd.Error):
+            client.convertString('<p>x</p>')
+        self.assertLess(limiter.getConcurrency(), 8)
+        concurrency = limiter.getConcurrency()
+        clients = [self.client().setRateLimiter(limiter) for i in range(20)]
+        self.assertEqual(self.convert_in_threads(clients), [])
+        self.assertGreater(limiter.getConcurrency(), concurrency)
+
+    def test_adaptive_limiter_grows_only_when_saturated(self):
+        self.server.delay = 0.05
+        limiter = pdfcrowd.AdaptiveLimiter(initial=4)
+        client = self.client().setRateLimiter(limiter)
+        for i in range(20):
+            client.convertString('<p>x</p>')
+        self.assertEqual(limiter.getConcurrency(), 4)
+
+class CircuitBreakerTest(ServerTestCase):
+    def test_circuit_breaker(self):
+        breaker = pdfcrowd.CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+        self.server.responses = [(500, b'down', {})] * 3
+        client = self.client().setCircuitBreaker(breaker).setRetryCount(0)
+        for i in range(3):
+            self.assertRaises(pdfcrowd.Error, client.convertString, '<p>x</p>')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(breaker.getState(), pdfcrowd.CircuitBreaker.OPEN)
+        time.sleep(0.25)
+        self.assertEqual(breaker.getState(), pdfcrowd.CircuitBreaker.HALF_OPEN)
+        # the failed probe opens the breaker again
+        self.assertRaises(pdfcrowd.Error, client.convertString, '<p>x</p>')
+        self.assertEqual(breaker.getState(), pdfcrowd.CircuitBreaker.OPEN)
+        time.sleep(0.25)
+        client.convertString('<p>x</p>')
+        self.assertEqual(breaker.getState(), pdfcrowd.CircuitBreaker.CLOSED)
+
+    def test_circuit_breaker_ignores_client_errors(self):
+        breaker = pdfcrowd.CircuitBreaker(failure_threshold=1)
+        self.server.responses = [(400, b'bad', {})]
+        client = self.client().setCircuitBreaker(breaker)
+        self.assertRaises(pdfcrowd.Error, client.convertString, '<p>x</p>')
+        self.assertEqual(breaker.getState(), pdfcrowd.CircuitBreaker.CLOSED)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2009-2018 pdfcrowd.com
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Behaviour tests of the asyncio clients against a local HTTP server.
+
+    python3 -m unittest test_pdfcrowd_async
+"""
+
+import asyncio
+import gc
+import time
+import unittest
+import warnings
+
+import pdfcrowd
+import pdfcrowd_async
+from test_pdfcrowd import ServerTestCase
+
+class AsyncTest(ServerTestCase):
+    def client(self):
+        return ServerTestCase.client(self, pdfcrowd_async.HtmlToPdfClient)
+
+    def run_async(self, coro):
+        async def run():
+            try:
+                return await coro
+            finally:
+                # the pooled connections close while their loop runs
+                pdfcrowd_async.connection_pool.clear()
+                await asyncio.sleep(0)
+        return asyncio.run(run())
+
+    def test_reuses_connection(self):
+        async def convert(client):
+            return [await client.convertString('<p>x</p>') for i in range(3)]
+        outputs = self.run_async(convert(self.client()))
+        self.assertEqual([output[:12] for output in outputs], [b'%PDF-output-'] * 3)
+        self.assertEqual(len(set(r.client for r in self.server.requests)), 1)
+
+    def test_concurrent_conversions(self):
+        self.server.delay = 0.2
+        async def convert(client):
+            return await asyncio.gather(*[client.convertString('<p>{}</p>'.format(i))
+                                          for i in range(4)])
+        started = time.time()
+        self.assertEqual(len(self.run_async(convert(self.client()))), 4)
+        self.assertLess(time.time() - started, 0.6)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_drops_connections_of_closed_loops(self):
+        pool = pdfcrowd_async.connection_pool
+        async def convert(client):
+            await client.convertString('<p>x</p>')
+            return [loop.is_closed() for loop, key in pool.idle]
+        with warnings.catch_warnings():
+            # the transports of closed loops can't close
+            warnings.simplefilter('ignore', ResourceWarning)
+            for i in range(3):
+                asyncio.run(convert(self.client()))
+            self.assertEqual(len(pool.idle), 1)
+            self.assertEqual(self.run_async(convert(self.client())), [False])
+            gc.collect()
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_iterator(self):
+        async def convert(client):
+            return b''.join([chunk async for chunk in
+                             client.convertStringToIterator('<p>x</p>')])
+        self.assertEqual(self.run_async(convert(self.client()))[:12], b'%PDF-output-')
+
+    def test_iterator_result(self):
+        async def convert(client):
+            await client.convertString('<p>first</p>')
+            output = b''.join([chunk async for chunk in
+                               client.convertStringToIterator('<p>x</p>')])
+            return output, client.getJobId(), client.getOutputSize()
+        output, job_id, size = self.run_async(convert(self.client()))
+        self.assertEqual((job_id, size), ('job2', len(output)))
+
+    def test_results_of_tasks_are_isolated(self):
+        self.server.delay = 0.05
+        async def convert(client, text):
+            output = await client.convertString(text)
+            return output, client.getConversionResult()
+        async def convert_all(client):
+            return await asyncio.gather(*[convert(client, '<p>{}</p>'.format('x' * i))
+                                          for i in range(4)])
+        for output, result in self.run_async(convert_all(self.client())):
+            self.assertEqual(result.getOutput(), output)
+
+    def test_submit_and_convert_many_return_results(self):
+        async def convert(client):
+            result = await client.submit('convertString', '<p>x</p>')
+            results = [await task async for source, task in
+                       client.convertMany([b'<p>a</p>', b'<p>b</p>'])]
+            return result, results
+        result, results = self.run_async(convert(self.client()))
+        self.assertEqual(result.getJobId(), 'job1')
+        self.assertEqual(sorted(r.getJobId() for r in results), ['job2', 'job3'])
+        self.assertEqual(results[0].getOutput()[:12], b'%PDF-output-')
+
+    def test_convert_many_rejects_mistyped_files(self):
+        async def convert(client):
+            return [(source, task.exception()) async for source, task in
+                    client.convertMany([b'<p>x</p>', 'reprot.html'])]
+        errors = dict(self.run_async(convert(self.client())))
+        self.assertIsNone(errors[b'<p>x</p>'])
+        self.assertIn('existing file', str(errors['reprot.html']))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_rejected_body_is_not_sent(self):
+        self.server.reject = (402, b'402.100 - no credits')
+        path = self.write_file('input.html', b'x' * 100000)
+        client = self.client().setExpectContinue(1000)
+        with self.assertRaises(pdfcrowd.Error) as cm:
+            self.run_async(client.convertFile(path))
+        self.assertEqual(cm.exception.getStatusCode(), '402')
+        self.assertEqual(self.server.requests, [])
+
+    def test_retries_after_retry_after(self):
+        self.server.responses = [(429, b'busy', {'Retry-After': '0'})]
+        client = self.client().setRetryCount(1)
+        client.setRetryPolicy(pdfcrowd.RetryPolicy(base=0.01, cap=0.05))
+        self.run_async(client.convertString('<p>x</p>'))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_deadline(self):
+        self.server.delay = 2
+        client = self.client().setDeadline(0.3)
+        started = time.time()
+        with self.assertRaises(pdfcrowd.Error) as cm:
+            self.run_async(client.convertString('<p>x</p>'))
+        self.assertLess(time.time() - started, 1.5)
+        self.assertIn('deadline', str(cm.exception))
+
+    def test_single_flight(self):
+        self.server.delay = 0.2
+        single_flight = pdfcrowd_async.SingleFlight()
+        async def convert():
+            return await asyncio.gather(*[
+                self.client().setSingleFlight(single_flight).convertString('<p>x</p>')
+                for i in range(4)])
+        self.assertEqual(len(set(self.run_async(convert()))), 1)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_single_flight_leader_cancelled(self):
+        self.server.delay = 0.3
+        single_flight = pdfcrowd_async.SingleFlight()
+        async def convert():
+            leader = asyncio.ensure_future(asyncio.wait_for(
+                self.client().setSingleFlight(single_flight).convertString('<p>x</p>'), 0.1))
+            await asyncio.sleep(0.01)
+            follower = asyncio.ensure_future(
+                self.client().setSingleFlight(single_flight).convertString('<p>x</p>'))
+            await asyncio.wait([leader, follower])
+            return leader, follower
+        leader, follower = self.run_async(convert())
+        self.assertIsInstance(leader.exception(), asyncio.TimeoutError)
+        self.assertFalse(follower.cancelled())
+        self.assertEqual(follower.result()[:12], b'%PDF-output-')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_single_flight_waiter_cancelled(self):
+        self.server.delay = 0.3
+        single_flight = pdfcrowd_async.SingleFlight()
+        async def convert():
+            leader = asyncio.ensure_future(
+                self.client().setSingleFlight(single_flight).convertString('<p>x</p>'))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self.client().setSingleFlight(single_flight).convertString('<p>x</p>'), 0.1)
+            return await leader
+        self.assertEqual(self.run_async(convert())[:12], b'%PDF-output-')
+        self.assertEqual(len(self.server.requests), 1)
+
+if __name__ == '__main__':
+    unittest.main()